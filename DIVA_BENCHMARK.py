@@ -0,0 +1,313 @@
+import argparse
+import json
+import math
+import os.path
+import random
+import shutil
+import tempfile
+import time
+
+import DIVA_LIGHTING as diva_lighting
+import nuthouse01.nuthouse01_core as core
+import nuthouse01.nuthouse01_vmd_parser as vmd_parser
+import nuthouse01.nuthouse01_vmd_struct as vmd_struct
+
+
+# (events, fields) of the synthetic PVs: CHANGE_FIELD events in the script and distinct fields they switch between
+DSC_SIZES = ((1000, 10), (5000, 50), (20000, 200))
+
+# frames of the synthetic VMDs, half bone and half morph frames
+VMD_SIZES = (10000, 100000, 1000000)
+
+# distinct bone and morph tracks of the synthetic VMDs
+VMD_TRACKS = 64
+
+# DSC time units per second
+DSC_TIME_UNIT = 100000
+
+# other commands a real script has between the field changes, the lighting pipeline has to skip them
+FILLER_COMMANDS = (
+    "DATA_CAMERA(0, 1);",
+    "SET_MOTION(0, 1, -1, 1000);",
+    "MIKU_DISP(0, 1);",
+    "EXPRESSION(0, 23, -1, -1);",
+    "MOUTH_ANIM(0, 0, 8, 500, 1000);",
+)
+
+
+def write_glow(path: str, rng: random.Random):
+    def floats(count):
+        return " ".join(f"{rng.uniform(0, 2):.6f}" for _ in range(count))
+
+    with open(path, "w", encoding="UTF-8") as file:
+        file.write(f"exposure {floats(1)}\n"
+                   f"gamma {floats(1)}\n"
+                   f"saturate_power {rng.randint(1, 5)}\n"
+                   f"saturate_coef {floats(1)}\n"
+                   f"flare {floats(3)}\n"
+                   f"sigma {floats(3)}\n"
+                   f"intensity {floats(3)}\n"
+                   f"auto_exposure {rng.randint(0, 1)}\n"
+                   f"tone_map_method {rng.randint(0, 2)}\n"
+                   f"fade_color {floats(4)} 0\n"
+                   f"tone_transform {floats(6)} \n"
+                   "EOF\n")
+
+
+def write_light(path: str, rng: random.Random):
+    def floats(count):
+        return " ".join(f"{rng.uniform(-5, 5):.6f}" for _ in range(count))
+
+    lines = ["group_start 0"]
+
+    # only the chara (0) and stage (1) lights are used, the rest is there to be skipped like in the real files
+    for light_id in range(8):
+        lines += [f"id_start {light_id}", f"type {int(light_id < 2)}",
+                  f"ambient {floats(4)}", f"diffuse {floats(4)}", f"specular {floats(4)}", f"position {floats(4)}",
+                  f"id_end {light_id}"]
+
+    lines += ["group_end 0", "EOF", ""]
+
+    with open(path, "w", encoding="UTF-8") as file:
+        file.write("\n".join(lines))
+
+
+def make_synthetic_pv(folder: str, events: int, fields: int, pv_id=1, seed=0):
+    """
+    Write a DSC text dump with the given number of TIME/CHANGE_FIELD events switching between the given number of
+    distinct fields, and a FARC_CONTENT folder with a glow and light file for every field.
+    Returns (dsc path, FARC_CONTENT path). The same seed always gives the same files.
+    """
+    rng = random.Random(seed)
+    farc_content = os.path.join(folder, "FARC_CONTENT")
+    os.makedirs(farc_content, exist_ok=True)
+
+    for field_id in range(1, fields + 1):
+        write_glow(os.path.join(farc_content, f"glow_pv{pv_id:03}_c{field_id:03}.txt"), rng)
+        write_light(os.path.join(farc_content, f"light_pv{pv_id:03}_c{field_id:03}.txt"), rng)
+
+    dsc_input = os.path.join(folder, "DSC_Input.txt")
+    lines = ["PV_BRANCH_MODE(0);", "TIME(0);", "MUSIC_PLAY();", "CHANGE_FIELD(1);"]
+    current_time = 0
+
+    for _ in range(events):
+        # a field lasts from half a second to a few seconds
+        current_time += rng.randint(DSC_TIME_UNIT // 2, 4 * DSC_TIME_UNIT)
+        lines.append(f"TIME({current_time});")
+        lines += rng.sample(FILLER_COMMANDS, 2)
+        lines.append(f"CHANGE_FIELD({rng.randint(1, fields)});")
+
+    lines += ["PV_END();", ""]
+
+    with open(dsc_input, "w", encoding="UTF-8") as file:
+        file.write("\n".join(lines))
+
+    return dsc_input, farc_content
+
+
+def make_synthetic_vmd(frames: int, tracks=VMD_TRACKS, seed=0):
+    """
+    A Vmd with the given number of frames, half of them bone frames and half morph frames, spread over the given
+    number of bone and morph tracks. Every frame has its own random values, so nothing can be shared between records.
+    """
+    rng = random.Random(seed)
+    bone_names = [f"bone{x:03}" for x in range(tracks)]
+    morph_names = [f"morph{x:03}" for x in range(tracks)]
+    bones = frames // 2
+
+    boneframes = [
+        vmd_struct.VmdBoneFrame(
+            name=bone_names[i % tracks], f=i // tracks,
+            pos=[rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-10, 10)],
+            rot=[rng.uniform(-180, 180), rng.uniform(-90, 90), rng.uniform(-180, 180)],
+            phys_off=False
+        )
+        for i in range(bones)
+    ]
+    morphframes = [
+        vmd_struct.VmdMorphFrame(name=morph_names[i % tracks], f=i // tracks, val=rng.random())
+        for i in range(frames - bones)
+    ]
+
+    return vmd_struct.Vmd(vmd_struct.VmdHeader(2, "Benchmark"), boneframes, morphframes, [], [], [], [])
+
+
+def timed(func, *args, **kwargs):
+    """ Run func once, returns (wall time in seconds, return value). """
+    start = time.perf_counter()
+    value = func(*args, **kwargs)
+
+    return time.perf_counter() - start, value
+
+
+def scaling_exponent(sizes: list, seconds: list):
+    """
+    Slope of log(time) over log(size) between the smallest and the largest run: 1 is linear scaling, 2 quadratic.
+    None if there are fewer than two runs to compare.
+    """
+    if len(sizes) < 2 or min(seconds[0], seconds[-1]) <= 0:
+        return None
+
+    return math.log(seconds[-1] / seconds[0]) / math.log(sizes[-1] / sizes[0])
+
+
+def bench_parse_dsc(folder: str, sizes=DSC_SIZES, fps=60, emission="full", seed=0):
+    """
+    Time parse_dsc end to end on synthetic PVs of every (events, fields) size, with a cold ParamCache.
+    The stage breakdown of each run is included, see core.RunMetrics.
+    """
+    results = []
+
+    for events, fields in sizes:
+        pv_folder = os.path.join(folder, f"pv_{events}_{fields}")
+        dsc_input, farc_content = make_synthetic_pv(pv_folder, events, fields, seed=seed)
+        output = os.path.join(pv_folder, "PV_LIGHT_001.vmd")
+
+        with core.collect_metrics(f"parse_dsc {events} events {fields} fields") as metrics:
+            seconds, _ = timed(
+                diva_lighting.parse_dsc,
+                dsc_input=dsc_input, farc_content=farc_content, mv_id=1, fps=fps, default_policy="first",
+                output=output, emission=emission
+            )
+
+        metrics = metrics.to_dict()
+        results.append({
+            "events": events,
+            "fields": fields,
+            "seconds": seconds,
+            "events_per_second": events / seconds,
+            "frames": metrics["counters"].get("frames.bones", 0) + metrics["counters"].get("frames.morphs", 0),
+            "output_bytes": os.path.getsize(output),
+            "stages": {name: stage["seconds"] for name, stage in metrics["stages"].items()},
+        })
+
+    return results
+
+
+def bench_vmd(folder: str, sizes=VMD_SIZES, seed=0):
+    """
+    Time write_vmd and read_vmd on synthetic VMDs of every size.
+    The synthetic frames are built before the clock starts and freed before the next size.
+    """
+    results = []
+
+    for frames in sizes:
+        vmd_filename = os.path.join(folder, f"synthetic_{frames}.vmd")
+        vmd = make_synthetic_vmd(frames, seed=seed)
+        write_seconds, _ = timed(vmd_parser.write_vmd, vmd_filename, vmd)
+        del vmd
+
+        read_seconds, vmd = timed(vmd_parser.read_vmd, vmd_filename)
+        del vmd
+
+        results.append({
+            "frames": frames,
+            "bytes": os.path.getsize(vmd_filename),
+            "write_seconds": write_seconds,
+            "read_seconds": read_seconds,
+            "write_frames_per_second": frames / write_seconds,
+            "read_frames_per_second": frames / read_seconds,
+        })
+        os.remove(vmd_filename)
+
+    return results
+
+
+def format_report(dsc_results: list, vmd_results: list):
+    lines = []
+
+    if dsc_results:
+        lines.append("parse_dsc, end to end")
+        lines.append(f"{'events':>10} {'fields':>7} {'frames':>10} {'seconds':>9} {'events/s':>11}")
+
+        for row in dsc_results:
+            lines.append(f"{row['events']:>10} {row['fields']:>7} {row['frames']:>10} "
+                         f"{row['seconds']:>9.3f} {row['events_per_second']:>11.0f}")
+
+        exponent = scaling_exponent([x["events"] for x in dsc_results], [x["seconds"] for x in dsc_results])
+
+        if exponent is not None:
+            lines.append(f"scaling exponent (1 = linear): {exponent:.2f}")
+
+        lines.append("")
+
+    if vmd_results:
+        lines.append("write_vmd / read_vmd")
+        lines.append(f"{'frames':>10} {'MB':>8} {'write s':>9} {'read s':>9} {'write fr/s':>11} {'read fr/s':>11}")
+
+        for row in vmd_results:
+            lines.append(f"{row['frames']:>10} {row['bytes'] / 1e6:>8.1f} {row['write_seconds']:>9.3f} "
+                         f"{row['read_seconds']:>9.3f} {row['write_frames_per_second']:>11.0f} "
+                         f"{row['read_frames_per_second']:>11.0f}")
+
+        sizes = [x["frames"] for x in vmd_results]
+
+        for name in ("write", "read"):
+            exponent = scaling_exponent(sizes, [x[f"{name}_seconds"] for x in vmd_results])
+
+            if exponent is not None:
+                lines.append(f"{name} scaling exponent (1 = linear): {exponent:.2f}")
+
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def parse_sizes(text: str):
+    return tuple(int(float(x)) for x in text.split(","))
+
+
+def parse_dsc_sizes(text: str):
+    return tuple(tuple(int(float(y)) for y in x.split("x")) for x in text.split(","))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time parse_dsc and read_vmd/write_vmd on synthetic input.")
+    parser.add_argument("--dsc-sizes", type=parse_dsc_sizes, default=DSC_SIZES,
+                        help="comma separated EVENTSxFIELDS, e.g. 1000x10,10000x50")
+    parser.add_argument("--vmd-sizes", type=parse_sizes, default=VMD_SIZES,
+                        help="comma separated frame counts, e.g. 1e4,1e5,1e6,1e7 (1e7 needs several GB of memory)")
+    parser.add_argument("--emission", choices=diva_lighting.EMISSION_MODES, default="full")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-dsc", action="store_true", help="don't run the parse_dsc benchmark")
+    parser.add_argument("--skip-vmd", action="store_true", help="don't run the read_vmd/write_vmd benchmark")
+    parser.add_argument("--work-folder", default=None, help="where the synthetic files go, default a temp folder")
+    parser.add_argument("--output", default="bench_output.txt", help="text report, also printed")
+    parser.add_argument("--json", default=None, help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    work_folder = args.work_folder or tempfile.mkdtemp(prefix="diva_bench_")
+    os.makedirs(work_folder, exist_ok=True)
+
+    # the library's own printing and progress would end up in the timings
+    print_func, progress_sink = core.MY_PRINT_FUNC, core.PROGRESS_SINK
+    core.MY_PRINT_FUNC = lambda *args, **kwargs: None
+    core.PROGRESS_SINK = None
+
+    try:
+        dsc_results = [] if args.skip_dsc else bench_parse_dsc(
+            work_folder, args.dsc_sizes, emission=args.emission, seed=args.seed
+        )
+        vmd_results = [] if args.skip_vmd else bench_vmd(work_folder, args.vmd_sizes, seed=args.seed)
+
+    finally:
+        core.MY_PRINT_FUNC, core.PROGRESS_SINK = print_func, progress_sink
+
+        if args.work_folder is None:
+            shutil.rmtree(work_folder, ignore_errors=True)
+
+    report = format_report(dsc_results, vmd_results)
+    print(report)
+
+    with open(args.output, "w", encoding="UTF-8") as file:
+        file.write(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="UTF-8") as file:
+            json.dump({"parse_dsc": dsc_results, "vmd": vmd_results, "seed": args.seed}, file, indent=1)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,226 @@
+import itertools
+import struct
+
+
+# Opcode tables for binary DSC scripts: opcode -> (name, parameter count).
+# Every command is one int32 opcode followed by that many int32 parameters, so the table is all that is needed to walk
+# the script. The names are the ones DSC Editor prints, which is what DIVA_LIGHTING.parse_dsc_line produces from a
+# text dump.
+OPCODES_FT = {
+    0: ("END", 0),
+    1: ("TIME", 1),
+    2: ("MIKU_MOVE", 4),
+    3: ("MIKU_ROT", 2),
+    4: ("MIKU_DISP", 2),
+    5: ("MIKU_SHADOW", 2),
+    6: ("TARGET", 7),
+    7: ("SET_MOTION", 4),
+    8: ("SET_PLAYDATA", 2),
+    9: ("EFFECT", 6),
+    10: ("FADEIN_FIELD", 2),
+    11: ("EFFECT_OFF", 1),
+    12: ("SET_CAMERA", 6),
+    13: ("DATA_CAMERA", 2),
+    14: ("CHANGE_FIELD", 1),
+    15: ("HIDE_FIELD", 1),
+    16: ("MOVE_FIELD", 3),
+    17: ("FADEOUT_FIELD", 2),
+    18: ("EYE_ANIM", 3),
+    19: ("MOUTH_ANIM", 5),
+    20: ("HAND_ANIM", 5),
+    21: ("LOOK_ANIM", 4),
+    22: ("EXPRESSION", 4),
+    23: ("LOOK_CAMERA", 5),
+    24: ("LYRIC", 2),
+    25: ("MUSIC_PLAY", 0),
+    26: ("MODE_SELECT", 2),
+    27: ("EDIT_MOTION", 4),
+    28: ("BAR_TIME_SET", 2),
+    29: ("SHADOWHEIGHT", 2),
+    30: ("EDIT_FACE", 1),
+    31: ("MOVE_CAMERA", 21),
+    32: ("PV_END", 0),
+    33: ("SHADOWPOS", 3),
+    34: ("EDIT_LYRIC", 2),
+    35: ("EDIT_TARGET", 5),
+    36: ("EDIT_MOUTH", 1),
+    37: ("SET_CHARA", 1),
+    38: ("EDIT_MOVE", 7),
+    39: ("EDIT_SHADOW", 1),
+    40: ("EDIT_EYELID", 1),
+    41: ("EDIT_EYE", 2),
+    42: ("EDIT_ITEM", 1),
+    43: ("EDIT_EFFECT", 2),
+    44: ("EDIT_DISP", 1),
+    45: ("EDIT_HAND_ANIM", 2),
+    46: ("AIM", 3),
+    47: ("HAND_ITEM", 3),
+    48: ("EDIT_BLUSH", 1),
+    49: ("NEAR_CLIP", 2),
+    50: ("CLOTH_WET", 2),
+    51: ("LIGHT_ROT", 3),
+    52: ("SCENE_FADE", 6),
+    53: ("TONE_TRANS", 6),
+    54: ("SATURATE", 1),
+    55: ("FADE_MODE", 1),
+    56: ("AUTO_BLINK", 2),
+    57: ("PARTS_DISP", 3),
+    58: ("TARGET_FLYING_TIME", 1),
+    59: ("CHARA_SIZE", 2),
+    60: ("CHARA_HEIGHT_ADJUST", 2),
+    61: ("ITEM_ANIM", 4),
+    62: ("CHARA_POS_ADJUST", 4),
+    63: ("SCENE_ROT", 1),
+    64: ("EDIT_MOT_SMOOTH_LEN", 2),
+    65: ("PV_BRANCH_MODE", 1),
+    66: ("DATA_CAMERA_START", 2),
+    67: ("MOVIE_PLAY", 1),
+    68: ("MOVIE_DISP", 1),
+    69: ("WIND", 3),
+    70: ("OSAGE_STEP", 3),
+    71: ("OSAGE_MV_CCL", 3),
+    72: ("CHARA_COLOR", 2),
+    73: ("SE_EFFECT", 1),
+    74: ("EDIT_MOVE_XYZ", 9),
+    75: ("EDIT_EYELID_ANIM", 3),
+    76: ("EDIT_INSTRUMENT_ITEM", 2),
+    77: ("EDIT_MOTION_LOOP", 4),
+    78: ("EDIT_EXPRESSION", 2),
+    79: ("EDIT_EYE_ANIM", 3),
+    80: ("EDIT_MOUTH_ANIM", 2),
+    81: ("EDIT_CAMERA", 24),
+    82: ("EDIT_MODE_SELECT", 1),
+    83: ("PV_END_FADEOUT", 2),
+    84: ("TARGET_FLAG", 1),
+    85: ("ITEM_ANIM_ATTACH", 3),
+    86: ("SHADOW_RANGE", 1),
+    87: ("HAND_SCALE", 3),
+    88: ("LIGHT_POS", 4),
+    89: ("FACE_TYPE", 1),
+    90: ("SHADOW_CAST", 2),
+    91: ("EDIT_MOTION_F", 6),
+    92: ("FOG", 3),
+    93: ("BLOOM", 2),
+    94: ("COLOR_COLLE", 3),
+    95: ("DOF", 3),
+    96: ("CHARA_ALPHA", 4),
+    97: ("AOTO_CAP", 1),
+    98: ("MAN_CAP", 1),
+    99: ("TOON", 3),
+    100: ("SHIMMER", 3),
+    101: ("ITEM_ALPHA", 4),
+    102: ("MOVIE_CUT_CHG", 1),
+    103: ("CHARA_LIGHT", 3),
+    104: ("STAGE_LIGHT", 3),
+    105: ("AGEAGE_CTRL", 8),
+    106: ("PSE", 2),
+}
+
+# F and F2nd share the FT opcode numbering for every command the PV scripts use, only the note command is wider.
+# Anything a table does not know makes the reader stop with an error instead of silently desyncing.
+OPCODES_F = {**OPCODES_FT, 6: ("TARGET", 11)}
+OPCODES_F2 = {**OPCODES_FT, 6: ("TARGET", 12)}
+
+OPCODE_TABLES = {"FT": OPCODES_FT, "F": OPCODES_F, "F2": OPCODES_F2}
+
+# leading signature int of the unwrapped scripts, a build date in BCD-ish hex
+DSC_SIGNATURES = {0x12020220: "F", 0x14050921: "FT"}
+
+# F2nd (and later) wrap the script in a DIVA section, the offset of the payload is stored after the magic
+SECTION_MAGIC = b"PVSC"
+
+
+def detect_dsc(data: bytes, dsc_input: str = "<bytes>"):
+    """
+    Work out where the command stream starts, its byte order and which opcode table applies.
+    Returns (format name, struct byte order character, offset of the first opcode).
+    A script that ends right after its signature gives an offset at the end of the data, so it has no commands.
+    """
+    fmt = None
+    start = 0
+
+    if data[:4] == SECTION_MAGIC:
+        fmt = "F2"
+
+        if len(data) < 12:
+            raise ValueError(f"{SECTION_MAGIC.decode()} header is {len(data)} bytes long but needs 12, "
+                             f"the section is truncated in '{dsc_input}'")
+
+        start = struct.unpack_from("<I", data, 8)[0]
+
+    if len(data) < start + 4:
+        raise ValueError(f"No DSC signature or opcode at byte {start}, the file is {len(data)} bytes long "
+                         f"in '{dsc_input}'")
+
+    if struct.unpack_from("<i", data, start)[0] in OPCODES_FT:
+        # headerless script, the very first word is already an opcode
+        return fmt or "FT", "<", start
+
+    if len(data) < start + 8:
+        # only the signature is there, it alone has to tell the byte order
+        endian = ">" if struct.unpack_from(">i", data, start)[0] in DSC_SIGNATURES else "<"
+        signature = struct.unpack_from(endian + "i", data, start)[0]
+
+        return fmt or DSC_SIGNATURES.get(signature, "FT"), endian, start + 4
+
+    # the word after the signature is a small opcode, which tells the byte order apart
+    endian = "<" if struct.unpack_from("<i", data, start + 4)[0] in OPCODES_FT else ">"
+    signature = struct.unpack_from(endian + "i", data, start)[0]
+
+    return fmt or DSC_SIGNATURES.get(signature, "FT"), endian, start + 4
+
+
+def iter_dsc_binary(dsc_input: str, opcodes=None, fmt: str = None):
+    """
+    Stream (name, args) from a binary .dsc, the same pairs DIVA_LIGHTING.parse_dsc_line yields for a text dump.
+    If opcodes is given only those commands are yielded. fmt ("FT", "F" or "F2") overrides the detected format.
+    """
+    with open(dsc_input, "rb") as file:
+        data = file.read()
+
+    detected, endian, start = detect_dsc(data, dsc_input)
+    table = OPCODE_TABLES[fmt or detected]
+    view = memoryview(data)[start:len(data) - (len(data) - start) % 4]
+    words = (word for (word,) in struct.iter_unpack(endian + "i", view))
+    wanted = None if opcodes is None else set(opcodes)
+    offset = start
+
+    for opcode in words:
+        if opcode not in table:
+            raise ValueError(f"Unknown opcode {opcode} at byte {offset} for the {fmt or detected} DSC format "
+                             f"in '{dsc_input}'")
+
+        name, count = table[opcode]
+        args = list(itertools.islice(words, count))
+
+        if len(args) != count:
+            raise ValueError(f"{name} at byte {offset} takes {count} parameters but '{dsc_input}' ends after "
+                             f"{len(args)}, the script is truncated")
+
+        offset += 4 * (count + 1)
+
+        if wanted is None or name in wanted:
+            yield name, args
+
+        if name == "END":
+            break
+
+
+def write_dsc_binary(dsc_output: str, commands, signature=0x14050921):
+    """
+    Write (name, args) pairs as an FT style little-endian .dsc, mostly useful to produce test input.
+    """
+    opcodes = {name: (opcode, count) for opcode, (name, count) in OPCODES_FT.items()}
+    words = [signature]
+
+    for name, args in commands:
+        opcode, count = opcodes[name]
+
+        if len(args) != count:
+            raise ValueError(f"{name} takes {count} parameters, got {len(args)}")
+
+        words.append(opcode)
+        words.extend(int(x) for x in args)
+
+    with open(dsc_output, "wb") as file:
+        file.write(struct.pack(f"<{len(words)}i", *words))
@@ -0,0 +1,127 @@
+import mmap
+import os.path
+import struct
+import zlib
+
+
+# FArc stores members as-is, FArC gzips them, FARC is the encrypted variant which can't be read here
+FARC_PLAIN = b"FArc"
+FARC_COMPRESSED = b"FArC"
+FARC_ENCRYPTED = b"FARC"
+
+
+class FarcArchive:
+    """
+    Read-only view of a .farc archive.
+    The file is memory-mapped and only the member table is parsed up front, members are sliced out and decompressed
+    when they are read. Pickling keeps the member table and reopens the file on the next read, so an archive can be
+    handed to worker processes without being indexed again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.members = {}
+        self.compressed = False
+        self._file = None
+        self._map = None
+
+        self._open()
+        self._read_index()
+
+    def _open(self):
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _read_index(self):
+        magic = self._map[:4]
+
+        if magic == FARC_ENCRYPTED:
+            raise ValueError(f"'{self.path}' is an encrypted FARC, extract it with a FARC tool first")
+
+        if magic not in (FARC_PLAIN, FARC_COMPRESSED):
+            raise ValueError(f"'{self.path}' is not a FARC archive")
+
+        self.compressed = magic == FARC_COMPRESSED
+        header_size, = struct.unpack_from(">I", self._map, 4)
+        # the header size counts everything after itself, the alignment word comes first
+        position = 12
+        header_end = 8 + header_size
+
+        while position < header_end:
+            name_end = self._map.find(b"\x00", position, header_end)
+
+            if name_end == -1:
+                break
+
+            name = self._map[position:name_end].decode("UTF-8")
+            position = name_end + 1
+
+            if self.compressed:
+                offset, stored_size, size = struct.unpack_from(">3I", self._map, position)
+                position += 12
+
+            else:
+                offset, size = struct.unpack_from(">2I", self._map, position)
+                stored_size = size
+                position += 8
+
+            self.members[name] = (offset, stored_size, size)
+
+    def read(self, name: str) -> bytes:
+        if self._map is None:
+            self._open()
+
+        offset, stored_size, size = self.members[name]
+        data = self._map[offset:offset + stored_size]
+
+        # gzip (1f 8b) or zlib (78 xx) members, wbits 47 accepts both
+        if self.compressed and (data[:2] == b"\x1f\x8b" or data[:1] == b"\x78"):
+            data = zlib.decompress(data, 47)
+
+        return data[:size]
+
+    def read_text(self, name: str) -> str:
+        return self.read(name).decode("UTF-8")
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_file"] = None
+        state["_map"] = None
+        return state
+
+
+class FarcMember:
+    """
+    A file inside a FarcArchive, usable wherever DIVA_LIGHTING expects the path of a glow/light txt file.
+    """
+
+    def __init__(self, archive: FarcArchive, name: str):
+        self.archive = archive
+        self.name = name
+
+    def read_lines(self) -> list:
+        return self.archive.read_text(self.name).splitlines()
+
+    def cache_key(self):
+        """ (path, mtime, size) identifying this member's content for DIVA_LIGHTING.ParamCache. """
+        stat = os.stat(self.archive.path)
+        return f"{os.path.abspath(self.archive.path)}:{self.name}", stat.st_mtime_ns, self.archive.members[self.name][2]
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f"FarcMember({self.archive.path!r}, {self.name!r})"
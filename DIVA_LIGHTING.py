@@ -1,10 +1,94 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
 import os.path
-
+import re
+import sys
+import time
+from types import MappingProxyType
+
+import DIVA_DSC as diva_dsc
+import DIVA_FARC as diva_farc
+import nuthouse01.nuthouse01_core as core
+import nuthouse01.nuthouse01_io as io
 import nuthouse01.nuthouse01_vmd_struct as vmd_struct
 import nuthouse01.nuthouse01_vmd_parser as vmd_parser
 
 
-def user_input(string: str, is_int=False, is_file=False, is_folder=False):
+FARC_FIELD_FILE = re.compile(r"^(glow|light|fog)_pv(\d+)_c(\d+)\.txt$")
+FARC_DEFAULT_FILE = re.compile(r"^(glow|light|fog)_pv(\d+)s.*\.txt$")
+
+# the only DSC commands the lighting pipeline reads, iter_dsc skips everything else unparsed
+DSC_OPCODES = ("TIME", "CHANGE_FIELD")
+
+# what to do when a PV starts without a field file and has several default sNN files
+DEFAULT_POLICIES = ("ask", "first", "error")
+# "full" writes every channel at every field change, "changes" only the channels whose value changes
+EMISSION_MODES = ("full", "changes")
+
+
+class FarcIndex:
+    """
+    One-time scan of a FARC_CONTENT folder, or of a .farc archive such as light_param.farc.
+    Field files are keyed by (kind, pv_id, field_id), default "sNN" files by (kind, pv_id).
+    Archives found in the folder are indexed by their member table only, members are read when a field uses them.
+    """
+
+    def __init__(self, farc_content: str):
+        self.folder = farc_content
+        self.fields = {}
+        self.defaults = {}
+        self.archives = []
+
+        if os.path.isfile(farc_content):
+            self.add_archive(farc_content)
+            return
+
+        for file in sorted(os.listdir(farc_content)):
+            if file.lower().endswith(".farc"):
+                self.add_archive(os.path.join(farc_content, file))
+
+            else:
+                self.add(file, os.path.join(farc_content, file))
+
+    def add(self, file: str, source):
+        lower = file.lower()
+
+        if match := FARC_FIELD_FILE.match(lower):
+            kind, pv_id, field_id = match.groups()
+            self.fields.setdefault((kind, int(pv_id), int(field_id)), source)
+
+        elif match := FARC_DEFAULT_FILE.match(lower):
+            kind, pv_id = match.groups()
+            self.defaults.setdefault((kind, int(pv_id)), []).append(source)
+
+    def add_archive(self, farc_path: str):
+        archive = diva_farc.FarcArchive(farc_path)
+        self.archives.append(archive)
+
+        for name in sorted(archive.members):
+            self.add(os.path.basename(name), diva_farc.FarcMember(archive, name))
+
+    def field(self, kind: str, pv_id: int, field_id: int):
+        return self.fields.get((kind, pv_id, field_id))
+
+    def default_candidates(self, kind: str, pv_id: int):
+        return self.defaults.get((kind, pv_id), [])
+
+    def close(self):
+        """ Unmap the indexed archives, a member that is read afterwards opens its archive again. """
+        for archive in self.archives:
+            archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def user_input(string: str, is_int=False, is_file=False, is_folder=False, is_path=False):
     while True:
         result = input(string)
 
@@ -33,6 +117,15 @@ def user_input(string: str, is_int=False, is_file=False, is_folder=False):
             else:
                 print("Not a folder")
 
+        elif is_path:
+            result = result.strip('"')
+
+            if os.path.exists(result):
+                return result
+
+            else:
+                print("Not a file or folder")
+
 
 def parse_dsc_line(line: str):
     name, args = line[:len(line) - 2].split("(")
@@ -50,6 +143,24 @@ def parse_dsc_line(line: str):
     return name, args
 
 
+def iter_dsc(dsc_input: str, opcodes=DSC_OPCODES):
+    """
+    Stream (name, args) from a DSC text dump one line at a time.
+    Only lines starting with one of the given opcodes are split and converted, everything else is skipped by prefix.
+    A binary .dsc is decoded directly by DIVA_DSC, no DSC Editor export needed.
+    """
+    if dsc_input.lower().endswith(".dsc"):
+        yield from diva_dsc.iter_dsc_binary(dsc_input, opcodes)
+        return
+
+    prefixes = tuple(f"{opcode}(" for opcode in opcodes)
+
+    with open(dsc_input, "r", encoding="UTF-8") as dsc_file:
+        for line in dsc_file:
+            if line.startswith(prefixes):
+                yield parse_dsc_line(line.rstrip())
+
+
 def parse_pv_line(line: str):
     args = line.strip(" ").split(" ")
 
@@ -65,139 +176,323 @@ def parse_pv_line(line: str):
     return args
 
 
-def parse_glow(file_path: str):
+def read_param_lines(file_path):
+    if isinstance(file_path, diva_farc.FarcMember):
+        return file_path.read_lines()
+
     with open(file_path, "r", encoding="UTF-8") as file:
-        file = file.read().split("\n")
-
-        values = {}
-
-        for line in file:
-            if not line:
-                continue
-
-            line = parse_pv_line(line)
-
-            match line[0]:
-                case "EOF":
-                    break
-
-                case "tone_map_method":
-                    values["Tonemap_Type"] = {0: 0.333, 1: 0.666, 2: 0.999}[line[1]]
-
-                case "fade_color":
-                    values["Fade_R +"] = line[1]
-                    values["Fade_G +"] = line[2]
-                    values["Fade_B +"] = line[3]
-
-                case "tone_transform":
-                    values["R_Offset +"] = line[1]
-                    values["G_Offset +"] = line[2]
-                    values["B_Offset +"] = line[3]
-                    values["R_Scale +"] = line[4]
-                    values["G_Scale +"] = line[5]
-                    values["B_Scale +"] = line[6]
-
-                case "flare":
-                    # values["Flare_X +"] = line[1]
-                    # values["Flare_Y +"] = line[2]
-                    # values["Flare_Z +"] = line[3]
-                    pass
-
-                case "sigma":
-                    values["Radio_R +"] = line[1]
-                    values["Radio_G +"] = line[2]
-                    values["Radio_B +"] = line[3]
-
-                case "intensity":
-                    values["Intensity_R +"] = line[1]
-                    values["Intensity_G +"] = line[2]
-                    values["Intensity_B +"] = line[3]
-
-                case _:
-                    everything = {
-                        "exposure": "Exposure +",
-                        "gamma": "Gamma +",
-                        "saturate_power": "Saturation_Pow",
-                        "saturate_coef": "Saturation +",
-                        "auto_exposure": "Auto_Exposure"
-                    }
-
-                    if line[0] in everything:
-                        values[everything[line[0]]] = line[1]
+        return file.read().split("\n")
+
+
+def parse_glow(file_path):
+    file = read_param_lines(file_path)
+
+    values = {}
+
+    for line in file:
+        if not line:
+            continue
+
+        line = parse_pv_line(line)
+
+        match line[0]:
+            case "EOF":
+                break
+
+            case "tone_map_method":
+                values["Tonemap_Type"] = {0: 0.333, 1: 0.666, 2: 0.999}[line[1]]
+
+            case "fade_color":
+                values["Fade_R +"] = line[1]
+                values["Fade_G +"] = line[2]
+                values["Fade_B +"] = line[3]
+
+            case "tone_transform":
+                values["R_Offset +"] = line[1]
+                values["G_Offset +"] = line[2]
+                values["B_Offset +"] = line[3]
+                values["R_Scale +"] = line[4]
+                values["G_Scale +"] = line[5]
+                values["B_Scale +"] = line[6]
+
+            case "flare":
+                # values["Flare_X +"] = line[1]
+                # values["Flare_Y +"] = line[2]
+                # values["Flare_Z +"] = line[3]
+                pass
+
+            case "sigma":
+                values["Radio_R +"] = line[1]
+                values["Radio_G +"] = line[2]
+                values["Radio_B +"] = line[3]
+
+            case "intensity":
+                values["Intensity_R +"] = line[1]
+                values["Intensity_G +"] = line[2]
+                values["Intensity_B +"] = line[3]
+
+            case _:
+                everything = {
+                    "exposure": "Exposure +",
+                    "gamma": "Gamma +",
+                    "saturate_power": "Saturation_Pow",
+                    "saturate_coef": "Saturation +",
+                    "auto_exposure": "Auto_Exposure"
+                }
+
+                if line[0] in everything:
+                    values[everything[line[0]]] = line[1]
 
     return values
 
 
-def parse_light(file_path: str):
-    with open(file_path, "r", encoding="UTF-8") as file:
-        file = file.read().split("\n")
+def parse_light(file_path):
+    file = read_param_lines(file_path)
 
-        values_bone = {}
-        current_light_type = ""
+    values_bone = {}
+    current_light_type = ""
 
-        for line in file:
-            if not line:
-                continue
+    for line in file:
+        if not line:
+            continue
 
-            line = parse_pv_line(line)
+        line = parse_pv_line(line)
 
-            match line[0]:
-                case "EOF":
-                    break
+        match line[0]:
+            case "EOF":
+                break
 
-                case "id_start":
-                    match line[1]:
-                        case 0:
-                            current_light_type = "Chara"
+            case "id_start":
+                match line[1]:
+                    case 0:
+                        current_light_type = "Chara"
 
-                        case 1:
-                            current_light_type = "Stage"
+                    case 1:
+                        current_light_type = "Stage"
 
-                        case _:
-                            current_light_type = ""
+                    case _:
+                        current_light_type = ""
 
-                case _:
-                    everything = {
-                        "ambient": "Ambient",
-                        "diffuse": "Diffuse",
-                        "specular": "Specular",
-                        "position": "Position"
-                    }
+            case _:
+                everything = {
+                    "ambient": "Ambient",
+                    "diffuse": "Diffuse",
+                    "specular": "Specular",
+                    "position": "Position"
+                }
 
-                    if line[0] in everything and current_light_type:
-                        if everything[line[0]]:
-                            values_bone[f"{current_light_type}_{everything[line[0]]}"] = [
-                                line[1:4], [line[4], 0, 0]
-                            ]
+                if line[0] in everything and current_light_type:
+                    if everything[line[0]]:
+                        values_bone[f"{current_light_type}_{everything[line[0]]}"] = [
+                            line[1:4], [line[4], 0, 0]
+                        ]
 
     return values_bone
 
 
-def parse_dsc(dsc_input: str, farc_content: str, mv_id=1, frame_offset=1):
+class ParamCache:
+    """
+    Parsed glow/light parameters keyed by (parser, path, mtime, size).
+    Repeated fields get the same read-only mapping back. If cache_file is given the entries are loaded from and saved
+    to that JSON file, so unchanged files are never re-tokenized between runs.
+    """
+
+    def __init__(self, cache_file: str = None):
+        self.cache_file = cache_file
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        # entries parsed by this instance, plain dicts so worker processes can send them back to the parent
+        self.added = {}
+
+        if cache_file and os.path.isfile(cache_file):
+            try:
+                with open(cache_file, "r", encoding="UTF-8") as file:
+                    for kind, path, mtime, size, values in json.load(file):
+                        self.entries[(kind, path, mtime, size)] = self.freeze(values)
+
+            except (ValueError, TypeError) as e:
+                # a broken cache only costs parsing everything again, it is rewritten on the next save
+                print(f"Warning: ignoring unreadable cache file '{cache_file}' ({e.__class__.__name__}: {e})")
+                self.entries = {}
+
+    @staticmethod
+    def freeze(values: dict):
+        return MappingProxyType({
+            name: tuple(tuple(x) for x in value) if isinstance(value, list) else value
+            for name, value in values.items()
+        })
+
+    def get(self, kind: str, parse_func, file_path: str):
+        if isinstance(file_path, diva_farc.FarcMember):
+            key = (kind, *file_path.cache_key())
+
+        else:
+            stat = os.stat(file_path)
+            key = (kind, os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+        if key in self.entries:
+            self.hits += 1
+            core.metrics_add("params.cache.hits")
+
+        else:
+            self.misses += 1
+            core.metrics_add("params.cache.misses")
+
+            with core.metrics_stage(f"params.parse.{kind}"):
+                self.added[key] = parse_func(file_path)
+
+            self.entries[key] = self.freeze(self.added[key])
+            self.dirty = True
+
+        return self.entries[key]
+
+    def merge(self, entries: dict):
+        for key, values in entries.items():
+            if key not in self.entries:
+                self.entries[key] = self.freeze(values)
+                self.dirty = True
+
+    def parse_glow(self, file_path: str):
+        return self.get("glow", parse_glow, file_path)
+
+    def parse_light(self, file_path: str):
+        return self.get("light", parse_light, file_path)
+
+    def save(self):
+        if not self.cache_file or not self.dirty:
+            return
+
+        # written next to the real file and swapped in, so a crash mid-write never leaves a half written cache
+        temp_file = io.make_temp_file(self.cache_file)
+
+        try:
+            with open(temp_file, "w", encoding="UTF-8") as file:
+                json.dump([[*key, dict(values)] for key, values in self.entries.items()], file)
+
+            os.replace(temp_file, self.cache_file)
+        except Exception:
+            os.remove(temp_file)
+            raise
+
+        self.dirty = False
+
+
+def pick_default(kind: str, candidates: list, policy="ask"):
+    if policy not in DEFAULT_POLICIES:
+        raise ValueError(f"Unknown default file policy '{policy}', expected one of {DEFAULT_POLICIES}")
+
+    if not candidates:
+        raise FileNotFoundError(f"No {kind} file for the first field and no default {kind} file to fall back on")
+
+    if len(candidates) == 1 or policy == "first":
+        return candidates[0]
+
+    if policy == "error":
+        raise FileNotFoundError(
+            f"Multiple possible default {kind} files: {[os.path.basename(str(x)) for x in candidates]}"
+        )
+
+    print(f"I found multiple possible default {kind} files!")
+    print("Pick an index of a lighting that most likely appears first.")
+    print("It's likely that it will be the file with s01 in its name.")
+    print({x: os.path.basename(str(y)) for x, y in enumerate(candidates)})
+
     while True:
+        try:
+            return candidates[user_input(f"{kind.capitalize()} index: ", is_int=True)]
+
+        except IndexError:
+            print("Can't pick a file with given index.")
+
+
+def changed_keyframes(snapshots: list):
+    """
+    Yield (frame, channel, value) for only the keyframes needed to draw the same step curves as the "full" emission.
+    snapshots is a frame sorted list of (frame, {channel: value}). A channel is written when it first shows up and,
+    when its value changes, as a hold of the old value where "full" would have put it plus the new value.
+    """
+    # channel -> (value, index of the last snapshot that had it, frame it was last written at)
+    last = {}
+
+    for index, (frame, values) in enumerate(snapshots):
+        for channel, value in values.items():
+            if channel in last:
+                last_value, last_index, written = last[channel]
+
+                if value == last_value:
+                    last[channel] = (value, index, written)
+                    continue
+
+                # "full" holds the old value until the frame before the field that follows its last snapshot
+                hold = snapshots[last_index + 1][0] - 1
+
+                if hold != written:
+                    yield hold, channel, last_value
+
+            yield frame, channel, value
+            last[channel] = (value, index, frame)
+
+
+def light_boneframe(frame: int, name: str, pos, rot):
+    if name in ["Chara_Position", "Stage_Position"]:
+        pos = [x * 36.81456 for x in pos]
+        rot = [0, 0, 0]
+
+    return vmd_struct.VmdBoneFrame(
+        f=frame, name=name, pos=pos, rot=rot, phys_off=False
+    )
+
+
+def parse_dsc(dsc_input: str, farc_content: str, mv_id=1, frame_offset=1, farc_index: FarcIndex = None,
+              param_cache: ParamCache = None, fps: int = None, default_policy="ask", output: str = None,
+              emission="full", record_cache: vmd_parser.VmdRecordCache = None):
+    if emission not in EMISSION_MODES:
+        raise ValueError(f"Unknown emission mode '{emission}', expected one of {EMISSION_MODES}")
+
+    # an index made here is closed once the DSC is read, one that was passed in belongs to the caller
+    owned_index = None
+
+    if farc_index is None:
+        with core.metrics_stage("farc.index"):
+            farc_index = owned_index = FarcIndex(farc_content)
+
+    # a ParamCache with a cache file is saved by whoever passed it in, once all their PVs are done
+    if param_cache is None:
+        param_cache = ParamCache()
+
+    if record_cache is None:
+        record_cache = vmd_parser.VmdRecordCache()
+
+    while fps is None:
         fps = user_input("Input your Framerate (e.g. 30 or 60): ", is_int=True)
 
-        if 0 < fps:
-            break
+        if fps <= 0:
+            fps = None
 
-    with open(dsc_input, "r", encoding="UTF-8") as dsc_file:
-        current_frame = 0
-        morphs = {}
-        bones = {}
+    if fps <= 0:
+        raise ValueError(f"Framerate must be positive, got {fps}")
 
-        vmd = vmd_struct.Vmd(
-            vmd_struct.VmdHeader(2, "Controller"), [], [], [], [], [], []
-        )
+    if output is None:
+        output = f"PV_LIGHT_{mv_id:03}.vmd"
+
+    current_frame = 0
+    morphs = {}
+    bones = {}
 
-        last_glow = []
-        last_light_bone = []
+    vmd = vmd_struct.Vmd(
+        vmd_struct.VmdHeader(2, "Controller"), [], [], [], [], [], []
+    )
 
-        for line in dsc_file.read().split("\n"):
-            if not line:
-                continue
+    last_glow = []
+    last_light_bone = []
 
-            name, args = parse_dsc_line(line)
+    core.metrics_add("dsc.bytes", os.path.getsize(dsc_input))
 
+    # reading the DSC, including the FARC lookups and glow/light parsing of every field change
+    with owned_index or contextlib.nullcontext(), core.metrics_stage("dsc.events"):
+        for name, args in iter_dsc(dsc_input):
             match name:
                 case "TIME":
                     if args[0]:
@@ -213,78 +508,29 @@ def parse_dsc(dsc_input: str, farc_content: str, mv_id=1, frame_offset=1):
                     # print(current_frame)
                     # print(f"_c{args[0]:03}.txt")
 
-                    default_glow = []
-                    default_light = []
-
-                    for file in os.listdir(farc_content):
-                        file = file.lower()
-
-                        if file.endswith(f"pv{mv_id:03}_c{args[0]:03}.txt"):
-                            if file.startswith("glow_pv"):
-                                glow = parse_glow(os.path.join(farc_content, file))
-                                last_glow = glow
+                    glow_file = farc_index.field("glow", mv_id, args[0])
+                    light_file = farc_index.field("light", mv_id, args[0])
+                    core.metrics_add("dsc.change_field")
+                    core.metrics_add("farc.field.hits", (glow_file is not None) + (light_file is not None))
+                    core.metrics_add("farc.field.misses", (glow_file is None) + (light_file is None))
 
-                            elif file.startswith("light_pv"):
-                                light_bone = parse_light(os.path.join(farc_content, file))
-                                last_light_bone = light_bone
+                    if glow_file:
+                        glow = param_cache.parse_glow(glow_file)
+                        last_glow = glow
 
-                        if not last_glow:
-                            if file.startswith(f"glow_pv{mv_id:03}s") and file.endswith(".txt"):
-                                default_glow.append(file)
-
-                        if not last_light_bone:
-                            if file.startswith(f"light_pv{mv_id:03}s") and file.endswith(".txt"):
-                                default_light.append(file)
+                    if light_file:
+                        light_bone = param_cache.parse_light(light_file)
+                        last_light_bone = light_bone
 
                     if not glow and not last_glow:
-                        if default_glow:
-                            if len(default_glow) == 1:
-                                last_glow = parse_glow(os.path.join(farc_content, default_glow[0]))
-
-                            else:
-                                print("I found multiple possible default glow files!")
-                                print("Pick an index of a lighting that most likely appears first.")
-                                print("It's likely that it will be the file with s01 in its name.")
-                                print({x: y for x, y in enumerate(default_glow)})
-
-                                while True:
-                                    try:
-                                        result = default_glow[
-                                            user_input("Glow index: ", is_int=True)
-                                        ]
-                                        last_glow = parse_glow(os.path.join(farc_content, result))
-                                        break
-
-                                    except IndexError:
-                                        print("Can't pick a file with given index.")
-
-                        else:
-                            raise FileNotFoundError
+                        last_glow = param_cache.parse_glow(
+                            pick_default("glow", farc_index.default_candidates("glow", mv_id), default_policy)
+                        )
 
                     if not light_bone and not last_light_bone:
-                        if default_light:
-                            if len(default_light) == 1:
-                                last_light_bone = parse_light(os.path.join(farc_content, default_light[0]))
-
-                            else:
-                                print("I found multiple possible default light files!")
-                                print("Pick an index of a lighting that most likely appears first.")
-                                print("It's likely that it will be the file with s01 in its name.")
-                                print({x: y for x, y in enumerate(default_light)})
-
-                                while True:
-                                    try:
-                                        result = default_light[
-                                            user_input("Light index: ", is_int=True)
-                                        ]
-                                        last_light_bone = parse_light(os.path.join(farc_content, result))
-                                        break
-
-                                    except IndexError:
-                                        print("Can't pick a file with given index.")
-
-                        else:
-                            raise FileNotFoundError
+                        last_light_bone = param_cache.parse_light(
+                            pick_default("light", farc_index.default_candidates("light", mv_id), default_policy)
+                        )
 
                     if not glow and last_glow:
                         glow = last_glow
@@ -299,55 +545,271 @@ def parse_dsc(dsc_input: str, farc_content: str, mv_id=1, frame_offset=1):
                     morphs[current_frame].update(glow)
                     bones[current_frame].update(light_bone)
 
-        get = [(x, y) for x, y in morphs.items()]
+    # frames are collected per track (morph/bone name), each track comes out in frame order so joining them gives
+    # the sorted lists write_vmd wants without sorting everything again
+    with core.metrics_stage("frames.assemble"):
+        morph_runs = {}
+        bone_runs = {}
+
+        if emission == "changes":
+            for frame, name, val in changed_keyframes(sorted(morphs.items())):
+                morph_runs.setdefault(name, []).append(
+                    vmd_struct.VmdMorphFrame(
+                        f=frame, name=name, val=val
+                    )
+                )
 
-        for index, (key, value) in enumerate(sorted(morphs.items())):
-            repeat = [key]
+            for frame, name, (pos, rot) in changed_keyframes(sorted(bones.items())):
+                bone_runs.setdefault(name, []).append(light_boneframe(frame, name, pos, rot))
 
-            if index != len(morphs) - 1:
-                if key != get[index + 1][0] - 1:
-                    repeat.append(get[index + 1][0] - 1)
+        else:
+            get = [(x, y) for x, y in morphs.items()]
 
-            for i in repeat:
-                for name, val in value.items():
-                    vmd.morphframes.append(
-                        vmd_struct.VmdMorphFrame(
-                            f=i, name=name, val=val
-                        )
-                    )
+            for index, (key, value) in enumerate(sorted(morphs.items())):
+                repeat = [key]
 
-        for index, (key, value) in enumerate(sorted(bones.items())):
-            repeat = [key]
+                if index != len(morphs) - 1:
+                    if key != get[index + 1][0] - 1:
+                        repeat.append(get[index + 1][0] - 1)
 
-            if index != len(bones) - 1:
-                if key != get[index + 1][0] - 1:
-                    repeat.append(get[index + 1][0] - 1)
+                for i in repeat:
+                    for name, val in value.items():
+                        morph_runs.setdefault(name, []).append(
+                            vmd_struct.VmdMorphFrame(
+                                f=i, name=name, val=val
+                            )
+                        )
 
-            for i in repeat:
-                for name, (pos, rot) in value.items():
+            for index, (key, value) in enumerate(sorted(bones.items())):
+                repeat = [key]
 
-                    if name in ["Chara_Position", "Stage_Position"]:
-                        pos = [x * 36.81456 for x in pos]
-                        rot = [0, 0, 0]
+                if index != len(bones) - 1:
+                    if key != get[index + 1][0] - 1:
+                        repeat.append(get[index + 1][0] - 1)
 
-                    vmd.boneframes.append(
-                        vmd_struct.VmdBoneFrame(
-                            f=i, name=name, pos=pos, rot=rot, phys_off=False
-                        )
-                    )
-                    
-        vmd.morphframes.append(
+                for i in repeat:
+                    for name, (pos, rot) in value.items():
+                        bone_runs.setdefault(name, []).append(light_boneframe(i, name, pos, rot))
+
+        morph_runs.setdefault("Override", []).append(
             vmd_struct.VmdMorphFrame(
                 name="Override", f=0, val=1
             )
         )
 
-        vmd_parser.write_vmd(f"PV_LIGHT_{mv_id:03}.vmd", vmd)
+        vmd.morphframes = vmd_parser.join_track_runs(morph_runs)
+        vmd.boneframes = vmd_parser.join_track_runs(bone_runs)
+        vmd.frames_sorted = True
+
+    core.metrics_add("frames.morphs", len(vmd.morphframes))
+    core.metrics_add("frames.bones", len(vmd.boneframes))
+
+    # every frame above was built here from parsed numbers, no need to check them all again
+    with core.metrics_stage("vmd.write"):
+        vmd_parser.write_vmd(output, vmd, records=record_cache, validate=False)
     # Love ya Kimoo, mwa mwa mwa!!
     # Love ya too, mwa mwa mwa!!!
 
+    return output
+
+
+def load_manifest(manifest_path: str):
+    """
+    A manifest is a JSON list of PVs to convert, e.g.
+    [{"dsc": "pv_723.txt", "farc": "FARC_CONTENT", "pv_id": 723, "fps": 60, "default_policy": "first"}]
+    "frame_offset" (default 1), "output" (default PV_LIGHT_<id>.vmd) and "emission" (default "full", see
+    EMISSION_MODES) are optional.
+    Relative paths are resolved against the folder of the manifest.
+    """
+    folder = os.path.dirname(os.path.abspath(manifest_path))
+
+    with open(manifest_path, "r", encoding="UTF-8") as file:
+        manifest = json.load(file)
+
+    for entry in manifest:
+        for key in ("dsc", "farc", "output"):
+            if isinstance(entry, dict) and isinstance(entry.get(key), str):
+                entry[key] = os.path.join(folder, entry[key])
+
+    return manifest
+
+
+def pv_label(pv_id):
+    """ "723" style name of a PV for messages, also for the malformed ids of a bad manifest entry. """
+    return f"{pv_id:03}" if isinstance(pv_id, int) else str(pv_id)
+
+
+def convert_entry(entry: dict, output_folder: str, farc_index: FarcIndex, param_cache: ParamCache):
+    """
+    Convert one manifest entry without prompting.
+    Returns a result dict with the output path, the wall time in seconds, the error text if it failed and the
+    core.RunMetrics of the conversion as a dict.
+    """
+    # nothing about the entry is trusted before the try, a bad entry must only fail its own PV
+    result = {"pv_id": None, "output": None, "seconds": 0.0, "error": None}
+    start = time.perf_counter()
+
+    with core.collect_metrics() as metrics:
+        try:
+            mv_id = result["pv_id"] = entry["pv_id"]
+            metrics.name = f"PV {pv_label(mv_id)}"
+
+            if not isinstance(mv_id, int):
+                raise TypeError(f"pv_id must be an int, got {mv_id!r}")
+
+            output = result["output"] = entry.get("output", os.path.join(output_folder, f"PV_LIGHT_{mv_id:03}.vmd"))
+            policy = entry.get("default_policy", "first")
+
+            if policy == "ask":
+                raise ValueError("The 'ask' default file policy needs a user, pick 'first' or 'error'")
+
+            parse_dsc(
+                dsc_input=entry["dsc"],
+                farc_content=entry["farc"],
+                mv_id=mv_id,
+                frame_offset=entry.get("frame_offset", 1),
+                farc_index=farc_index,
+                param_cache=param_cache,
+                fps=entry["fps"],
+                default_policy=policy,
+                output=output,
+                emission=entry.get("emission", "full")
+            )
+
+        except Exception as e:
+            result["error"] = f"{e.__class__.__name__}: {e}"
+
+    result["seconds"] = time.perf_counter() - start
+    result["metrics"] = metrics.to_dict()
+
+    return result
+
+
+# per-process state of the batch workers, filled once by _init_batch_worker
+_WORKER_FARC_INDEXES = {}
+_WORKER_PARAM_CACHE = None
+
+
+def _init_batch_worker(farc_indexes: dict, cache_entries: dict):
+    global _WORKER_FARC_INDEXES, _WORKER_PARAM_CACHE
+
+    _WORKER_FARC_INDEXES = farc_indexes
+    # no cache file, only the parent writes that one. the workers start from what the parent has loaded
+    _WORKER_PARAM_CACHE = ParamCache()
+    _WORKER_PARAM_CACHE.merge(cache_entries)
+    # the workers would only interleave their progress output, the parent prints the summary
+    core.MY_PRINT_FUNC = lambda *args, **kwargs: None
+    core.PROGRESS_SINK = None
+
+
+def _batch_worker(job: tuple):
+    entry, output_folder = job
+    farc_index = _farc_index_of(_WORKER_FARC_INDEXES, entry)
+    result = convert_entry(entry, output_folder, farc_index, _WORKER_PARAM_CACHE)
+
+    # the archives reopen on the next read, a worker that is done with its PVs must not keep them mapped
+    if farc_index is not None:
+        farc_index.close()
+    result["cache_entries"] = _WORKER_PARAM_CACHE.added
+    _WORKER_PARAM_CACHE.added = {}
+
+    return result
+
+
+def _farc_index_of(farc_indexes: dict, entry):
+    # None for entries without a usable "farc", convert_entry then reports the error of that entry
+    try:
+        return farc_indexes.get(entry["farc"])
+
+    except (KeyError, TypeError):
+        return None
+
+
+def batch_convert(manifest, output_folder=".", cache_file: str = None, processes=1):
+    """
+    Convert every PV of a manifest (a list of dicts or the path of a JSON manifest, see load_manifest) without
+    prompting. Folders are indexed once and parsed parameters are shared between PVs.
+    With processes > 1 (0 = one per CPU) the PVs are spread over a process pool; every worker gets the folder
+    indexes and cache entries loaded here and sends its newly parsed files back, only this process writes the cache
+    file.
+    Returns one result dict per PV in manifest order, failures are recorded instead of stopping the batch.
+    """
+    if isinstance(manifest, str):
+        manifest = load_manifest(manifest)
+
+    farc_indexes = {}
+    param_cache = ParamCache(cache_file)
+
+    for entry in manifest:
+        farc = entry.get("farc") if isinstance(entry, dict) else None
+
+        if isinstance(farc, str) and farc not in farc_indexes and os.path.exists(farc):
+            farc_indexes[farc] = FarcIndex(farc)
+
+    if processes == 0:
+        processes = os.cpu_count() or 1
+
+    try:
+        if processes == 1 or len(manifest) < 2:
+            results = [
+                convert_entry(entry, output_folder, _farc_index_of(farc_indexes, entry), param_cache) for entry in manifest
+            ]
+
+        else:
+            results = []
+
+            with multiprocessing.Pool(
+                    min(processes, len(manifest)), initializer=_init_batch_worker,
+                    initargs=(farc_indexes, {key: dict(values) for key, values in param_cache.entries.items()})
+            ) as pool:
+                for result in pool.imap(_batch_worker, [(entry, output_folder) for entry in manifest]):
+                    param_cache.merge(result.pop("cache_entries"))
+                    results.append(result)
+                    print(f"PV {pv_label(result['pv_id'])} done in {result['seconds']:.2f}s"
+                          + (f" ({result['error']})" if result["error"] else ""))
+
+    finally:
+        for farc_index in farc_indexes.values():
+            farc_index.close()
+
+    param_cache.save()
+
+    return results
+
+
+def main_batch(argv: list):
+    parser = argparse.ArgumentParser(description="Convert every PV listed in a JSON manifest without prompting.")
+    parser.add_argument("manifest", help="JSON manifest, see load_manifest")
+    parser.add_argument("--output-folder", default=".", help="where VMDs without an explicit output go")
+    parser.add_argument("--cache-file", default=None, help="JSON file to persist parsed glow/light files in")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes, 0 = one per CPU")
+    parser.add_argument("--metrics-file", default=None, help="JSON file to write the stage timings of every PV to")
+    args = parser.parse_args(argv)
+    # nobody watches the progress of a batch, turning it off also skips the bookkeeping in the hot loops
+    core.PROGRESS_SINK = None
+
+    results = batch_convert(
+        args.manifest, output_folder=args.output_folder, cache_file=args.cache_file, processes=args.processes
+    )
+    failed = [x for x in results if x["error"]]
+
+    if args.metrics_file:
+        with open(args.metrics_file, "w", encoding="UTF-8") as file:
+            json.dump(results, file, indent=1)
+
+    for result in failed:
+        print(f"PV {pv_label(result['pv_id'])} failed: {result['error']}")
+
+    print(f"Converted {len(results) - len(failed)} of {len(results)} PVs "
+          f"in {sum(x['seconds'] for x in results):.2f}s of conversion time.")
+
+    return 1 if failed else 0
+
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main_batch(sys.argv[1:]))
+
     debug = False
 
     if debug:
@@ -359,8 +821,8 @@ if __name__ == "__main__":
         )
     else:
         parse_dsc(
-            dsc_input=user_input("Enter the parsed DSC file (.txt): ", is_file=True),
-            farc_content=user_input("Drop the folder with the FARC lighting: ", is_folder=True),
+            dsc_input=user_input("Enter the DSC file (.dsc or parsed .txt): ", is_file=True),
+            farc_content=user_input("Drop the folder with the FARC lighting (or the .farc): ", is_path=True),
             mv_id=user_input("What's the song ID?: ", is_int=True),
             frame_offset=1
         )
@@ -192,6 +192,7 @@ def read_vmdtext_boneframe(rawlist_text: List[list]) -> List[vmdstruct.VmdBoneFr
 		# if it is indeed here, then inc the readpointer
 		readfrom_line += 1
 		
+		progress = core.progress_reporter(boneframe_ct)
 		for i in range(boneframe_ct):
 			# ensure it has the right # of items on the line
 			check1_match_len(rawlist_text, len(keystr_boneframekey))
@@ -211,7 +212,8 @@ def read_vmdtext_boneframe(rawlist_text: List[list]) -> List[vmdstruct.VmdBoneFr
 			# increment the readfrom_line pointer
 			readfrom_line += 1
 			# progress tracker just because
-			core.print_progress_oneline(i / boneframe_ct)
+			if not i % vmdlib.PROGRESS_CHUNK and progress:
+				progress.update(i)
 	return bone_list
 
 def read_vmdtext_morphframe(rawlist_text: List[list]) -> List[vmdstruct.VmdMorphFrame]:
@@ -232,6 +234,7 @@ def read_vmdtext_morphframe(rawlist_text: List[list]) -> List[vmdstruct.VmdMorph
 		# if it is indeed here, then inc the readpointer
 		readfrom_line += 1
 		
+		progress = core.progress_reporter(morphframe_ct)
 		for i in range(morphframe_ct):
 			# ensure it has the right # of items on the line
 			check1_match_len(rawlist_text, len(keystr_morphframekey))
@@ -241,7 +244,8 @@ def read_vmdtext_morphframe(rawlist_text: List[list]) -> List[vmdstruct.VmdMorph
 			# increment the readfrom_line pointer
 			readfrom_line += 1
 			# progress tracker just because
-			core.print_progress_oneline(i / morphframe_ct)
+			if not i % vmdlib.PROGRESS_CHUNK and progress:
+				progress.update(i)
 	return morph_list
 
 def read_vmdtext_camframe(rawlist_text: List[list]) -> List[vmdstruct.VmdCamFrame]:
@@ -261,6 +265,7 @@ def read_vmdtext_camframe(rawlist_text: List[list]) -> List[vmdstruct.VmdCamFram
 		# if it is indeed here, then inc the readpointer
 		readfrom_line += 1
 		
+		progress = core.progress_reporter(camframe_ct)
 		for i in range(camframe_ct):
 			# ensure it has the right # of items on the line
 			check1_match_len(rawlist_text, len(keystr_camframekey))
@@ -283,7 +288,8 @@ def read_vmdtext_camframe(rawlist_text: List[list]) -> List[vmdstruct.VmdCamFram
 			# increment the readfrom_line pointer
 			readfrom_line += 1
 			# progress tracker just because
-			core.print_progress_oneline(i / camframe_ct)
+			if not i % vmdlib.PROGRESS_CHUNK and progress:
+				progress.update(i)
 	return cam_list
 
 def read_vmdtext_lightframe(rawlist_text: List[list]) -> List[vmdstruct.VmdLightFrame]:
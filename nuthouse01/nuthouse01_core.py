@@ -1,5 +1,9 @@
+import json
+import logging
 import math
 import sys
+import threading
+import time
 import traceback
 from os import path, listdir
 from typing import Any, Tuple, List, Sequence, Callable, Iterable, TypeVar, Union
@@ -94,22 +98,113 @@ def pause_and_quit(message=None) -> None:
 	exit()
 
 
-PROGRESS_REFRESH_RATE = 0.03  # threshold for actually printing
+def console_progress_sink(done: float, total: Union[float, None]) -> None:
+	"""
+	Progress sink that prints on one continually-overwriting line, with the MY_PRINT_FUNC approach so it works in
+	both GUI and CONSOLE modes.
+	
+	:param done: how much work is done, in whatever unit the total is in
+	:param total: how much work there is in total, or None if that isn't known
+	"""
+	# cursor gets left at the beginning of line, so the next print will overwrite this one
+	if total:
+		# totals are sometimes only an estimate, don't go past 100%
+		MY_PRINT_FUNC("...working: {:05.1%}".format(min(done / total, 1)), is_progress=True)
+	else:
+		MY_PRINT_FUNC("...working: {:d}".format(int(done)), is_progress=True)
+
+def make_logging_progress_sink(logger=None, level=logging.INFO) -> Callable[[float, Union[float, None]], None]:
+	"""
+	Build a progress sink that writes each update as one line to a logging.Logger, for runs where nobody watches a
+	console.
+	
+	:param logger: optional logging.Logger, defaults to the logger of this module
+	:param level: optional logging level, default INFO
+	:return: progress sink function
+	"""
+	if logger is None: logger = logging.getLogger(__name__)
+	def logging_progress_sink(done: float, total: Union[float, None]) -> None:
+		if total: logger.log(level, "progress: %.1f%%", 100 * min(done / total, 1))
+		else:     logger.log(level, "progress: %d", done)
+	return logging_progress_sink
+
+# global variable holding the function that progress updates go to: console_progress_sink, a logging sink, or any
+# other callback(done, total). set it to None to turn progress off entirely, the hot loops then don't even compute it
+PROGRESS_SINK = console_progress_sink
+# minimum wall-clock time between two updates, in seconds
+PROGRESS_INTERVAL = 0.1
+
+class ProgressReporter:
+	"""
+	Progress of one long-running job. The loop doing the work calls update() or advance() once per chunk of work,
+	and the current PROGRESS_SINK only gets called once every PROGRESS_INTERVAL seconds no matter how often that is.
+	Use progress_reporter() to make one, which gives a do-nothing reporter when progress is turned off.
+	"""
+	__slots__ = ("total", "done", "sink", "interval", "_next_time")
+	def __init__(self, total: float=None, sink: Callable[[float, Union[float, None]], None]=None, interval: float=None):
+		self.total = total
+		self.done = 0
+		self.sink = PROGRESS_SINK if sink is None else sink
+		self.interval = PROGRESS_INTERVAL if interval is None else interval
+		# nothing is shown for jobs that are done before the first interval is over
+		self._next_time = time.monotonic() + self.interval
+	def __bool__(self) -> bool:
+		return True
+	def update(self, done: float) -> None:
+		""" Set how much work is done so far, in the same unit as total. """
+		self.done = done
+		now = time.monotonic()
+		if now >= self._next_time:
+			self._next_time = now + self.interval
+			self.sink(done, self.total)
+	def advance(self, amount: float) -> None:
+		""" Add this much to the work done so far. """
+		self.update(self.done + amount)
+
+class _NullProgressReporter:
+	""" Stands in for a ProgressReporter when progress is turned off. It is falsy so loops can skip their updates. """
+	__slots__ = ()
+	total = None
+	done = 0
+	def __bool__(self) -> bool:
+		return False
+	def update(self, done: float) -> None:
+		pass
+	def advance(self, amount: float) -> None:
+		pass
+
+NULL_PROGRESS = _NullProgressReporter()
+
+def progress_reporter(total: float=None) -> Union[ProgressReporter, _NullProgressReporter]:
+	"""
+	Make a ProgressReporter for one job that sends its updates to the current PROGRESS_SINK, or return NULL_PROGRESS
+	if progress is turned off.
+	
+	:param total: optional, how much work there is in total (bytes, frames, etc), None if it isn't known
+	:return: ProgressReporter or NULL_PROGRESS
+	"""
+	if PROGRESS_SINK is None:
+		return NULL_PROGRESS
+	return ProgressReporter(total)
+
+PROGRESS_LAST_TIME = 0.0  # when the last one-line update was printed
 PROGRESS_LAST_VALUE = 0.0  # last%
 def print_progress_oneline(newpercent:float) -> None:
 	"""
-	Prints progress percentage on one continually-overwriting line. To minimize actual print-to-screen events, only
-	print in increments of PROGRESS_REFRESH_RATE (currently 3%) regardless of how often this function is called.
-	This uses the MY_PRINT_FUNC approach so this function works in both GUI and CONSOLE modes.
+	Prints progress percentage on one continually-overwriting line, with the current PROGRESS_SINK. To minimize
+	actual print-to-screen events, only print once every PROGRESS_INTERVAL seconds regardless of how often this
+	function is called. New code with a hot loop should use progress_reporter() instead.
 	
 	:param newpercent: float [0-1], current progress %
 	"""
-	global PROGRESS_LAST_VALUE
+	global PROGRESS_LAST_TIME, PROGRESS_LAST_VALUE
+	if PROGRESS_SINK is None:
+		return
+	now = time.monotonic()
 	# if 'curr' is lower than it was last printed (meaning reset), or it's been a while since i last printed a %, then print
-	if (newpercent < PROGRESS_LAST_VALUE) or (newpercent >= PROGRESS_LAST_VALUE + PROGRESS_REFRESH_RATE):
-		# cursor gets left at the beginning of line, so the next print will overwrite this one
-		p = "...working: {:05.1%}".format(newpercent)
-		MY_PRINT_FUNC(p, is_progress=True)
+	if (newpercent < PROGRESS_LAST_VALUE) or (now >= PROGRESS_LAST_TIME + PROGRESS_INTERVAL):
+		PROGRESS_SINK(newpercent, 1)
+		PROGRESS_LAST_TIME = now
 		PROGRESS_LAST_VALUE = newpercent
 
 # useful as keys for sorting
@@ -208,13 +303,17 @@ def new_recursive_compare(L, R):
 			diffcount += thisdiff
 			maxdiff = max(maxdiff, thismax)
 	elif hasattr(L,"validate") and hasattr(R,"validate"):
-		# for my custom classes, look over the members with "vars" because its fancy
-		Lvars = sorted(list(vars(L).items()))
-		Rvars = sorted(list(vars(R).items()))
-		for (nameL, LL), (nameR, RR) in zip(Lvars, Rvars):
-			thisdiff, thismax = new_recursive_compare(LL, RR)
-			diffcount += thisdiff
-			maxdiff = max(maxdiff, thismax)
+		if hasattr(L, "__dict__") and hasattr(R, "__dict__"):
+			# for my custom classes, look over the members with "vars" because its fancy
+			Lvars = sorted(list(vars(L).items()))
+			Rvars = sorted(list(vars(R).items()))
+			for (nameL, LL), (nameR, RR) in zip(Lvars, Rvars):
+				thisdiff, thismax = new_recursive_compare(LL, RR)
+				diffcount += thisdiff
+				maxdiff = max(maxdiff, thismax)
+		else:
+			# the VMD classes use __slots__ and have no vars, but list() holds all their members
+			diffcount, maxdiff = new_recursive_compare(L.list(), R.list())
 	elif isinstance(L, float) and isinstance(R, float):
 		# for floats specifically, replace exact compare with approximate compare
 		diff = abs(L - R)
@@ -517,6 +616,138 @@ def RUN_WITH_TRACEBACK(func: Callable, *args) -> None:
 		
 
 
+########################################################################################################################
+# run metrics: wall time of each stage of a run plus counters (frames, bytes, cache hits), exportable as JSON
+########################################################################################################################
+
+class RunMetrics:
+	"""
+	Wall time and number of calls of each named stage of one run, plus named counters. Stages can be nested and their
+	times are inclusive, "vmd.write" also counts the time of "vmd.write.boneframes" inside it. For every pair of
+	counters "X.hits" and "X.misses", to_dict() also reports "X.hit_rate".
+	Code that wants to be measured uses metrics_stage() and metrics_add(), which do nothing unless a RunMetrics was
+	made current for the calling thread with collect_metrics().
+	"""
+	def __init__(self, name: str=None):
+		self.name = name
+		self.started = time.time()
+		self.stages = {}  # name -> [seconds, calls]
+		self.counters = {}  # name -> number
+	
+	def stage(self, name: str) -> '_MetricsStage':
+		""" Context manager that adds the time spent inside it to this stage. """
+		return _MetricsStage(self, name)
+	
+	def add(self, counter: str, amount: float=1) -> None:
+		""" Add this much to a counter, it starts at 0. """
+		self.counters[counter] = self.counters.get(counter, 0) + amount
+	
+	def to_dict(self) -> dict:
+		hit_rates = {}
+		for counter, hits in self.counters.items():
+			if counter.endswith(".hits"):
+				total = hits + self.counters.get(counter[:-len(".hits")] + ".misses", 0)
+				if total: hit_rates[counter[:-len(".hits")] + ".hit_rate"] = hits / total
+		return {
+			"name": self.name,
+			"started": self.started,
+			"stages": {name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in self.stages.items()},
+			"counters": dict(self.counters),
+			"hit_rates": hit_rates,
+		}
+	
+	def save_json(self, json_filename: str) -> None:
+		""" Write to_dict() as a JSON file, one file per run so they can be compared between runs. """
+		with open(json_filename, "w", encoding="utf-8") as f:
+			json.dump(self.to_dict(), f, indent=1)
+
+class _MetricsStage:
+	__slots__ = ("metrics", "name", "start")
+	def __init__(self, metrics: RunMetrics, name: str):
+		self.metrics = metrics
+		self.name = name
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		elapsed = time.perf_counter() - self.start
+		entry = self.metrics.stages.get(self.name)
+		if entry is None:
+			self.metrics.stages[self.name] = [elapsed, 1]
+		else:
+			entry[0] += elapsed
+			entry[1] += 1
+
+class _NullMetricsStage:
+	""" Stands in for a stage when no metrics are being collected. """
+	__slots__ = ()
+	def __enter__(self):
+		return self
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		pass
+
+_NULL_STAGE = _NullMetricsStage()
+
+# holds the RunMetrics each thread is currently collecting into, so runs in different threads don't mix their numbers
+_METRICS_STATE = threading.local()
+
+def current_metrics() -> Union[RunMetrics, None]:
+	"""
+	Return the RunMetrics that metrics_stage() and metrics_add() go to in the calling thread, None if this thread is
+	not collecting metrics.
+	
+	:return: RunMetrics or None
+	"""
+	return getattr(_METRICS_STATE, "metrics", None)
+
+def metrics_stage(name: str) -> Union[_MetricsStage, _NullMetricsStage]:
+	"""
+	Context manager that times a stage of the current run, if metrics are being collected.
+	
+	with core.metrics_stage("vmd.read.boneframes"):
+		...
+	
+	:param name: name of the stage, dotted names like "vmd.write.sort" keep the stages of one thing together
+	:return: context manager
+	"""
+	metrics = getattr(_METRICS_STATE, "metrics", None)
+	if metrics is None:
+		return _NULL_STAGE
+	return metrics.stage(name)
+
+def metrics_add(counter: str, amount: float=1) -> None:
+	"""
+	Add to a counter of the current run, if metrics are being collected.
+	
+	:param counter: name of the counter, like "vmd.read.bytes"
+	:param amount: optional, default 1
+	"""
+	metrics = getattr(_METRICS_STATE, "metrics", None)
+	if metrics is not None:
+		metrics.add(counter, amount)
+
+class collect_metrics:
+	"""
+	Context manager that makes a new RunMetrics current for the calling thread while it is open, and gives it back.
+	The metrics that were current before are restored afterwards. Each thread collects into its own, so several runs
+	can be measured at once by a thread pool, but work handed off to other threads isn't counted.
+	
+	with core.collect_metrics("PV 001") as metrics:
+		...
+	metrics.save_json("PV_001_metrics.json")
+	"""
+	def __init__(self, name: str=None):
+		self.metrics = RunMetrics(name)
+		self._previous = None
+	def __enter__(self) -> RunMetrics:
+		self._previous = current_metrics()
+		_METRICS_STATE.metrics = self.metrics
+		return self.metrics
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		_METRICS_STATE.metrics = self._previous
+		self._previous = None
+
+
 ########################################################################################################################
 # searching thru sorted lists for MASSIVE speedup
 ########################################################################################################################
@@ -3,8 +3,9 @@ import json
 import os
 import stat
 import sys
+import tempfile
 from os import path
-from typing import Any, List
+from typing import Any, BinaryIO, List
 
 import nuthouse01.nuthouse01_core as core
 
@@ -17,6 +18,11 @@ MY_APP_NAME = "nuthouse01_mmd_tools"
 # this is the name of the persistent json file that contains settings & history
 MY_JSON_NAME = "persist.txt"
 
+# the only way to read the umask is to set it, so it is read once at import. make_temp_file() needs it to give temp
+# files the same permissions as any other new file
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
 #######################################################################################################################
 # these functions access the persistent json for settings or history
 #######################################################################################################################
@@ -237,13 +243,18 @@ def write_list_to_txtfile(dest_path: str, content: List[str], use_jis_encoding=F
 	return None
 
 
-def write_bytes_to_binfile(dest_path:str, content:bytearray, quiet=False) -> None:
+def open_binfile_for_writing(dest_path:str, quiet=False, temporary=False) -> BinaryIO:
 	"""
-	WRITE a BINARY file from memory to disk.
+	OPEN a BINARY file for writing, after the same checks write_bytes_to_binfile() does. For writing a file in pieces
+	instead of building it all in memory first. The caller is responsible for closing it.
+	If temporary=True, the file that gets opened is a temp file next to the destination instead, and the caller
+	moves it into place with os.replace(f.name, dest_path) once it is complete. That way an existing file at the
+	destination survives if writing fails partway.
 	
 	:param dest_path: destination file path, as a string, relative from CWD or absolute
-	:param content: bytearray obj or bytes obj
 	:param quiet: by default, print the absolute path being written to. if this=True, don't do this.
+	:param temporary: if True, open a temp file in the same folder instead of the destination itself
+	:return: file object opened in "wb" mode
 	"""
 	dest_path = path.abspath(path.normpath(dest_path))
 	# unless disabled, print the absolute path to the file being written
@@ -260,13 +271,47 @@ def write_bytes_to_binfile(dest_path:str, content:bytearray, quiet=False) -> Non
 			if not quiet: core.MY_PRINT_FUNC("WARNING: binary file '%s' already exists, I am going to overwrite it!" % dest_path)
 			# the file exists already and is about to be overwritten, check whether it is set to read-only?
 			check_and_fix_readonly(dest_path)
+	if temporary:
+		dest_path = make_temp_file(dest_path)
 	try:
-		with open(dest_path, "wb") as my_file:  # w = write, b = binary
-			my_file.write(content)  # plain old no-frills write
+		return open(dest_path, "wb")  # w = write, b = binary
 	except IOError as e:
 		core.MY_PRINT_FUNC(e.__class__.__name__, e)
 		core.MY_PRINT_FUNC("ERROR: unable to write binary file '%s', maybe its a permissions issue?" % dest_path)
 		raise
+
+
+def make_temp_file(dest_path:str) -> str:
+	"""
+	Create an empty temp file in the same folder as the destination, with a name that no other writer (thread or
+	process) can be using. The caller writes to it and then moves it over the destination with os.replace().
+	It gets the permissions a normal new file would, not the owner-only ones of mkstemp().
+	
+	:param dest_path: destination file path, as a string, relative from CWD or absolute
+	:return: absolute path of the new temp file
+	"""
+	dest_path = path.abspath(dest_path)
+	fd, temp_path = tempfile.mkstemp(dir=path.dirname(dest_path), prefix=path.basename(dest_path) + ".", suffix=".tmp")
+	os.close(fd)
+	os.chmod(temp_path, 0o666 & ~_UMASK)
+	return temp_path
+
+
+def write_bytes_to_binfile(dest_path:str, content:bytearray, quiet=False) -> None:
+	"""
+	WRITE a BINARY file from memory to disk.
+	
+	:param dest_path: destination file path, as a string, relative from CWD or absolute
+	:param content: bytearray obj or bytes obj
+	:param quiet: by default, print the absolute path being written to. if this=True, don't do this.
+	"""
+	with open_binfile_for_writing(dest_path, quiet) as my_file:
+		try:
+			my_file.write(content)  # plain old no-frills write
+		except IOError as e:
+			core.MY_PRINT_FUNC(e.__class__.__name__, e)
+			core.MY_PRINT_FUNC("ERROR: unable to write binary file '%s', maybe its a permissions issue?" % my_file.name)
+			raise
 	return None
 
 
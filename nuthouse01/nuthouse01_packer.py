@@ -1,5 +1,7 @@
+import functools
 import math
 import struct
+import threading
 from collections import defaultdict
 from typing import Any
 
@@ -28,32 +30,89 @@ _SCRIPT_VERSION = "Script version:  Nuthouse01 - v1.07.03 - 8/9/2021"
 
 
 
-# variable to keep track of where to start reading from next within the raw-file
-UNPACKER_READFROM_BYTE = 0
 # this should be hardcoded and never changed, something weird that nobody would ever use in a name
 _UNPACKER_ESCAPE_CHAR = "‡"
-# encoding to use when packing/unpackign strings
-_UNPACKER_ENCODING = "utf8"
-# dict to store all strings that failed to translate, plus counts
-_UNPACKER_FAILED_TRANSLATE_DICT = defaultdict(lambda: 0)
-# flag to indicate whether the last decoding needed escaping or not, cuz returning as a tuple is ugly
-_UNPACKER_FAILED_TRANSLATE_FLAG = False
+# how many distinct fixed-length strings to remember the bytes of, in each direction
+# VMDs only ever use a few dozen distinct bone/morph names so this is plenty
+NAME_CACHE_SIZE = 1024
+
+
+class PackerContext:
+	"""
+	All the state the pack/unpack functions carry from one call to the next: where to start reading from next within
+	the raw-file, which encoding to use for strings, and which strings failed to decode.
+	Each thread has its own current context, so several files can be parsed at once by a thread pool without
+	trampling each other's read position. read_vmd()/read_pmx()/write_vmd()/write_pmx() each run inside a fresh one:
+	
+	with pack.PackerContext("shift_jis") as ctx:
+		... pack.my_unpack(fmt, data) ...
+		bytes_read = ctx.readfrom_byte
+	"""
+	def __init__(self, encoding="utf8"):
+		# variable to keep track of where to start reading from next within the raw-file
+		self.readfrom_byte = 0
+		# encoding to use when packing/unpacking strings
+		self.encoding = encoding
+		# dict to store all strings that failed to translate, plus counts
+		self.failed_translate_dict = defaultdict(lambda: 0)
+		# flag to indicate whether the last decoding needed escaping or not, cuz returning as a tuple is ugly
+		self.failed_translate_flag = False
+		# the context that was current before this one was entered, restored on exit
+		self._previous = None
+	
+	def __enter__(self):
+		self._previous = get_context()
+		_THREAD_STATE.context = self
+		return self
+	
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		_THREAD_STATE.context = self._previous
+		self._previous = None
+
+
+# holds the current PackerContext of each thread
+_THREAD_STATE = threading.local()
+
+def get_context() -> PackerContext:
+	"""
+	Return the PackerContext of the calling thread. Outside of any "with PackerContext()" block, each thread has a
+	default context of its own which is used by the module-level accessor functions below.
+	
+	:return: the current PackerContext of this thread
+	"""
+	try:
+		return _THREAD_STATE.context
+	except AttributeError:
+		_THREAD_STATE.context = PackerContext()
+		return _THREAD_STATE.context
+
+# old names of the state that now lives in the context, still readable as module attributes
+_CONTEXT_ATTRIBUTES = {
+	"UNPACKER_READFROM_BYTE": "readfrom_byte",
+	"_UNPACKER_ENCODING": "encoding",
+	"_UNPACKER_FAILED_TRANSLATE_DICT": "failed_translate_dict",
+	"_UNPACKER_FAILED_TRANSLATE_FLAG": "failed_translate_flag",
+}
+def __getattr__(name: str) -> Any:
+	if name in _CONTEXT_ATTRIBUTES:
+		return getattr(get_context(), _CONTEXT_ATTRIBUTES[name])
+	raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
 
 
 # why do things with accessor functions? ¯\_(ツ)_/¯ cuz i want to
 def reset_unpack():
-	global UNPACKER_READFROM_BYTE
-	UNPACKER_READFROM_BYTE = 0
-	_UNPACKER_FAILED_TRANSLATE_DICT.clear()
+	ctx = get_context()
+	ctx.readfrom_byte = 0
+	ctx.failed_translate_dict.clear()
 def set_encoding(newencoding: str):
-	global _UNPACKER_ENCODING
-	_UNPACKER_ENCODING = newencoding
+	get_context().encoding = newencoding
 def print_failed_decodes():
-	if len(_UNPACKER_FAILED_TRANSLATE_DICT) != 0:
+	failed = get_context().failed_translate_dict
+	if len(failed) != 0:
 		core.MY_PRINT_FUNC("List of all strings that failed to decode, plus their occurance rate:")
-		keys = ["'" + k + "':" for k in _UNPACKER_FAILED_TRANSLATE_DICT.keys()]
+		keys = ["'" + k + "':" for k in failed.keys()]
 		keys_justified = core.MY_JUSTIFY_STRINGLIST(keys)
-		for k,v in zip(keys_justified, _UNPACKER_FAILED_TRANSLATE_DICT.values()):
+		for k,v in zip(keys_justified, failed.values()):
 			core.MY_PRINT_FUNC("    %s  %d" % (k,v))
 
 
@@ -67,18 +126,18 @@ def decode_bytes_with_escape(r: bytearray) -> str:
 	TODO: get example?
 	All cases I tested require at most 1 escape char, but just to be safe it recursively calls as much as needed.
 	
-	:param r: bytearray object which represents a string through encoding UNPACKER_ENCODING
+	:param r: bytearray object which represents a string through the encoding of the current context
 	:return: decoded string, possibly ending with escape char and hex digits
 	"""
-	global _UNPACKER_FAILED_TRANSLATE_FLAG
 	if len(r) == 0:
 		# this is needed to prevent infinite recursion if something goes really really wrong
 		return ""
+	ctx = get_context()
 	try:
-		s = r.decode(_UNPACKER_ENCODING)				# try to decode the whole string
+		s = r.decode(ctx.encoding)				# try to decode the whole string
 		return s
 	except UnicodeDecodeError:
-		_UNPACKER_FAILED_TRANSLATE_FLAG = True
+		ctx.failed_translate_flag = True
 		s = decode_bytes_with_escape(r[:-1])		# if it cant, decode everything but the last byte
 		extra = r[-1]  								# this is the last byte that couldn't be decoded
 		s = "%s%s%x" % (s, _UNPACKER_ESCAPE_CHAR, extra)
@@ -101,19 +160,20 @@ def encode_string_with_escape(a: str) -> bytearray:
 	if len(a) == 0:
 		# this is needed to prevent infinite recursion if something goes really really wrong
 		return bytearray()
+	encoding = get_context().encoding
 	try:
 		if len(a) > 3:									# is it long enough to maybe contain an escape char?
 			if a[-3] == _UNPACKER_ESCAPE_CHAR:			# check if 3rd from end is an escape char
 				n = encode_string_with_escape(a[0:-3])	# convert str before escape from str to bytearray
 				n += bytearray.fromhex(a[-2:])			# convert hex after escape char to single byte and append
 				return n
-		return bytearray(a, _UNPACKER_ENCODING)			# no escape char: convert from str to bytearray the standard way
+		return bytearray(a, encoding)			# no escape char: convert from str to bytearray the standard way
 	except UnicodeEncodeError:
 		# if the decode fails, I hope it is because the input string contains a fullwidth tilde, that's the only error i know how to handle
 		# NOTE: there are probably other things that can fail that I just dont know about yet
 		new_a = a.replace(u"\uFF5E", u"\u301c")			# replace "fullwidth tilde" with "wave dash", same as MMD does
 		try:
-			return bytearray(new_a, _UNPACKER_ENCODING)	# no escape char: convert from str to bytearray the standard way
+			return bytearray(new_a, encoding)	# no escape char: convert from str to bytearray the standard way
 		except UnicodeEncodeError as e:
 			# overwrite the 'reason' field with the original string it was trying to encode
 			e.reason = a
@@ -151,7 +211,7 @@ def my_pack(fmt:str, args_in: Any) -> bytearray:
 def my_string_pack(S: str, L=None) -> bytearray:
 	"""
 	Packer function exclusively for packing strings.
-	Uses the encoding that was last set with a "set_encoding()" function call.
+	Uses the encoding that was last set with a "set_encoding()" function call, in the current PackerContext.
 	If L is given, it is the integer number of bytes that should be in the resulting bytearray. If the string would
 	encode to fewer bytes, it is zero-padded. If the string would encode to more bytes, it is truncated.
 	If L is *not* given, the string is encoded with an "auto-length" scheme, i.e. encoded as an integer which holds
@@ -163,18 +223,17 @@ def my_string_pack(S: str, L=None) -> bytearray:
 	:return: bytearray representation of this string
 	"""
 	try:
-		n = encode_string_with_escape(S)  # convert str to bytearray
-		
 		if L is None:
 			# this mode exclusively used for PMX parsing
 			# auto-length str: convert to bytearray, measure len, pack an int with that value before packing the string with exactly that length
+			n = encode_string_with_escape(S)  # convert str to bytearray
 			fmt = "i" + str(len(n)) + "s"
 			b = my_pack(fmt, (len(n), n))  # now do the actual packing
 		else:
 			# this mode exclusively used for VMD parsing
 			# manual-length str: if a number is provided, then just pack that number of bytes
-			fmt = str(L) + "s"       # simply replace trailing t with s
-			b = my_pack(fmt, n)  # now do the actual packing
+			# the same few names are packed over and over, so this goes through a cache
+			b = _pack_fixed_string(S, L, get_context().encoding)
 	except Exception as e:
 		core.MY_PRINT_FUNC("error in my_string_pack(S,L)")
 		core.MY_PRINT_FUNC("S=", S, "L=", L)
@@ -184,6 +243,83 @@ def my_string_pack(S: str, L=None) -> bytearray:
 	return bytearray(b)
 
 
+def decode_fixed_string(b: bytes) -> str:
+	"""
+	Decode the raw bytes of one manual-length string field, as used in VMD files.
+	Manual-text strings are null-terminated, so everything after the first null byte is garbage and discarded. Strings
+	that can't be decoded are escaped and counted exactly like in my_string_unpack(). This lets bulk parsers that
+	unpack whole records at once decode the name field without walking the data with my_string_unpack().
+	
+	:param b: bytes of the string field, including any null padding
+	:return: decoded string
+	"""
+	ctx = get_context()
+	# the same few names are decoded over and over, so this goes through a cache
+	s, failed = _unpack_fixed_string(bytes(b), ctx.encoding)
+	# did it need escaping? add it to the dict for reporting later!
+	if failed:
+		ctx.failed_translate_dict[s] += 1
+	return s
+
+
+# the encoding is part of the key of both caches, so set_encoding() never needs to flush them: entries made under
+# another encoding simply can't be hit. lru_cache is thread-safe, bounded, and counts its own hits & misses.
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
+def _pack_fixed_string(S: str, L: int, encoding: str) -> bytes:
+	# the encoding arg is only for the cache key, it is always the encoding of the current context
+	n = encode_string_with_escape(S)  # convert str to bytearray
+	fmt = str(L) + "s"       # simply replace trailing t with s
+	return bytes(my_pack(fmt, n))  # now do the actual packing
+
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
+def _unpack_fixed_string(b: bytes, encoding: str) -> tuple:
+	terminator_idx = b.find(b'\x00')  # look for a null terminator
+	if terminator_idx != -1:          # if null is found...
+		b = b[0:terminator_idx]       # ...preserve only the bytes before it, not including it
+	s = decode_bytes_with_escape(b)
+	# remember whether it needed escaping, so cache hits can still be counted as failed decodes
+	ctx = get_context()
+	failed = ctx.failed_translate_flag
+	ctx.failed_translate_flag = False
+	return s, failed
+
+def name_cache_info() -> dict:
+	"""
+	Hit/miss/size counters of the fixed-length string caches used by my_string_pack() and my_string_unpack()/
+	decode_fixed_string(), as functools "CacheInfo" named tuples.
+	
+	:return: dict with keys "pack" and "unpack"
+	"""
+	return {"pack": _pack_fixed_string.cache_info(), "unpack": _unpack_fixed_string.cache_info()}
+
+def clear_name_caches() -> None:
+	""" Forget all cached fixed-length strings and reset their counters. """
+	_pack_fixed_string.cache_clear()
+	_unpack_fixed_string.cache_clear()
+
+
+def fix_nan_inf(values: list, bytepos: int) -> list:
+	"""
+	Replace any NaN floats in the list with 0.0 and any INF floats with +/- 999999.0, in place, and warn about them.
+	Bulk parsers call this only for records whose floats don't add up to a finite number, so clean data costs nothing.
+	
+	:param values: list of unpacked values, non-float members are ignored
+	:param bytepos: position in the file to mention in the warning
+	:return: the same list
+	"""
+	for i in range(len(values)):
+		foo = values[i]
+		if isinstance(foo, float):
+			if math.isnan(foo):
+				values[i] = 0.0
+				core.MY_PRINT_FUNC("Warning: found NaN in place of float shortly before bytepos %d, replaced with 0.0" % bytepos)
+			if math.isinf(foo):
+				if foo > 0: values[i] =  999999.0
+				else:       values[i] = -999999.0
+				core.MY_PRINT_FUNC("Warning: found INF in place of float shortly before bytepos %d, replaced with +/- 999999.0" % bytepos)
+	return values
+
+
 def my_unpack(fmt:str, data:bytearray) -> Any:
 	"""
 	Wrapper around the "struct.unpack_from()" function. Not able to unpack string objects!
@@ -191,37 +327,27 @@ def my_unpack(fmt:str, data:bytearray) -> Any:
 	the data sizes/types specified in the format string.
 	If exactly 1 variable would be unpacked, it is automatically de-listed and returned naked.
 	This also removes any NaN or INF values it finds and replaces them with real numbers instead.
-	Uses global var UNPACKER_READFROM_BYTE to know where to start unpacking next (internally tracked, reset by
-	"reset_unpack()" function).
+	Uses the "readfrom_byte" of the current PackerContext to know where to start unpacking next (internally
+	tracked, reset by "reset_unpack()" function).
 	
 	:param fmt: string-type format for python "struct" lib
 	:param data: bytearray being walked & unpacked
 	:return: one variable or a list of variables, depending on the contents of the format string
 	"""
-	global UNPACKER_READFROM_BYTE
-
+	ctx = get_context()
 	try:
 		afmt = "<" + fmt
-		r = struct.unpack_from(afmt, data, UNPACKER_READFROM_BYTE)
-		UNPACKER_READFROM_BYTE += struct.calcsize(afmt)	# increment the global read-from tracker
+		r = struct.unpack_from(afmt, data, ctx.readfrom_byte)
+		ctx.readfrom_byte += struct.calcsize(afmt)	# increment the read-from tracker
 	except Exception as e:
 		core.MY_PRINT_FUNC("error in my_unpack(fmt, data)")
-		core.MY_PRINT_FUNC("fmt=",fmt,"data=","really big!","bytepos=", UNPACKER_READFROM_BYTE)
+		core.MY_PRINT_FUNC("fmt=",fmt,"data=","really big!","bytepos=", ctx.readfrom_byte)
 		core.MY_PRINT_FUNC(e.__class__.__name__, e)
 		raise
 	# r is guaranteed to be a tuple... convert from tuple to list so i can always return list objects
 	retme = list(r)
 	# new: check for NaN and replace with 0
-	for i in range(len(retme)):
-		foo = retme[i]
-		if isinstance(foo, float):
-			if math.isnan(foo):
-				retme[i] = 0.0
-				core.MY_PRINT_FUNC("Warning: found NaN in place of float shortly before bytepos %d, replaced with 0.0" % UNPACKER_READFROM_BYTE)
-			if math.isinf(foo):
-				if foo > 0: retme[i] =  999999.0
-				else:       retme[i] = -999999.0
-				core.MY_PRINT_FUNC("Warning: found INF in place of float shortly before bytepos %d, replaced with +/- 999999.0" % UNPACKER_READFROM_BYTE)
+	fix_nan_inf(retme, ctx.readfrom_byte)
 	# retme is guaranteed to be a list
 	# if it is only a single item, de-listify it here
 	if len(retme) == 1: return retme[0]
@@ -231,7 +357,7 @@ def my_unpack(fmt:str, data:bytearray) -> Any:
 def my_string_unpack(data: bytearray, L=None) -> str:
 	"""
 	Unpacker function exclusively for unpacking strings.
-	Uses the encoding that was last set with a "set_encoding()" function call.
+	Uses the encoding that was last set with a "set_encoding()" function call, in the current PackerContext.
 	If L is given, it is the integer number of bytes that should read from the bytearray and interpreted as a string.
 	The string might possibly end in the middle of a multi-byte character and be undecodeable; see
 	"decode_bytes_with_escape()" for more info.
@@ -243,8 +369,6 @@ def my_string_unpack(data: bytearray, L=None) -> str:
 	:param L: optional integer length, number of bytes in the resulting bytearray
 	:return: decoded string
 	"""
-	global _UNPACKER_FAILED_TRANSLATE_FLAG
-
 	try:
 		if L is None:
 			# this mode exclusively used for PMX parsing
@@ -258,12 +382,9 @@ def my_string_unpack(data: bytearray, L=None) -> str:
 			# manual-length str: if a number is provided, then just read that number of bytes
 			strfmt = str(L) + "s"            # build fmt string that includes # of bytes to read
 			b = my_unpack(strfmt, data)  # unpack the actual string(bytearray)
+			# null-terminate, decode, and count the failures in one place shared with the bulk parsers
+			return decode_fixed_string(b)
 			
-			# manual-text strings are null-terminated: everything after a null byte is invalid garbage to be discarded
-			terminator_idx = b.find(b'\x00')  # look for a null terminator
-			if terminator_idx != -1:          # if null is found...
-				b = b[0:terminator_idx]       # ...preserve only the bytes before it, not including it
-				
 		# b is now a bytearray that should be mappable onto a string, unless it is cut off mid-multibyte-char
 		s = decode_bytes_with_escape(b)
 	except Exception as e:
@@ -273,9 +394,10 @@ def my_string_unpack(data: bytearray, L=None) -> str:
 		raise
 	# translated string is now in s (maybe with the escape char tacked on)
 	# did it need escaping? add it to the dict for reporting later!
-	if _UNPACKER_FAILED_TRANSLATE_FLAG:
-		_UNPACKER_FAILED_TRANSLATE_FLAG = False
-		_UNPACKER_FAILED_TRANSLATE_DICT[s] += 1
+	ctx = get_context()
+	if ctx.failed_translate_flag:
+		ctx.failed_translate_flag = False
+		ctx.failed_translate_dict[s] += 1
 	return s
 
 
@@ -1,4 +1,5 @@
 import math
+import threading
 import time
 from typing import List, Tuple
 
@@ -26,19 +27,40 @@ PMX_MOREINFO = False
 
 # parsing progress printouts: depend on the actual number of bytes processed, very accurate & linear
 # encoding progress printouts: manually estimate how long stuff will take and then track my progress against that
-# DONT TOUCH THESE TWO
-ENCODE_PERCENTPOINT_WEIGHTS = {}
-ENCODE_PERCENTPOINT_SOFAR = 0
-
-# how many extra vec4s each vertex has with it
-ADDL_VERTEX_VEC4 = 0
-# type used to store an index for each thing, these are concatenated to dynamically make format strings
-IDX_VERT = "x"
-IDX_TEX = "x"
-IDX_MAT = "x"
-IDX_BONE = "x"
-IDX_MORPH = "x"
-IDX_RB = "x"
+# the loops only report their progress once every this many items, PMX items are a lot slower than VMD frames
+PROGRESS_CHUNK = 0x400
+# how long it takes to encode one of each thing, relative to each other. encoding progress is counted in these units
+# verts, faces, and morphs are the only significant time sinks
+# verts/faces/morphitems number ~10,000 to ~300,000
+# this totally dwarfs the other categories... ~100 mats, ~500 bones/rigidbodies/joints/dispframes
+# buuuuuuuuuuut i guess there's no harm in assigning weights to the smaller categories anyway
+ENCODE_PROGRESS_WEIGHTS = {
+	# "header":		0,
+	"verts":		50,		# major
+	"faces":		8,		# major
+	# "textures":	0,
+	"materials":	100,
+	"bones":		80,
+	"morphitems":	8,		# major
+	"frameitems":	10,
+	"rigidbodies":	80,
+	"joints":		80,
+	"softbodies":	900,
+}
+
+# these are decided by the header of the file currently being read or written, so every thread gets its own copy
+# and several PMX files can be parsed at once by a thread pool
+class _PmxFormatState(threading.local):
+	# how many extra vec4s each vertex has with it
+	ADDL_VERTEX_VEC4 = 0
+	# type used to store an index for each thing, these are concatenated to dynamically make format strings
+	IDX_VERT = "x"
+	IDX_TEX = "x"
+	IDX_MAT = "x"
+	IDX_BONE = "x"
+	IDX_MORPH = "x"
+	IDX_RB = "x"
+_FMT = _PmxFormatState()
 
 """
 more info about "indexes":
@@ -108,22 +130,20 @@ def parse_pmx_header(raw: bytearray) -> pmxstruct.PmxHeader:
 	else:                     raise RuntimeError("unsupported encoding value '%d'" % globalflags[0])
 	
 	# byte 1: additional vec4 per vertex
-	# store this in a global so it can be more easily passed to the vertex section
-	global ADDL_VERTEX_VEC4
-	ADDL_VERTEX_VEC4 = globalflags[1]
+	# store this in the per-thread format state so it can be more easily passed to the vertex section
+	_FMT.ADDL_VERTEX_VEC4 = globalflags[1]
 	
 	# bytes 2-7: data size to use for index references
-	# store these in globals as well because passing them around as arguments would be annoying
+	# store these in the format state as well because passing them around as arguments would be annoying
 	# see comment around line 50 for more info
-	global IDX_VERT, IDX_TEX, IDX_MAT, IDX_BONE, IDX_MORPH, IDX_RB
 	vert_conv = {1:"B", 2:"H", 4:"i"}
-	IDX_VERT  = vert_conv[globalflags[2]]
+	_FMT.IDX_VERT  = vert_conv[globalflags[2]]
 	conv =      {1:"b", 2:"h", 4:"i"}
-	IDX_TEX   = conv[globalflags[3]]
-	IDX_MAT   = conv[globalflags[4]]
-	IDX_BONE  = conv[globalflags[5]]
-	IDX_MORPH = conv[globalflags[6]]
-	IDX_RB    = conv[globalflags[7]]
+	_FMT.IDX_TEX   = conv[globalflags[3]]
+	_FMT.IDX_MAT   = conv[globalflags[4]]
+	_FMT.IDX_BONE  = conv[globalflags[5]]
+	_FMT.IDX_MORPH = conv[globalflags[6]]
+	_FMT.IDX_RB    = conv[globalflags[7]]
 	
 	# finally handle the model names & comments
 	# (name_jp, name_en, comment_jp, comment_en) = pack.my_unpack("t t t t", raw)
@@ -138,15 +158,15 @@ def parse_pmx_header(raw: bytearray) -> pmxstruct.PmxHeader:
 							   comment_jp=comment_jp, comment_en=comment_en)
 	# return retme
 
-def parse_pmx_vertices(raw: bytearray) -> List[pmxstruct.PmxVertex]:
+def parse_pmx_vertices(raw: bytearray, progress=core.NULL_PROGRESS) -> List[pmxstruct.PmxVertex]:
 	# first item is int, how many vertices
 	i = pack.my_unpack("i", raw)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of verts            =", i)
 	retme = []
-	bdef1_fmt = IDX_BONE
-	bdef2_fmt = "2%s f" % IDX_BONE
-	bdef4_fmt = "4%s 4f" % IDX_BONE
-	sdef_fmt =  "2%s 10f" % IDX_BONE
+	bdef1_fmt = _FMT.IDX_BONE
+	bdef2_fmt = "2%s f" % _FMT.IDX_BONE
+	bdef4_fmt = "4%s 4f" % _FMT.IDX_BONE
+	sdef_fmt =  "2%s 10f" % _FMT.IDX_BONE
 	qdef_fmt =  bdef4_fmt
 	
 	def weightbinary_to_weightpairs(wtype: pmxstruct.WeightMode, w_i: List[float]) -> List[List[float]]:
@@ -178,7 +198,7 @@ def parse_pmx_vertices(raw: bytearray) -> List[pmxstruct.PmxVertex]:
 		(posX, posY, posZ, normX, normY, normZ, u, v) = pack.my_unpack("8f", raw)
 		# then, some number of vec4s (probably none)
 		addl_vec4s = []
-		for z in range(ADDL_VERTEX_VEC4):
+		for z in range(_FMT.ADDL_VERTEX_VEC4):
 			this_vec4 = pack.my_unpack("4f", raw) # already returns as a list of 4 floats, no need to unpack then repack
 			addl_vec4s.append(this_vec4)
 		weighttype_int = pack.my_unpack("b", raw)
@@ -215,7 +235,8 @@ def parse_pmx_vertices(raw: bytearray) -> List[pmxstruct.PmxVertex]:
 		weight_pairs = weightbinary_to_weightpairs(weighttype, weights)
 
 		# display progress printouts
-		core.print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(pack.get_context().readfrom_byte)
 		# assemble all the info into a struct for returning
 		thisvert = pmxstruct.PmxVertex(pos=[posX, posY, posZ], norm=[normX, normY, normZ], uv=[u, v],
 									   weighttype=weighttype, weight=weight_pairs, weight_sdef=weight_sdef,
@@ -224,7 +245,7 @@ def parse_pmx_vertices(raw: bytearray) -> List[pmxstruct.PmxVertex]:
 		retme.append(thisvert)
 	return retme
 
-def parse_pmx_surfaces(raw: bytearray) -> List[List[int]]:
+def parse_pmx_surfaces(raw: bytearray, progress=core.NULL_PROGRESS) -> List[List[int]]:
 	# surfaces is just another name for faces
 	# first item is int, how many vertex indices there are, NOT the actual number of faces
 	# each face is 3 vertex indices, so "i" will always be a multiple of 3
@@ -234,9 +255,10 @@ def parse_pmx_surfaces(raw: bytearray) -> List[List[int]]:
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of faces            =", i)
 	for d in range(i):
 		# each entry is a group of 3 vertex indeces that make a face
-		thisface = pack.my_unpack("3" + IDX_VERT, raw)
+		thisface = pack.my_unpack("3" + _FMT.IDX_VERT, raw)
 		# display progress printouts
-		core.print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(pack.get_context().readfrom_byte)
 		retme.append(thisface)
 	return retme
 
@@ -261,11 +283,11 @@ def parse_pmx_materials(raw: bytearray, textures: List[str]) -> List[pmxstruct.P
 		name_en = pack.my_string_unpack(raw)
 		# print(name_jp, name_en)
 		(diffR, diffG, diffB, diffA, specR, specG, specB, specpower) = pack.my_unpack("4f 4f", raw)
-		(ambR, ambG, ambB, flags, edgeR, edgeG, edgeB, edgeA, edgescale, tex_idx) = pack.my_unpack("3f B 5f" + IDX_TEX, raw)
-		(sph_idx, sph_mode_int, builtin_toon) = pack.my_unpack(IDX_TEX + "b b", raw)
+		(ambR, ambG, ambB, flags, edgeR, edgeG, edgeB, edgeA, edgescale, tex_idx) = pack.my_unpack("3f B 5f" + _FMT.IDX_TEX, raw)
+		(sph_idx, sph_mode_int, builtin_toon) = pack.my_unpack(_FMT.IDX_TEX + "b b", raw)
 		if builtin_toon == 0:
 			# toon is using a texture reference
-			toon_idx = pack.my_unpack(IDX_TEX, raw)
+			toon_idx = pack.my_unpack(_FMT.IDX_TEX, raw)
 		else:
 			# toon is using one of the builtin toons, toon01.bmp thru toon10.bmp (values 0-9)
 			toon_idx = pack.my_unpack("b", raw)
@@ -307,7 +329,7 @@ def parse_pmx_bones(raw: bytearray) -> List[pmxstruct.PmxBone]:
 	for d in range(i):
 		name_jp = pack.my_string_unpack(raw)
 		name_en = pack.my_string_unpack(raw)
-		(posX, posY, posZ, parent_idx, deform_layer, flags1, flags2) = pack.my_unpack("3f" + IDX_BONE + "i 2B", raw)
+		(posX, posY, posZ, parent_idx, deform_layer, flags1, flags2) = pack.my_unpack("3f" + _FMT.IDX_BONE + "i 2B", raw)
 		# print(name_jp, name_en)
 		tail_usebonelink =       bool(flags1 & (1<<0))
 		rotateable =             bool(flags1 & (1<<1))
@@ -328,11 +350,11 @@ def parse_pmx_bones(raw: bytearray) -> List[pmxstruct.PmxBone]:
 		local_axis_x_xyz = local_axis_z_xyz = None
 		ik_target = ik_loops = ik_anglelimit = ik_links = None
 		if tail_usebonelink:  # use index for bone its pointing at
-			tail = pack.my_unpack(IDX_BONE, raw)
+			tail = pack.my_unpack(_FMT.IDX_BONE, raw)
 		else:  # use offset
 			tail = pack.my_unpack("3f", raw)
 		if inherit_rot or inherit_trans:
-			(inherit_parent, inherit_influence) = pack.my_unpack(IDX_BONE + "f", raw)
+			(inherit_parent, inherit_influence) = pack.my_unpack(_FMT.IDX_BONE + "f", raw)
 		if has_fixedaxis:
 			# format is xyz obviously
 			fixedaxis = pack.my_unpack("3f", raw)
@@ -343,12 +365,12 @@ def parse_pmx_bones(raw: bytearray) -> List[pmxstruct.PmxBone]:
 		if has_external_parent:
 			external_parent = pack.my_unpack("i", raw)
 		if ik:
-			(ik_target, ik_loops, ik_anglelimit, num_ik_links) = pack.my_unpack(IDX_BONE + "i f i", raw)
+			(ik_target, ik_loops, ik_anglelimit, num_ik_links) = pack.my_unpack(_FMT.IDX_BONE + "i f i", raw)
 			# note: ik angle comes in as radians, i want to represent it as degrees
 			ik_anglelimit = math.degrees(ik_anglelimit)
 			ik_links = []
 			for z in range(num_ik_links):
-				(ik_link_idx, use_link_limits) = pack.my_unpack(IDX_BONE + "b", raw)
+				(ik_link_idx, use_link_limits) = pack.my_unpack(_FMT.IDX_BONE + "b", raw)
 				if use_link_limits:
 					(minX, minY, minZ, maxX, maxY, maxZ) = pack.my_unpack("3f 3f", raw)
 					# note: these vals come in as XYZXYZ radians! must convert to degrees
@@ -380,7 +402,7 @@ def parse_pmx_bones(raw: bytearray) -> List[pmxstruct.PmxBone]:
 		retme.append(thisbone)
 	return retme
 
-def parse_pmx_morphs(raw: bytearray) -> List[pmxstruct.PmxMorph]:
+def parse_pmx_morphs(raw: bytearray, progress=core.NULL_PROGRESS) -> List[pmxstruct.PmxMorph]:
 	# first item is int, how many morphs
 	i = pack.my_unpack("i", raw)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of morphs           =", i)
@@ -397,19 +419,19 @@ def parse_pmx_morphs(raw: bytearray) -> List[pmxstruct.PmxMorph]:
 		if morphtype == pmxstruct.MorphType.GROUP:
 			# group
 			for z in range(itemcount):
-				(morph_idx, influence) = pack.my_unpack(IDX_MORPH + "f", raw)
+				(morph_idx, influence) = pack.my_unpack(_FMT.IDX_MORPH + "f", raw)
 				item = pmxstruct.PmxMorphItemGroup(morph_idx=morph_idx, value=influence)
 				these_items.append(item)
 		elif morphtype == pmxstruct.MorphType.VERTEX:
 			# vertex
 			for z in range(itemcount):
-				(vert_idx, transX, transY, transZ) = pack.my_unpack(IDX_VERT + "3f", raw)
+				(vert_idx, transX, transY, transZ) = pack.my_unpack(_FMT.IDX_VERT + "3f", raw)
 				item = pmxstruct.PmxMorphItemVertex(vert_idx=vert_idx, move=[transX, transY, transZ])
 				these_items.append(item)
 		elif morphtype == pmxstruct.MorphType.BONE:
 			# bone
 			for z in range(itemcount):
-				(bone_idx, transX, transY, transZ, rotqX, rotqY, rotqZ, rotqW) = pack.my_unpack(IDX_BONE + "3f 4f", raw)
+				(bone_idx, transX, transY, transZ, rotqX, rotqY, rotqZ, rotqW) = pack.my_unpack(_FMT.IDX_BONE + "3f 4f", raw)
 				rotX, rotY, rotZ = core.quaternion_to_euler([rotqW, rotqX, rotqY, rotqZ])
 				item = pmxstruct.PmxMorphItemBone(bone_idx=bone_idx, move=[transX, transY, transZ], rot=[rotX, rotY, rotZ])
 				these_items.append(item)
@@ -422,14 +444,14 @@ def parse_pmx_morphs(raw: bytearray) -> List[pmxstruct.PmxMorph]:
 			# what these values do depends on the UV layer they are affecting, but the docs dont say what...
 			# oh well, i dont need to use them so i dont care :)
 			for z in range(itemcount):
-				(vert_idx, A, B, C, D) = pack.my_unpack(IDX_VERT + "4f", raw)
+				(vert_idx, A, B, C, D) = pack.my_unpack(_FMT.IDX_VERT + "4f", raw)
 				item = pmxstruct.PmxMorphItemUV(vert_idx=vert_idx, move=[A,B,C,D])
 				these_items.append(item)
 		elif morphtype == pmxstruct.MorphType.MATERIAL:
 			# material
-			# this_item = core.my_unpack(IDX_MAT + "b 4f 3f    f 3f 4f f    4f 4f 4f", raw)
+			# this_item = core.my_unpack(_FMT.IDX_MAT + "b 4f 3f    f 3f 4f f    4f 4f 4f", raw)
 			for z in range(itemcount):
-				(mat_idx, is_add, diffR, diffG, diffB, diffA, specR, specG, specB) = pack.my_unpack(IDX_MAT + "b 4f 3f", raw)
+				(mat_idx, is_add, diffR, diffG, diffB, diffA, specR, specG, specB) = pack.my_unpack(_FMT.IDX_MAT + "b 4f 3f", raw)
 				(specpower, ambR, ambG, ambB, edgeR, edgeG, edgeB, edgeA, edgesize) = pack.my_unpack("f 3f 4f f", raw)
 				(texR, texG, texB, texA, sphR, sphG, sphB, sphA, toonR, toonG, toonB, toonA) = pack.my_unpack("4f 4f 4f", raw)
 				item = pmxstruct.PmxMorphItemMaterial(
@@ -442,13 +464,13 @@ def parse_pmx_morphs(raw: bytearray) -> List[pmxstruct.PmxMorph]:
 		elif morphtype == pmxstruct.MorphType.FLIP:
 			# (2.1 only) flip
 			for z in range(itemcount):
-				(morph_idx, influence) = pack.my_unpack(IDX_MORPH + "f", raw)
+				(morph_idx, influence) = pack.my_unpack(_FMT.IDX_MORPH + "f", raw)
 				item = pmxstruct.PmxMorphItemFlip(morph_idx=morph_idx, value=influence)
 				these_items.append(item)
 		elif morphtype == pmxstruct.MorphType.IMPULSE:
 			# (2.1 only) impulse
 			for z in range(itemcount):
-				(rb_idx, is_local, movX, movY, movZ, rotX, rotY, rotZ) = pack.my_unpack(IDX_RB + "b 3f 3f", raw)
+				(rb_idx, is_local, movX, movY, movZ, rotX, rotY, rotZ) = pack.my_unpack(_FMT.IDX_RB + "b 3f 3f", raw)
 				item = pmxstruct.PmxMorphItemImpulse(rb_idx=rb_idx, is_local=is_local,
 													 move=[movX, movY, movZ], rot=[rotX, rotY, rotZ])
 				these_items.append(item)
@@ -456,7 +478,8 @@ def parse_pmx_morphs(raw: bytearray) -> List[pmxstruct.PmxMorph]:
 			raise RuntimeError("unsupported morph type value", morphtype)
 		
 		# display progress printouts
-		core.print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(pack.get_context().readfrom_byte)
 		# assemble the data into struct for returning
 		thismorph = pmxstruct.PmxMorph(name_jp=name_jp, name_en=name_en, panel=panel, morphtype=morphtype, items=these_items)
 		retme.append(thismorph)
@@ -475,8 +498,8 @@ def parse_pmx_dispframes(raw: bytearray) -> List[pmxstruct.PmxFrame]:
 		these_items = []
 		for z in range(itemcount):
 			is_morph = pack.my_unpack("b", raw)
-			if is_morph: idx = pack.my_unpack(IDX_MORPH, raw)
-			else:        idx = pack.my_unpack(IDX_BONE, raw)
+			if is_morph: idx = pack.my_unpack(_FMT.IDX_MORPH, raw)
+			else:        idx = pack.my_unpack(_FMT.IDX_BONE, raw)
 			this_item = pmxstruct.PmxFrameItem(is_morph=is_morph, idx=idx)
 			these_items.append(this_item)
 		# assemble the data into struct for returning
@@ -484,7 +507,7 @@ def parse_pmx_dispframes(raw: bytearray) -> List[pmxstruct.PmxFrame]:
 		retme.append(thisframe)
 	return retme
 
-def parse_pmx_rigidbodies(raw: bytearray) -> List[pmxstruct.PmxRigidBody]:
+def parse_pmx_rigidbodies(raw: bytearray, progress=core.NULL_PROGRESS) -> List[pmxstruct.PmxRigidBody]:
 	# first item is int, how many rigidbodies
 	i = pack.my_unpack("i", raw)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of rigidbodies      =", i)
@@ -492,7 +515,7 @@ def parse_pmx_rigidbodies(raw: bytearray) -> List[pmxstruct.PmxRigidBody]:
 	for d in range(i):
 		name_jp = pack.my_string_unpack(raw)
 		name_en = pack.my_string_unpack(raw)
-		(bone_idx, group, collide_mask, shape_int) = pack.my_unpack(IDX_BONE + "b H b", raw)
+		(bone_idx, group, collide_mask, shape_int) = pack.my_unpack(_FMT.IDX_BONE + "b H b", raw)
 		shape = pmxstruct.RigidBodyShape(shape_int)
 		# print(name_jp, name_en)
 		# shape: 0=sphere, 1=box, 2=capsule
@@ -515,7 +538,8 @@ def parse_pmx_rigidbodies(raw: bytearray) -> List[pmxstruct.PmxRigidBody]:
 				nocollide_set.add(a+1)
 		
 		# display progress printouts
-		core.print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(pack.get_context().readfrom_byte)
 		# assemble the data into struct for returning
 		thisbody = pmxstruct.PmxRigidBody(name_jp=name_jp, name_en=name_en, bone_idx=bone_idx, pos=[posX, posY, posZ],
 										  rot=rot, size=[sizeX, sizeY, sizeZ], shape=shape, group=group,
@@ -525,7 +549,7 @@ def parse_pmx_rigidbodies(raw: bytearray) -> List[pmxstruct.PmxRigidBody]:
 		retme.append(thisbody)
 	return retme
 
-def parse_pmx_joints(raw: bytearray) -> List[pmxstruct.PmxJoint]:
+def parse_pmx_joints(raw: bytearray, progress=core.NULL_PROGRESS) -> List[pmxstruct.PmxJoint]:
 	# first item is int, how many joints
 	i = pack.my_unpack("i", raw)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of joints           =", i)
@@ -533,7 +557,7 @@ def parse_pmx_joints(raw: bytearray) -> List[pmxstruct.PmxJoint]:
 	for d in range(i):
 		name_jp = pack.my_string_unpack(raw)
 		name_en = pack.my_string_unpack(raw)
-		(jointtype_int, rb1_idx, rb2_idx, posX, posY, posZ) = pack.my_unpack("b 2" + IDX_RB + "3f", raw)
+		(jointtype_int, rb1_idx, rb2_idx, posX, posY, posZ) = pack.my_unpack("b 2" + _FMT.IDX_RB + "3f", raw)
 		# jointtype: 0=spring6DOF, all others are v2.1 only!!!! 1=6dof, 2=p2p, 3=conetwist, 4=slider, 5=hinge
 		jointtype = pmxstruct.JointType(jointtype_int)
 		# print(name_jp, name_en)
@@ -547,7 +571,8 @@ def parse_pmx_joints(raw: bytearray) -> List[pmxstruct.PmxJoint]:
 		rotmax = [math.degrees(rotmaxX), math.degrees(rotmaxY), math.degrees(rotmaxZ)]
 		
 		# display progress printouts
-		core.print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(pack.get_context().readfrom_byte)
 		# assemble the data into list for returning
 		thisjoint = pmxstruct.PmxJoint(name_jp=name_jp, name_en=name_en, jointtype=jointtype,
 			rb1_idx=rb1_idx, rb2_idx=rb2_idx, pos=[posX, posY, posZ], rot=rot,
@@ -568,7 +593,7 @@ def parse_pmx_softbodies(raw: bytearray) -> List[pmxstruct.PmxSoftBody]:
 	for d in range(i):
 		name_jp = pack.my_string_unpack(raw)
 		name_en = pack.my_string_unpack(raw)
-		(shape, idx_mat, group, nocollide_mask, flags) = pack.my_unpack("b" + IDX_MAT + "b H b", raw)
+		(shape, idx_mat, group, nocollide_mask, flags) = pack.my_unpack("b" + _FMT.IDX_MAT + "b H b", raw)
 		# i should upack the flags here but idgaf
 		(b_link_create_dist, num_clusters, total_mass, collision_marign, aerodynamics_model) = pack.my_unpack("iiffi", raw)
 		(vcf, dp, dg, lf, pr, vc, df, mt, rch, kch, sch, ah) = pack.my_unpack("12f", raw)
@@ -577,12 +602,12 @@ def parse_pmx_softbodies(raw: bytearray) -> List[pmxstruct.PmxSoftBody]:
 		anchors_list = []
 		for z in range(num_anchors):
 			# (idx_rb, idx_vert, near_mode)
-			this_anchor = pack.my_unpack(IDX_RB + IDX_VERT + "b", raw)
+			this_anchor = pack.my_unpack(_FMT.IDX_RB + _FMT.IDX_VERT + "b", raw)
 			anchors_list.append(this_anchor)
 		num_vertex_pin = pack.my_unpack("i", raw)
 		vertex_pin_list = []
 		for z in range(num_vertex_pin):
-			vertex_pin = pack.my_unpack(IDX_VERT, raw)
+			vertex_pin = pack.my_unpack(_FMT.IDX_VERT, raw)
 			vertex_pin_list.append(vertex_pin)
 
 		# assemble the data into struct for returning
@@ -659,8 +684,7 @@ def encode_pmx_header(nice: pmxstruct.PmxHeader, lookahead: List[int]) -> bytear
 		pack.set_encoding("utf_16_le")
 		globalflags[0] = 0
 	# byte 1: additional vec4 per vertex
-	global ADDL_VERTEX_VEC4
-	ADDL_VERTEX_VEC4 = lookahead[0]
+	_FMT.ADDL_VERTEX_VEC4 = lookahead[0]
 	globalflags[1] = lookahead[0]
 	# bytes 2-7: data size to use for index references
 	vertex_categorize = lambda x: 1 if x <= 255 else (2 if x <= 65535 else (4 if x <= 2147483647 else 0))
@@ -668,15 +692,14 @@ def encode_pmx_header(nice: pmxstruct.PmxHeader, lookahead: List[int]) -> bytear
 	globalflags[2] = vertex_categorize(lookahead[1])
 	for i in range(3, 8):
 		globalflags[i] = other_categorize(lookahead[i - 1])
-	global IDX_VERT, IDX_TEX, IDX_MAT, IDX_BONE, IDX_MORPH, IDX_RB
 	vert_conv = {1: "B", 2: "H", 4: "i"}
 	conv = {1: "b", 2: "h", 4: "i"}
-	IDX_VERT =  vert_conv[globalflags[2]]
-	IDX_TEX =   conv[globalflags[3]]
-	IDX_MAT =   conv[globalflags[4]]
-	IDX_BONE =  conv[globalflags[5]]
-	IDX_MORPH = conv[globalflags[6]]
-	IDX_RB =    conv[globalflags[7]]
+	_FMT.IDX_VERT =  vert_conv[globalflags[2]]
+	_FMT.IDX_TEX =   conv[globalflags[3]]
+	_FMT.IDX_MAT =   conv[globalflags[4]]
+	_FMT.IDX_BONE =  conv[globalflags[5]]
+	_FMT.IDX_MORPH = conv[globalflags[6]]
+	_FMT.IDX_RB =    conv[globalflags[7]]
 	out += pack.my_pack(fmt_globals, globalflags)
 	# finally handle the model names & comments
 	# (name_jp, name_en, comment_jp, comment_en)
@@ -687,21 +710,22 @@ def encode_pmx_header(nice: pmxstruct.PmxHeader, lookahead: List[int]) -> bytear
 	out += pack.my_string_pack(nice.comment_en)
 	return out
 
-def encode_pmx_vertices(nice: List[pmxstruct.PmxVertex]) -> bytearray:
+def encode_pmx_vertices(nice: List[pmxstruct.PmxVertex], progress=core.NULL_PROGRESS) -> bytearray:
 	# first item is int, how many vertices
 	i = len(nice)
 	out = pack.my_pack("i", i)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of verts            =", i)
 	# [posX, posY, posZ, normX, normY, normZ, u, v, addl_vec4s, weighttype, weights, edgescale]
-	bdef1_fmt = IDX_BONE
-	bdef2_fmt = "2%s f" % IDX_BONE
-	bdef4_fmt = "4%s 4f" % IDX_BONE
-	sdef_fmt1 =  "2%s f" % IDX_BONE
+	bdef1_fmt = _FMT.IDX_BONE
+	bdef2_fmt = "2%s f" % _FMT.IDX_BONE
+	bdef4_fmt = "4%s 4f" % _FMT.IDX_BONE
+	sdef_fmt1 =  "2%s f" % _FMT.IDX_BONE
 	sdef_fmt2 =  "9f"
 	qdef_fmt =  bdef4_fmt
 	
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["verts"]
+	# progress is counted in ENCODE_PROGRESS_WEIGHTS units, carrying on from where the previous section left off
+	progress_start = progress.done
+	progress_increment = ENCODE_PROGRESS_WEIGHTS["verts"]
 	
 	def weightpairs_to_weightbinary(wtype: pmxstruct.WeightMode, w: List[List[float]]) -> List[float]:
 		# convert the list of bone-weight pairs to the format/order used in the binary file
@@ -732,7 +756,7 @@ def encode_pmx_vertices(nice: List[pmxstruct.PmxVertex]) -> bytearray:
 		out += pack.my_pack("8f", packme)
 		# then, some number of vec4s (probably none)
 		# structure it like this so even if a user modifies the vec4s incorrectly it will still write fine
-		for z in range(ADDL_VERTEX_VEC4):
+		for z in range(_FMT.ADDL_VERTEX_VEC4):
 			try:				out += pack.my_pack("4f", vert.addl_vec4s[z])
 			except IndexError:	out += pack.my_pack("4f", [0, 0, 0, 0])
 		
@@ -772,11 +796,12 @@ def encode_pmx_vertices(nice: List[pmxstruct.PmxVertex]) -> bytearray:
 		# then there is one final float after the weight crap
 		out += pack.my_pack("f", vert.edgescale)
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		core.print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(progress_start + d * progress_increment)
+	progress.update(progress_start + i * progress_increment)
 	return out
 
-def encode_pmx_surfaces(nice: List[List[int]]) -> bytearray:
+def encode_pmx_surfaces(nice: List[List[int]], progress=core.NULL_PROGRESS) -> bytearray:
 	# surfaces is just another name for faces
 	# first item is int, how many !vertex indices! there are, NOT the actual number of faces
 	# each face is 3 vertex indices
@@ -784,15 +809,17 @@ def encode_pmx_surfaces(nice: List[List[int]]) -> bytearray:
 	out = pack.my_pack("i", i * 3)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of faces            =", i)
 	
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["faces"]
+	# progress is counted in ENCODE_PROGRESS_WEIGHTS units, carrying on from where the previous section left off
+	progress_start = progress.done
+	progress_increment = ENCODE_PROGRESS_WEIGHTS["faces"]
 
 	for d, face in enumerate(nice):
 		# each entry is a group of 3 vertex indeces that make a face
-		out += pack.my_pack("3" + IDX_VERT, face)
+		out += pack.my_pack("3" + _FMT.IDX_VERT, face)
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		core.print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(progress_start + d * progress_increment)
+	progress.update(progress_start + i * progress_increment)
 	return out
 
 def encode_pmx_textures(nice: List[str]) -> bytearray:
@@ -805,19 +832,20 @@ def encode_pmx_textures(nice: List[str]) -> bytearray:
 		out += pack.my_string_pack(filepath)
 	return out
 
-def encode_pmx_materials(nice: List[pmxstruct.PmxMaterial], tex_list: List[str]) -> bytearray:
+def encode_pmx_materials(nice: List[pmxstruct.PmxMaterial], tex_list: List[str], progress=core.NULL_PROGRESS) -> bytearray:
 	# first item is int, how many materials
 	i = len(nice)
 	out = pack.my_pack("i", i)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of materials        =", i)
 	
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["materials"]
+	# progress is counted in ENCODE_PROGRESS_WEIGHTS units, carrying on from where the previous section left off
+	progress_start = progress.done
+	progress_increment = ENCODE_PROGRESS_WEIGHTS["materials"]
 
 	# this fmt is when the toon is using a texture reference
-	mat_fmtA = "4f 4f 3f B 5f 2%s b b %s" % (IDX_TEX, IDX_TEX)
+	mat_fmtA = "4f 4f 3f B 5f 2%s b b %s" % (_FMT.IDX_TEX, _FMT.IDX_TEX)
 	# this fmt is when the toon is using a builtin toon, toon01.bmp thru toon10.bmp (values 0-9)
-	mat_fmtB = "4f 4f 3f B 5f 2%s b b b" % IDX_TEX
+	mat_fmtB = "4f 4f 3f B 5f 2%s b b b" % _FMT.IDX_TEX
 	for d, mat in enumerate(nice):
 		out += pack.my_string_pack(mat.name_jp)
 		out += pack.my_string_pack(mat.name_en)
@@ -856,25 +884,27 @@ def encode_pmx_materials(nice: List[pmxstruct.PmxMaterial], tex_list: List[str])
 		verts_ct = 3 * mat.faces_ct
 		out += pack.my_pack("i", verts_ct)
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		core.print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(progress_start + d * progress_increment)
 
+	progress.update(progress_start + i * progress_increment)
 	return out
 
-def encode_pmx_bones(nice: List[pmxstruct.PmxBone]) -> bytearray:
+def encode_pmx_bones(nice: List[pmxstruct.PmxBone], progress=core.NULL_PROGRESS) -> bytearray:
 	# first item is int, how many bones
 	i = len(nice)
 	out = pack.my_pack("i", i)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of bones            =", i)
 	
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["bones"]
-
-	fmt_bone = "3f %s i 2B" % IDX_BONE
-	fmt_bone_inherit = "%s f" % IDX_BONE
-	fmt_bone_ik = "%s i f i" % IDX_BONE
-	fmt_bone_ik_linkA = "%s b" % IDX_BONE
-	fmt_bone_ik_linkB = "%s b 6f" % IDX_BONE
+	# progress is counted in ENCODE_PROGRESS_WEIGHTS units, carrying on from where the previous section left off
+	progress_start = progress.done
+	progress_increment = ENCODE_PROGRESS_WEIGHTS["bones"]
+
+	fmt_bone = "3f %s i 2B" % _FMT.IDX_BONE
+	fmt_bone_inherit = "%s f" % _FMT.IDX_BONE
+	fmt_bone_ik = "%s i f i" % _FMT.IDX_BONE
+	fmt_bone_ik_linkA = "%s b" % _FMT.IDX_BONE
+	fmt_bone_ik_linkB = "%s b 6f" % _FMT.IDX_BONE
 	for d, bone in enumerate(nice):
 		# (name_jp, name_en, posX, posY, posZ, parent_idx, deform_layer)
 		out += pack.my_string_pack(bone.name_jp)
@@ -902,7 +932,7 @@ def encode_pmx_bones(nice: List[pmxstruct.PmxBone]) -> bytearray:
 		
 		# tail will always exist but type will vary
 		if bone.tail_usebonelink:  # use index for bone its pointing at
-			out += pack.my_pack(IDX_BONE, bone.tail)
+			out += pack.my_pack(_FMT.IDX_BONE, bone.tail)
 		else:  # use offset
 			out += pack.my_pack("3f", bone.tail)
 
@@ -934,28 +964,31 @@ def encode_pmx_bones(nice: List[pmxstruct.PmxBone]) -> bytearray:
 				else:
 					out += pack.my_pack(fmt_bone_ik_linkA, [iklink.idx, False])
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		core.print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(progress_start + d * progress_increment)
 
+	progress.update(progress_start + i * progress_increment)
 	return out
 
-def encode_pmx_morphs(nice: List[pmxstruct.PmxMorph]) -> bytearray:
+def encode_pmx_morphs(nice: List[pmxstruct.PmxMorph], progress=core.NULL_PROGRESS) -> bytearray:
 	# first item is int, how many morphs
 	i = len(nice)
 	out = pack.my_pack("i", i)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of morphs           =", i)
 
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["morphitems"]
+	# progress is counted in ENCODE_PROGRESS_WEIGHTS units, carrying on from where the previous section left off
+	progress_start = progress.done
+	progress_increment = ENCODE_PROGRESS_WEIGHTS["morphitems"]
+	items_done = 0
 
 	fmt_morph = "b b i"
-	fmt_morph_group = "%s f" % IDX_MORPH
+	fmt_morph_group = "%s f" % _FMT.IDX_MORPH
 	fmt_morph_flip = fmt_morph_group
-	fmt_morph_vert = "%s 3f" % IDX_VERT
-	fmt_morph_bone = "%s 3f 4f" % IDX_BONE
-	fmt_morph_uv = "%s 4f" % IDX_VERT
-	fmt_morph_mat = "%s b 4f 3f    f 3f 4f f    4f 4f 4f" % IDX_MAT
-	fmt_morph_impulse = "%s b 3f 3f" % IDX_RB
+	fmt_morph_vert = "%s 3f" % _FMT.IDX_VERT
+	fmt_morph_bone = "%s 3f 4f" % _FMT.IDX_BONE
+	fmt_morph_uv = "%s 4f" % _FMT.IDX_VERT
+	fmt_morph_mat = "%s b 4f 3f    f 3f 4f f    4f 4f 4f" % _FMT.IDX_MAT
+	fmt_morph_impulse = "%s b 3f 3f" % _FMT.IDX_RB
 	for d, morph in enumerate(nice):
 		# (name_jp, name_en, panel, morphtype, itemcount)
 		out += pack.my_string_pack(morph.name_jp)
@@ -992,7 +1025,7 @@ def encode_pmx_morphs(nice: List[pmxstruct.PmxMorph]) -> bytearray:
 		elif morph.morphtype == pmxstruct.MorphType.MATERIAL:  # material
 			for z in morph.items:
 				z: pmxstruct.PmxMorphItemMaterial
-				# (mat_idx, is_add, diffR, diffG, diffB, diffA, specR, specG, specB) = core.unpack(IDX_MAT+"b 4f 3f", raw)
+				# (mat_idx, is_add, diffR, diffG, diffB, diffA, specR, specG, specB) = core.unpack(_FMT.IDX_MAT+"b 4f 3f", raw)
 				# (specpower, ambR, ambG, ambB, edgeR, edgeG, edgeB, edgeA, edgesize) = core.unpack("f 3f 4f f", raw)
 				# (texR, texG, texB, texA, sphR, sphG, sphB, sphA, toonR, toonG, toonB, toonA) = core.unpack("4f 4f 4f", raw)
 				packme = [z.mat_idx, z.is_add, *z.diffRGB, z.alpha, *z.specRGB, z.specpower, *z.ambRGB, *z.edgeRGB,
@@ -1011,23 +1044,27 @@ def encode_pmx_morphs(nice: List[pmxstruct.PmxMorph]) -> bytearray:
 			core.MY_PRINT_FUNC("unsupported morph type value", morph.morphtype)
 		
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment * len(morph.items)
-		core.print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		items_done += len(morph.items)
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(progress_start + items_done * progress_increment)
 
+	progress.update(progress_start + items_done * progress_increment)
 	return out
 
-def encode_pmx_dispframes(nice: List[pmxstruct.PmxFrame]) -> bytearray:
+def encode_pmx_dispframes(nice: List[pmxstruct.PmxFrame], progress=core.NULL_PROGRESS) -> bytearray:
 	# first item is int, how many dispframes
 	i = len(nice)
 	out = pack.my_pack("i", i)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of dispframes       =", i)
 	
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["frameitems"]
+	# progress is counted in ENCODE_PROGRESS_WEIGHTS units, carrying on from where the previous section left off
+	progress_start = progress.done
+	progress_increment = ENCODE_PROGRESS_WEIGHTS["frameitems"]
+	items_done = 0
 
 	fmt_frame = "b i"
-	fmt_frame_item_morph = "b %s" % IDX_MORPH
-	fmt_frame_item_bone =  "b %s" % IDX_BONE
+	fmt_frame_item_morph = "b %s" % _FMT.IDX_MORPH
+	fmt_frame_item_bone =  "b %s" % _FMT.IDX_BONE
 	for d, frame in enumerate(nice):
 		# (name_jp, name_en, is_special, itemcount)
 		out += pack.my_string_pack(frame.name_jp)
@@ -1038,21 +1075,24 @@ def encode_pmx_dispframes(nice: List[pmxstruct.PmxFrame]) -> bytearray:
 			if item.is_morph: out += pack.my_pack(fmt_frame_item_morph, [item.is_morph, item.idx])
 			else:             out += pack.my_pack(fmt_frame_item_bone, [item.is_morph, item.idx])
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment * len(frame.items)
-		core.print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		items_done += len(frame.items)
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(progress_start + items_done * progress_increment)
 	
+	progress.update(progress_start + items_done * progress_increment)
 	return out
 
-def encode_pmx_rigidbodies(nice: List[pmxstruct.PmxRigidBody]) -> bytearray:
+def encode_pmx_rigidbodies(nice: List[pmxstruct.PmxRigidBody], progress=core.NULL_PROGRESS) -> bytearray:
 	# first item is int, how many rigidbodies
 	i = len(nice)
 	out = pack.my_pack("i", i)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of rigidbodies      =", i)
 	
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["rigidbodies"]
+	# progress is counted in ENCODE_PROGRESS_WEIGHTS units, carrying on from where the previous section left off
+	progress_start = progress.done
+	progress_increment = ENCODE_PROGRESS_WEIGHTS["rigidbodies"]
 
-	fmt_rbody = "%s b H b 3f 3f 3f 5f b" % IDX_BONE
+	fmt_rbody = "%s b H b 3f 3f 3f 5f b" % _FMT.IDX_BONE
 	for d, b in enumerate(nice):
 		out += pack.my_string_pack(b.name_jp)
 		out += pack.my_string_pack(b.name_en)
@@ -1073,21 +1113,23 @@ def encode_pmx_rigidbodies(nice: List[pmxstruct.PmxRigidBody]) -> bytearray:
 				  b.phys_mass, b.phys_move_damp, b.phys_rot_damp, b.phys_repel, b.phys_friction, b.phys_mode.value]
 		out += pack.my_pack(fmt_rbody, packme)
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		core.print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(progress_start + d * progress_increment)
 	
+	progress.update(progress_start + i * progress_increment)
 	return out
 
-def encode_pmx_joints(nice: List[pmxstruct.PmxJoint]) -> bytearray:
+def encode_pmx_joints(nice: List[pmxstruct.PmxJoint], progress=core.NULL_PROGRESS) -> bytearray:
 	# first item is int, how many joints
 	i = len(nice)
 	out = pack.my_pack("i", i)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of joints           =", i)
 	
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["joints"]
+	# progress is counted in ENCODE_PROGRESS_WEIGHTS units, carrying on from where the previous section left off
+	progress_start = progress.done
+	progress_increment = ENCODE_PROGRESS_WEIGHTS["joints"]
 
-	fmt_joint = "b 2%s 3f 3f 3f 3f 3f 3f 3f 3f" % IDX_RB
+	fmt_joint = "b 2%s 3f 3f 3f 3f 3f 3f 3f 3f" % _FMT.IDX_RB
 	for d, j in enumerate(nice):
 		out += pack.my_string_pack(j.name_jp)
 		out += pack.my_string_pack(j.name_en)
@@ -1101,12 +1143,13 @@ def encode_pmx_joints(nice: List[pmxstruct.PmxJoint]) -> bytearray:
 				  *j.movemax, *rotmin, *rotmax, *j.movespring, *j.rotspring]
 		out += pack.my_pack(fmt_joint, packme)
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		core.print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(progress_start + d * progress_increment)
 
+	progress.update(progress_start + i * progress_increment)
 	return out
 
-def encode_pmx_softbodies(nice: List[pmxstruct.PmxSoftBody]) -> bytearray:
+def encode_pmx_softbodies(nice: List[pmxstruct.PmxSoftBody], progress=core.NULL_PROGRESS) -> bytearray:
 	# i don't plan to support v2.1 so I'm not gonna try to hard to understand the meaning of these data fields
 	# this is mostly to consume the data so there are no bytes left over when done parsing a file to trigger warnings
 	# note: this is also untested because i dont care about it lol
@@ -1114,15 +1157,16 @@ def encode_pmx_softbodies(nice: List[pmxstruct.PmxSoftBody]) -> bytearray:
 	out = pack.my_pack("i", i)
 	if PMX_MOREINFO: core.MY_PRINT_FUNC("...# of softbodies       =", i)
 	
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["softbodies"]
+	# progress is counted in ENCODE_PROGRESS_WEIGHTS units, carrying on from where the previous section left off
+	progress_start = progress.done
+	progress_increment = ENCODE_PROGRESS_WEIGHTS["softbodies"]
 
-	fmt_sb = "b %s b H b iiffi 12f 6f 7i" % IDX_MAT
-	fmt_sb_anchor = "%s %s b" % (IDX_RB, IDX_VERT)
+	fmt_sb = "b %s b H b iiffi 12f 6f 7i" % _FMT.IDX_MAT
+	fmt_sb_anchor = "%s %s b" % (_FMT.IDX_RB, _FMT.IDX_VERT)
 	for d, s in enumerate(nice):
 		out += pack.my_string_pack(s.name_jp)
 		out += pack.my_string_pack(s.name_en)
-		# (name_jp, name_en, shape, idx_mat, group, nocollide_mask, flags) = core.my_unpack("t t b" + IDX_MAT + "b H b", raw)
+		# (name_jp, name_en, shape, idx_mat, group, nocollide_mask, flags) = core.my_unpack("t t b" + _FMT.IDX_MAT + "b H b", raw)
 		# (b_link_create_dist, num_clusters, total_mass, collision_marign, aerodynamics_model) = core.my_unpack("iiffi", raw)
 		# (vcf, dp, dg, lf, pr, vc, df, mt, rch, kch, sch, ah) = core.my_unpack("12f", raw)
 		# (srhr_cl, skhr_cl, sshr_cl, sr_splt_cl, sk_splt_cl, ss_splt_cl) = core.my_unpack("6f", raw)
@@ -1145,68 +1189,33 @@ def encode_pmx_softbodies(nice: List[pmxstruct.PmxSoftBody]) -> bytearray:
 		# (num_pins)
 		out += pack.my_pack("i", len(s.vertex_pin_list))
 		for pin in s.vertex_pin_list:
-			out += pack.my_pack(IDX_VERT, pin)
+			out += pack.my_pack(_FMT.IDX_VERT, pin)
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		core.print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(progress_start + d * progress_increment)
 	
+	progress.update(progress_start + i * progress_increment)
 	return out
 
-def _prepare_progress_printouts_for_write_pmx(pmx: pmxstruct.Pmx) -> None:
-	# since i know the total size of the VMD object, and how many of each thing is within it,
+def _estimate_encode_work(pmx: pmxstruct.Pmx) -> float:
+	# since i know the total size of the PMX object, and how many of each thing is within it,
 	# if i measure how long it takes to encode some number of each thing then I should be able to estimate
 	# how long it takes to encode each section and/or the whole thing!
-	# this function is to set global variables and stuff to aid with that goal
-
-	# verts, faces, and morphs are the only significant time sinks
-	# verts/faces/morphitems number ~10,000 to ~300,000
-	# this totally dwarfs the other categories... ~100 mats, ~500 bones/rigidbodies/joints/dispframes
-	# buuuuuuuuuuut i guess there's no harm in assigning weights to the smaller categories anyway
-	
-	relative_weights = {
-		# "header":		0,
-		"verts":		50,		# major
-		"faces":		8,		# major
-		# "textures":	0,
-		"materials":	100,
-		"bones":		80,
-		"morphitems":	8,		# major
-		"frameitems":	10,
-		"rigidbodies":	80,
-		"joints":		80,
-		"softbodies":	900,
-	}
+	# this returns the whole thing in ENCODE_PROGRESS_WEIGHTS units, the total for the progress reporter
+	w = ENCODE_PROGRESS_WEIGHTS
 	total_relative_size = 0
-	total_relative_size += relative_weights["verts"] * len(pmx.verts)
-	total_relative_size += relative_weights["faces"] * len(pmx.faces)
-	total_relative_size += relative_weights["materials"] * len(pmx.materials)
-	total_relative_size += relative_weights["bones"] * len(pmx.bones)
-	total_relative_size += relative_weights["morphitems"] * sum(len(m.items) for m in pmx.morphs)
-	total_relative_size += relative_weights["frameitems"] * sum(len(m.items) for m in pmx.frames)
-	total_relative_size += relative_weights["rigidbodies"] * len(pmx.rigidbodies)
-	total_relative_size += relative_weights["joints"] * len(pmx.joints)
-	total_relative_size += relative_weights["softbodies"] * len(pmx.softbodies)
+	total_relative_size += w["verts"] * len(pmx.verts)
+	total_relative_size += w["faces"] * len(pmx.faces)
+	total_relative_size += w["materials"] * len(pmx.materials)
+	total_relative_size += w["bones"] * len(pmx.bones)
+	total_relative_size += w["morphitems"] * sum(len(m.items) for m in pmx.morphs)
+	total_relative_size += w["frameitems"] * sum(len(m.items) for m in pmx.frames)
+	total_relative_size += w["rigidbodies"] * len(pmx.rigidbodies)
+	total_relative_size += w["joints"] * len(pmx.joints)
+	if pmx.header.ver == 2.1:
+		total_relative_size += w["softbodies"] * len(pmx.softbodies)
 	# deliberately skip textures cuz it would be messy, and header cuz it's just one atomic indivisible item
-	
-	# now i have the total relative size... normalize to 100%=1 and all the relative weights get reduced by same amount
-	factor = 1 / total_relative_size
-	for category, relative_value in relative_weights.items():
-		ENCODE_PERCENTPOINT_WEIGHTS[category] = relative_value * factor
-	
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["verts"] * len(pmx.verts))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["faces"] * len(pmx.faces))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["materials"] * len(pmx.materials))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["bones"] * len(pmx.bones))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["morphitems"] * sum(len(m.items) for m in pmx.morphs))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["frameitems"] * sum(len(m.items) for m in pmx.frames))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["rigidbodies"] * len(pmx.rigidbodies))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["joints"] * len(pmx.joints))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["softbodies"] * len(pmx.softbodies))
-
-	global ENCODE_PERCENTPOINT_SOFAR
-	ENCODE_PERCENTPOINT_SOFAR = 0
-	
-	return
+	return total_relative_size
 
 ########################################################################################################################
 
@@ -1219,32 +1228,33 @@ def read_pmx(pmx_filename: str, moreinfo=False) -> pmxstruct.Pmx:
 	pmx_bytes = io.read_binfile_to_bytes(pmx_filename)
 	core.MY_PRINT_FUNC("...total size   = %s" % core.prettyprint_file_size(len(pmx_bytes)))
 	core.MY_PRINT_FUNC("Begin parsing PMX file '%s'" % pmx_filename_clean)
-	pack.reset_unpack()
-	core.print_progress_oneline(0)
-	A = parse_pmx_header(pmx_bytes)
-	if PMX_MOREINFO: core.MY_PRINT_FUNC("...PMX version  = v%s" % str(A.ver))
-	core.MY_PRINT_FUNC("...model name   = JP:'%s' / EN:'%s'" % (A.name_jp, A.name_en))
-	B = parse_pmx_vertices(pmx_bytes)
-	C = parse_pmx_surfaces(pmx_bytes)
-	tex_list = parse_pmx_textures(pmx_bytes)
-	E = parse_pmx_materials(pmx_bytes, tex_list)
-	F = parse_pmx_bones(pmx_bytes)
-	G = parse_pmx_morphs(pmx_bytes)
-	H = parse_pmx_dispframes(pmx_bytes)
-	I = parse_pmx_rigidbodies(pmx_bytes)
-	J = parse_pmx_joints(pmx_bytes)
-	if A.ver == 2.1:
-		# if version==2.1, parse soft bodies
-		K = parse_pmx_softbodies(pmx_bytes)
-	else:
-		# otherwise, dont
-		K = []
+	progress = core.progress_reporter(len(pmx_bytes))
+	# a fresh read position & decode stats for this file, so other threads can read other files at the same time
+	with pack.PackerContext() as ctx:
+		A = parse_pmx_header(pmx_bytes)
+		if PMX_MOREINFO: core.MY_PRINT_FUNC("...PMX version  = v%s" % str(A.ver))
+		core.MY_PRINT_FUNC("...model name   = JP:'%s' / EN:'%s'" % (A.name_jp, A.name_en))
+		B = parse_pmx_vertices(pmx_bytes, progress)
+		C = parse_pmx_surfaces(pmx_bytes, progress)
+		tex_list = parse_pmx_textures(pmx_bytes)
+		E = parse_pmx_materials(pmx_bytes, tex_list)
+		F = parse_pmx_bones(pmx_bytes)
+		G = parse_pmx_morphs(pmx_bytes, progress)
+		H = parse_pmx_dispframes(pmx_bytes)
+		I = parse_pmx_rigidbodies(pmx_bytes, progress)
+		J = parse_pmx_joints(pmx_bytes, progress)
+		if A.ver == 2.1:
+			# if version==2.1, parse soft bodies
+			K = parse_pmx_softbodies(pmx_bytes)
+		else:
+			# otherwise, dont
+			K = []
 	
-	bytes_remain = len(pmx_bytes) - pack.UNPACKER_READFROM_BYTE
+	bytes_remain = len(pmx_bytes) - ctx.readfrom_byte
 	if bytes_remain != 0:
 		core.MY_PRINT_FUNC("Warning: finished parsing but %d bytes are left over at the tail!" % bytes_remain)
 		core.MY_PRINT_FUNC("The file may be corrupt or maybe it contains unknown/unsupported data formats")
-		core.MY_PRINT_FUNC(pmx_bytes[pack.UNPACKER_READFROM_BYTE:])
+		core.MY_PRINT_FUNC(pmx_bytes[ctx.readfrom_byte:])
 	core.MY_PRINT_FUNC("Done parsing PMX file '%s'" % pmx_filename_clean)
 	retme = pmxstruct.Pmx(header=A,
 						  verts=B,
@@ -1288,23 +1298,23 @@ def write_pmx(pmx_filename: str, pmx: pmxstruct.Pmx, moreinfo=False) -> None:
 	# pmx.rigidbodies = pmx.rigidbodies * 1000
 	# pmx.joints = pmx.joints * 1000
 	
-	_prepare_progress_printouts_for_write_pmx(pmx)
-
-	core.print_progress_oneline(0)
-	lookahead, tex_list = encode_pmx_lookahead(pmx)
-	output_bytes += encode_pmx_header(pmx.header, lookahead)
-	output_bytes += encode_pmx_vertices(pmx.verts)
-	output_bytes += encode_pmx_surfaces(pmx.faces)
-	output_bytes += encode_pmx_textures(tex_list)
-	output_bytes += encode_pmx_materials(pmx.materials, tex_list)
-	output_bytes += encode_pmx_bones(pmx.bones)
-	output_bytes += encode_pmx_morphs(pmx.morphs)
-	output_bytes += encode_pmx_dispframes(pmx.frames)
-	output_bytes += encode_pmx_rigidbodies(pmx.rigidbodies)
-	output_bytes += encode_pmx_joints(pmx.joints)
-	if pmx.header.ver == 2.1:
-		# if version==2.1, parse soft bodies
-		output_bytes += encode_pmx_softbodies(pmx.softbodies)
+	progress = core.progress_reporter(_estimate_encode_work(pmx))
+	# encode in a context of its own so the encoding can't change underneath us if another thread reads/writes too
+	with pack.PackerContext():
+		lookahead, tex_list = encode_pmx_lookahead(pmx)
+		output_bytes += encode_pmx_header(pmx.header, lookahead)
+		output_bytes += encode_pmx_vertices(pmx.verts, progress)
+		output_bytes += encode_pmx_surfaces(pmx.faces, progress)
+		output_bytes += encode_pmx_textures(tex_list)
+		output_bytes += encode_pmx_materials(pmx.materials, tex_list, progress)
+		output_bytes += encode_pmx_bones(pmx.bones, progress)
+		output_bytes += encode_pmx_morphs(pmx.morphs, progress)
+		output_bytes += encode_pmx_dispframes(pmx.frames, progress)
+		output_bytes += encode_pmx_rigidbodies(pmx.rigidbodies, progress)
+		output_bytes += encode_pmx_joints(pmx.joints, progress)
+		if pmx.header.ver == 2.1:
+			# if version==2.1, parse soft bodies
+			output_bytes += encode_pmx_softbodies(pmx.softbodies, progress)
 
 	# done encoding!!
 
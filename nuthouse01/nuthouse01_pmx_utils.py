@@ -8,6 +8,8 @@ _SCRIPT_VERSION = "Script version:  Nuthouse01 - v1.07.05 - 8/22/2021"
 ################################################################################
 # this file defines some handy functions that help when manipulating PMXs
 
+# the per-face loops only report their progress once every this many faces
+PROGRESS_CHUNK = 0x400
 
 def delme_list_to_rangemap(delme: List[int]) -> Tuple[List[int], List[int]]:
 	"""
@@ -367,6 +369,7 @@ def vert_delete_and_remap(pmx: pmxstruct.Pmx, vert_dellist: List[int], vert_shif
 																						   pmxstruct.MorphType.UV_EXT2,
 																						   pmxstruct.MorphType.UV_EXT3,
 																						   pmxstruct.MorphType.UV_EXT4))])
+	progress = core.progress_reporter(totalwork)
 	
 	# faces:
 	d = 0
@@ -377,7 +380,8 @@ def vert_delete_and_remap(pmx: pmxstruct.Pmx, vert_dellist: List[int], vert_shif
 		face[1] = newval_from_rangemap(face[1], vert_shiftmap)
 		face[2] = newval_from_rangemap(face[2], vert_shiftmap)
 		# display progress printouts
-		core.print_progress_oneline(d / totalwork)
+		if not d % PROGRESS_CHUNK and progress:
+			progress.update(d)
 	
 	# core.MY_PRINT_FUNC("Done updating vertex references in faces")
 	
@@ -417,7 +421,7 @@ def vert_delete_and_remap(pmx: pmxstruct.Pmx, vert_dellist: List[int], vert_shif
 			x.vert_idx = newval
 		# display progress printouts
 		d += lenbefore
-		core.print_progress_oneline(d / totalwork)
+		progress.update(d)
 	
 	# core.MY_PRINT_FUNC("Done updating vertex references in morphs")
 	
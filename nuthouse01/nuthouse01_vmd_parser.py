@@ -1,7 +1,12 @@
+import collections
+import itertools
 import math
+import operator
+import os
 import struct
 import time
-from typing import List
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Tuple, Union
 
 import nuthouse01.nuthouse01_core as core
 import nuthouse01.nuthouse01_io as io
@@ -47,6 +52,10 @@ _SCRIPT_VERSION = "Script version:  Nuthouse01 - v1.07.04 - 8/19/2021"
 # 	parse_vmd_shadowframe()
 # 	parse_vmd_ikdispframe()
 #
+# read_vmd_lazy()
+# 	core.read_binfile_to_bytes()
+# 	index_vmd_sections()
+#
 # write_vmd()
 # 	encode_vmd_header()
 # 	encode_vmd_boneframe()
@@ -73,13 +82,9 @@ GUARANTEE_FRAMES_SORTED = True
 APPEND_SIGNATURE = True
 SIGNATURE = "Nuthouse01"
 
-# parsing progress printouts: depend on the actual number of bytes processed, very accurate & linear
-# encoding progress printouts: these vars estimate how long one item of each type will take to complete (relatively)
-ENCODE_FACTOR_BONE = 1
-ENCODE_FACTOR_MORPH = 0.25
-# dont touch these
-ENCODE_PERCENT_BONE = 0
-ENCODE_PERCENT_MORPH = 0
+# progress printouts, both reading and writing: depend on the actual number of bytes processed, very accurate & linear
+# the hot loops only update it once every PROGRESS_CHUNK frames. turn it off with core.PROGRESS_SINK = None
+PROGRESS_CHUNK = 0x1000
 
 
 
@@ -90,12 +95,49 @@ fmt_boneframe_no_interpcurve = "I 7f"
 fmt_boneframe_interpcurve = "bb bb 12b xbb 45x"
 fmt_boneframe_interpcurve_oneline = "16b"
 fmt_morphframe = "I f"
-fmt_camframe = "I 7f 24b I ?"
+fmt_camframe_no_interpcurve = "I 7f"
+fmt_camframe_interpcurve = "24b"
+fmt_camframe_tail = "I ?"
+fmt_camframe = fmt_camframe_no_interpcurve + " " + fmt_camframe_interpcurve + " " + fmt_camframe_tail
 fmt_lightframe = "I 3f 3f"
 fmt_shadowframe = "I b f"
 fmt_ikdispframe = "I ? I"
 fmt_ikframe = "?"
 
+# precompiled whole-record versions for the bulk parsers and the lazy views
+# the bone interp block is kept as raw bytes, frames only unpack it when their interp lists are used
+boneframe_record_struct = struct.Struct("<15s " + fmt_boneframe_no_interpcurve + " 64s")
+# the physics flag and the values it overwrote, out of the bone interp block
+boneframe_phys_struct = struct.Struct("<2x bb 13x bb 45x")
+morphframe_record_struct = struct.Struct("<15s " + fmt_morphframe)
+camframe_record_struct = struct.Struct("<" + fmt_camframe)
+lightframe_record_struct = struct.Struct("<" + fmt_lightframe)
+shadowframe_record_struct = struct.Struct("<" + fmt_shadowframe)
+ikdispframe_head_struct = struct.Struct("<" + fmt_ikdispframe)
+ikbone_record_struct = struct.Struct("<20s " + fmt_ikframe)
+# size of one record of each section, in file order. ikdisp records hold a variable number of ik bones so they have none
+VMD_RECORD_SIZES = {
+	"boneframes": boneframe_record_struct.size,
+	"morphframes": morphframe_record_struct.size,
+	"camframes": camframe_record_struct.size,
+	"lightframes": lightframe_record_struct.size,
+	"shadowframes": shadowframe_record_struct.size,
+	"ikdispframes": None,
+}
+# precompiled versions for the bulk boneframe/morphframe encoders
+frame_number_struct = struct.Struct("<" + fmt_number)
+boneframe_head_struct = struct.Struct("<15s " + fmt_boneframe_no_interpcurve)
+boneframe_interp_struct = struct.Struct("<64b")
+# where the interp block is within a cam record
+_CAMFRAME_INTERP_START = struct.calcsize("<" + fmt_camframe_no_interpcurve)
+_CAMFRAME_INTERP_END = struct.calcsize("<" + fmt_camframe_no_interpcurve + " " + fmt_camframe_interpcurve)
+# the 64-byte interp block is 4 copies of the 16-byte interp line, each shifted left 1 more byte and zero-filled, and
+# bytes 2,3 of the first copy hold the physics flag. gathers from (*interp_line, 0, phys1, phys2)
+_BONEFRAME_INTERP_GATHER = operator.itemgetter(*[
+	17 if (row, k) == (0, 2) else 18 if (row, k) == (0, 3) else min(row + k, 16)
+	for row in range(4) for k in range(16)
+])
+
 
 
 ########################################################################################################################
@@ -142,11 +184,60 @@ def parse_vmd_header(raw:bytearray, moreinfo:bool) -> vmdstruct.VmdHeader:
 	
 	return vmdstruct.VmdHeader(version=version, modelname=modelname)
 
-def parse_vmd_boneframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdBoneFrame]:
+def _section_view(raw:bytearray, count:int, record_struct:struct.Struct, section:str) -> memoryview:
+	# slice out the fixed-size records of one section and advance the read position past them
+	ctx = pack.get_context()
+	start = ctx.readfrom_byte
+	end = start + (count * record_struct.size)
+	if end > len(raw):
+		core.MY_PRINT_FUNC("frame=", (len(raw) - start) // record_struct.size)
+		core.MY_PRINT_FUNC("totalframes=", count)
+		core.MY_PRINT_FUNC("section=" + section)
+		core.MY_PRINT_FUNC("Err: something went wrong while parsing, file is probably corrupt/malformed")
+		raise RuntimeError("file ended in the middle of the %s section" % section)
+	ctx.readfrom_byte = end
+	return memoryview(raw)[start:end]
+
+def _boneframe_from_record(record: tuple, bytepos: int, blocks: dict=None) -> vmdstruct.VmdBoneFrame:
+	# turn one unpacked boneframe_record_struct into a frame
+	(bname_bytes, f, xp, yp, zp, xrot_q, yrot_q, zrot_q, wrot_q, interp_raw) = record
+	# a VMD only has a handful of distinct interp blocks, frames with the same one share one bytes object
+	if blocks is not None: interp_raw = blocks.setdefault(interp_raw, interp_raw)
+	# the 3rd and 4th bytes in line1 of inter_curve are overwritten with phys, the bytes they should hold are copied
+	# in line2 which is left-shifted by 1 byte, but otherwise a copy
+	(phys1, phys2, z_ax, r_ax) = boneframe_phys_struct.unpack(interp_raw)
+	# any NaN or INF poisons the sum, so only the rare bad record pays for the per-float check
+	if not math.isfinite(xp + yp + zp + xrot_q + yrot_q + zrot_q + wrot_q):
+		(xp, yp, zp, xrot_q, yrot_q, zrot_q, wrot_q) = pack.fix_nan_inf(
+			[xp, yp, zp, xrot_q, yrot_q, zrot_q, wrot_q], bytepos)
+	bname_str = pack.decode_fixed_string(bname_bytes)
+	# interpret the physics enable/disable bytes
+	if (phys1, phys2) == (z_ax, r_ax):
+		# if they match the values they should be, they were never overwritten in the first place???
+		phys_off = False
+	elif (phys1, phys2) == (0, 0):
+		# phys stays on
+		phys_off = False
+	elif (phys1, phys2) == (99, 15):
+		# phys turns off
+		phys_off = True
+	else:
+		core.MY_PRINT_FUNC("Warning: found unusual values where I expected to find physics enable/disable! Assuming this means physics off")
+		core.MY_PRINT_FUNC(bname_str, "f=", str(f), "(phys1,phys2)=", str((phys1, phys2)))
+		phys_off = True
+	# create the boneframe object
+	return vmdstruct.VmdBoneFrame(
+		name=bname_str, f=f, pos=[xp,yp,zp], rot=None, phys_off=phys_off,
+		# keep the quaternion and the interp block, they are only converted if rot or the interp lists are used
+		quat=(wrot_q, xrot_q, yrot_q, zrot_q),
+		interp_raw=interp_raw,
+	)
+
+def parse_vmd_boneframe(raw:bytearray, moreinfo:bool, progress=core.NULL_PROGRESS) -> List[vmdstruct.VmdBoneFrame]:
 	# get all the bone-frames, store in a list of lists
 	boneframe_list = []
 	# verify that there is enough file left to read a single number
-	if (len(raw) - pack.UNPACKER_READFROM_BYTE) < struct.calcsize(fmt_number):
+	if (len(raw) - pack.get_context().readfrom_byte) < struct.calcsize(fmt_number):
 		core.MY_PRINT_FUNC("Warning: expected boneframe_ct field but file ended unexpectedly! Assuming 0 boneframes and continuing...")
 		return boneframe_list
 
@@ -154,57 +245,39 @@ def parse_vmd_boneframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdBoneF
 	# get the number of bone-frames
 	boneframe_ct = pack.my_unpack(fmt_number, raw)
 	if moreinfo: core.MY_PRINT_FUNC("...# of boneframes          = %d" % boneframe_ct)
-	for z in range(boneframe_ct):
-		try:
-			# unpack the bone-frame into variables
-			bname_str = pack.my_string_unpack(raw, L=15)
-			(f, xp, yp, zp, xrot_q, yrot_q, zrot_q, wrot_q) = pack.my_unpack(fmt_boneframe_no_interpcurve, raw)
-			# break inter_curve into its individual pieces, knowing that the 3rd and 4th bytes in line1 are overwritten with phys
-			# therefore we need to get their data from line2 which is left-shifted by 1 byte, but otherwise a copy
-			(x_ax, y_ax, phys1, phys2, x_ay, y_ay, z_ay, r_ay, x_bx, y_bx, z_bx, r_bx, x_by, y_by, z_by, r_by,
-			 z_ax, r_ax) = pack.my_unpack(fmt_boneframe_interpcurve, raw)
-			# convert the quaternion angles to euler angles
-			(xrot, yrot, zrot) = core.quaternion_to_euler([wrot_q, xrot_q, yrot_q, zrot_q])
-			# interpret the physics enable/disable bytes
-			if (phys1, phys2) == (z_ax, r_ax):
-				# if they match the values they should be, they were never overwritten in the first place???
-				phys_off = False
-			elif (phys1, phys2) == (0, 0):
-				# phys stays on
-				phys_off = False
-			elif (phys1, phys2) == (99, 15):
-				# phys turns off
-				phys_off = True
-			else:
-				core.MY_PRINT_FUNC("Warning: found unusual values where I expected to find physics enable/disable! Assuming this means physics off")
-				core.MY_PRINT_FUNC(bname_str, "f=", str(f), "(phys1,phys2)=", str((phys1, phys2)))
-				phys_off = True
-			# create the boneframe object
-			this_boneframe = vmdstruct.VmdBoneFrame(
-				name=bname_str, f=f, pos=[xp,yp,zp], rot=[xrot,yrot,zrot], phys_off=phys_off, 
-				interp_x=[x_ax, x_ay, x_bx, x_by],
-				interp_y=[y_ax, y_ay, y_bx, y_by],
-				interp_z=[z_ax, z_ay, z_bx, z_by],
-				interp_r=[r_ax, r_ay, r_bx, r_by],
-			)
+	start = pack.get_context().readfrom_byte
+	view = _section_view(raw, boneframe_ct, boneframe_record_struct, "boneframe")
+	blocks = {}
+	z = 0
+	try:
+		# unpack every bone-frame of the section in one go
+		for z, record in enumerate(boneframe_record_struct.iter_unpack(view)):
+			this_boneframe = _boneframe_from_record(record, start + ((z + 1) * boneframe_record_struct.size), blocks)
 			boneframe_list.append(this_boneframe)
 			# display progress printouts
-			core.print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
-		except Exception as e:
-			core.MY_PRINT_FUNC(e.__class__.__name__, e)
-			core.MY_PRINT_FUNC("frame=", z)
-			core.MY_PRINT_FUNC("totalframes=", boneframe_ct)
-			core.MY_PRINT_FUNC("section=boneframe")
-			core.MY_PRINT_FUNC("Err: something went wrong while parsing, file is probably corrupt/malformed")
-			raise
+			if not z % PROGRESS_CHUNK and progress:
+				progress.update(start + (z * boneframe_record_struct.size))
+	except Exception as e:
+		core.MY_PRINT_FUNC(e.__class__.__name__, e)
+		core.MY_PRINT_FUNC("frame=", z)
+		core.MY_PRINT_FUNC("totalframes=", boneframe_ct)
+		core.MY_PRINT_FUNC("section=boneframe")
+		core.MY_PRINT_FUNC("Err: something went wrong while parsing, file is probably corrupt/malformed")
+		raise RuntimeError() from e
 	
 	return boneframe_list
 
-def parse_vmd_morphframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdMorphFrame]:
+def _morphframe_from_record(record: tuple, bytepos: int) -> vmdstruct.VmdMorphFrame:
+	(mname_bytes, f, v) = record
+	if not math.isfinite(v):
+		v = pack.fix_nan_inf([v], bytepos)[0]
+	return vmdstruct.VmdMorphFrame(name=pack.decode_fixed_string(mname_bytes), f=f, val=v)
+
+def parse_vmd_morphframe(raw:bytearray, moreinfo:bool, progress=core.NULL_PROGRESS) -> List[vmdstruct.VmdMorphFrame]:
 	# get all the morph-frames, store in a list of lists
 	morphframe_list = []
 	# is there enough file left to read a single number?
-	if (len(raw) - pack.UNPACKER_READFROM_BYTE) < struct.calcsize(fmt_number):
+	if (len(raw) - pack.get_context().readfrom_byte) < struct.calcsize(fmt_number):
 		core.MY_PRINT_FUNC("Warning: expected morphframe_ct field but file ended unexpectedly! Assuming 0 morphframes and continuing...")
 		return morphframe_list
 	
@@ -212,29 +285,47 @@ def parse_vmd_morphframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdMorp
 	# get the number of morph frames
 	morphframe_ct = pack.my_unpack(fmt_number, raw)
 	if moreinfo: core.MY_PRINT_FUNC("...# of morphframes         = %d" % morphframe_ct)
-	for z in range(morphframe_ct):
-		try:
-			# unpack the morphframe
-			mname_str = pack.my_string_unpack(raw, L=15)
-			(f, v) = pack.my_unpack(fmt_morphframe, raw)
-			morphframe_list.append(vmdstruct.VmdMorphFrame(name=mname_str, f=f, val=v))
+	start = pack.get_context().readfrom_byte
+	view = _section_view(raw, morphframe_ct, morphframe_record_struct, "morphframe")
+	z = 0
+	try:
+		# unpack every morph-frame of the section in one go
+		for z, record in enumerate(morphframe_record_struct.iter_unpack(view)):
+			morphframe_list.append(_morphframe_from_record(record, start + ((z + 1) * morphframe_record_struct.size)))
 			
 			# display progress printouts
-			core.print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
-		except Exception as e:
-			core.MY_PRINT_FUNC(e.__class__.__name__, e)
-			core.MY_PRINT_FUNC("frame=", z)
-			core.MY_PRINT_FUNC("totalframes=", morphframe_ct)
-			core.MY_PRINT_FUNC("section=morphframe")
-			core.MY_PRINT_FUNC("Err: something went wrong while parsing, file is probably corrupt/malformed")
-			raise RuntimeError()
+			if not z % PROGRESS_CHUNK and progress:
+				progress.update(start + (z * morphframe_record_struct.size))
+	except Exception as e:
+		core.MY_PRINT_FUNC(e.__class__.__name__, e)
+		core.MY_PRINT_FUNC("frame=", z)
+		core.MY_PRINT_FUNC("totalframes=", morphframe_ct)
+		core.MY_PRINT_FUNC("section=morphframe")
+		core.MY_PRINT_FUNC("Err: something went wrong while parsing, file is probably corrupt/malformed")
+		raise RuntimeError()
 	
 	return morphframe_list
 
-def parse_vmd_camframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdCamFrame]:
+def _camframe_from_record(record: list, interp_raw: bytes) -> vmdstruct.VmdCamFrame:
+	# unpack into variables, the interp values are taken from the raw block only when they are used
+	(f, d, xp, yp, zp, xr, yr, zr) = record[:8]
+	(fov, per) = record[-2:]
+	
+	rot_degrees = [math.degrees(j) for j in (xr,yr,zr)]  # angle comes in as radians, convert radians to degrees
+	return vmdstruct.VmdCamFrame(
+		f=f,
+		dist=d,
+		pos=[xp,yp,zp],
+		rot=rot_degrees,
+		fov=fov,
+		perspective=per,
+		interp_raw=interp_raw,
+	)
+
+def parse_vmd_camframe(raw:bytearray, moreinfo:bool, progress=core.NULL_PROGRESS) -> List[vmdstruct.VmdCamFrame]:
 	camframe_list = []
 	# is there enough file left to read a single number?
-	if (len(raw) - pack.UNPACKER_READFROM_BYTE) < struct.calcsize(fmt_number):
+	if (len(raw) - pack.get_context().readfrom_byte) < struct.calcsize(fmt_number):
 		core.MY_PRINT_FUNC("Warning: expected camframe_ct field but file ended unexpectedly! Assuming 0 camframes and continuing...")
 		return camframe_list
 	############################
@@ -243,29 +334,13 @@ def parse_vmd_camframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdCamFra
 	if moreinfo: core.MY_PRINT_FUNC("...# of camframes           = %d" % camframe_ct)
 	for z in range(camframe_ct):
 		try:
-			# unpack into variables
-			(f, d, xp, yp, zp, xr, yr, zr,
-			 x_ax, x_bx, x_ay, x_by, y_ax, y_bx, y_ay, y_by, z_ax, z_bx, z_ay, z_by, r_ax, r_bx, r_ay, r_by,
-			 dist_ax, dist_bx, dist_ay, dist_by, ang_ax, ang_bx, ang_ay, ang_by,
-			 fov, per) = pack.my_unpack(fmt_camframe, raw)
-			
-			rot_degrees = [math.degrees(j) for j in (xr,yr,zr)]  # angle comes in as radians, convert radians to degrees
-			this_camframe = vmdstruct.VmdCamFrame(f=f,
-												  dist=d,
-												  pos=[xp,yp,zp],
-												  rot=rot_degrees,
-												  fov=fov,
-												  perspective=per,
-												  interp_x=[x_ax, x_ay, x_bx, x_by],
-												  interp_y=[y_ax, y_ay, y_bx, y_by],
-												  interp_z=[z_ax, z_ay, z_bx, z_by],
-												  interp_r=[r_ax, r_ay, r_bx, r_by],
-												  interp_dist=[dist_ax, dist_ay, dist_bx, dist_by],
-												  interp_fov=[ang_ax, ang_ay, ang_bx, ang_by],
-												  )
+			start = pack.get_context().readfrom_byte
+			interp_raw = bytes(raw[start + _CAMFRAME_INTERP_START:start + _CAMFRAME_INTERP_END])
+			this_camframe = _camframe_from_record(pack.my_unpack(fmt_camframe, raw), interp_raw)
 			camframe_list.append(this_camframe)
 			# display progress printouts
-			core.print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
+			if not z % PROGRESS_CHUNK and progress:
+				progress.update(pack.get_context().readfrom_byte)
 		except Exception as e:
 			core.MY_PRINT_FUNC(e.__class__.__name__, e)
 			core.MY_PRINT_FUNC("frame=", z)
@@ -276,10 +351,17 @@ def parse_vmd_camframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdCamFra
 
 	return camframe_list
 
-def parse_vmd_lightframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdLightFrame]:
+def _lightframe_from_record(record: list) -> vmdstruct.VmdLightFrame:
+	(f, r, g, b, x, y, z) = record
+	# the r g b actually come back as floats [0.0 - 1.0]
+	return vmdstruct.VmdLightFrame(f=f,
+								   color=[r,g,b],
+								   pos=[x,y,z])
+
+def parse_vmd_lightframe(raw:bytearray, moreinfo:bool, progress=core.NULL_PROGRESS) -> List[vmdstruct.VmdLightFrame]:
 	lightframe_list = []
 	# is there enough file left to read a single number?
-	if (len(raw) - pack.UNPACKER_READFROM_BYTE) < struct.calcsize(fmt_number):
+	if (len(raw) - pack.get_context().readfrom_byte) < struct.calcsize(fmt_number):
 		core.MY_PRINT_FUNC("Warning: expected lightframe_ct field but file ended unexpectedly! Assuming 0 lightframes and continuing...")
 		return lightframe_list
 	############################
@@ -288,11 +370,7 @@ def parse_vmd_lightframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdLigh
 	if moreinfo: core.MY_PRINT_FUNC("...# of lightframes         = %d" % lightframe_ct)
 	for i in range(lightframe_ct):
 		try:
-			(f, r, g, b, x, y, z) = pack.my_unpack(fmt_lightframe, raw)
-			# the r g b actually come back as floats [0.0 - 1.0]
-			lightframe_list.append(vmdstruct.VmdLightFrame(f=f,
-												 color=[r,g,b],
-												 pos=[x,y,z]))
+			lightframe_list.append(_lightframe_from_record(pack.my_unpack(fmt_lightframe, raw)))
 		except Exception as e:
 			core.MY_PRINT_FUNC(e.__class__.__name__, e)
 			core.MY_PRINT_FUNC("frame=", i)
@@ -300,13 +378,21 @@ def parse_vmd_lightframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdLigh
 			core.MY_PRINT_FUNC("section=lightframe")
 			core.MY_PRINT_FUNC("Err: something went wrong while parsing, file is probably corrupt/malformed")
 			raise RuntimeError()
-
+	progress.update(pack.get_context().readfrom_byte)
 	return lightframe_list
 
-def parse_vmd_shadowframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdShadowFrame]:
+def _shadowframe_from_record(record: list) -> vmdstruct.VmdShadowFrame:
+	(f, m, v) = record
+	v = round(10000 - (v * 100000))
+	# stored as 0.0 to 0.1 ??? why would it use this range!? also its range-inverted
+	# [0,9999] -> [0.1, 0.0]
+	shadowmode = vmdstruct.ShadowMode(m)
+	return vmdstruct.VmdShadowFrame(f=f, mode=shadowmode, val=v)
+
+def parse_vmd_shadowframe(raw:bytearray, moreinfo:bool, progress=core.NULL_PROGRESS) -> List[vmdstruct.VmdShadowFrame]:
 	shadowframe_list = []
 	# is there enough file left to read a single number?
-	if (len(raw) - pack.UNPACKER_READFROM_BYTE) < struct.calcsize(fmt_number):
+	if (len(raw) - pack.get_context().readfrom_byte) < struct.calcsize(fmt_number):
 		core.MY_PRINT_FUNC("Warning: expected shadowframe_ct field but file ended unexpectedly! Assuming 0 shadowframes and continuing...")
 		return shadowframe_list
 
@@ -316,12 +402,7 @@ def parse_vmd_shadowframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdSha
 	if moreinfo: core.MY_PRINT_FUNC("...# of shadowframes        = %d" % shadowframe_ct)
 	for i in range(shadowframe_ct):
 		try:
-			(f, m, v) = pack.my_unpack(fmt_shadowframe, raw)
-			v = round(10000 - (v * 100000))
-			# stored as 0.0 to 0.1 ??? why would it use this range!? also its range-inverted
-			# [0,9999] -> [0.1, 0.0]
-			shadowmode = vmdstruct.ShadowMode(m)
-			shadowframe_list.append(vmdstruct.VmdShadowFrame(f=f, mode=shadowmode, val=v))
+			shadowframe_list.append(_shadowframe_from_record(pack.my_unpack(fmt_shadowframe, raw)))
 		except Exception as e:
 			core.MY_PRINT_FUNC(e.__class__.__name__, e)
 			core.MY_PRINT_FUNC("frame=", i)
@@ -329,12 +410,23 @@ def parse_vmd_shadowframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdSha
 			core.MY_PRINT_FUNC("section=shadowframe")
 			core.MY_PRINT_FUNC("Err: something went wrong while parsing, file is probably corrupt/malformed")
 			raise RuntimeError()
+	progress.update(pack.get_context().readfrom_byte)
 	return shadowframe_list
 
-def parse_vmd_ikdispframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdIkdispFrame]:
+def _parse_one_ikdispframe(raw:bytearray) -> vmdstruct.VmdIkdispFrame:
+	# reads one frame starting at the current read position of the packer
+	(f, disp, numbones) = pack.my_unpack(fmt_ikdispframe, raw)
+	ikbones = []
+	for j in range(numbones):
+		ikname_str = pack.my_string_unpack(raw, L=20)
+		enable = pack.my_unpack(fmt_ikframe, raw)
+		ikbones.append(vmdstruct.VmdIkbone(name=ikname_str, enable=enable))
+	return vmdstruct.VmdIkdispFrame(f=f, disp=disp, ikbones=ikbones)
+
+def parse_vmd_ikdispframe(raw:bytearray, moreinfo:bool, progress=core.NULL_PROGRESS) -> List[vmdstruct.VmdIkdispFrame]:
 	ikdispframe_list = []
 	# is there enough file left to read a single number?
-	if (len(raw) - pack.UNPACKER_READFROM_BYTE) < struct.calcsize(fmt_number):
+	if (len(raw) - pack.get_context().readfrom_byte) < struct.calcsize(fmt_number):
 		core.MY_PRINT_FUNC("Warning: expected ikdispframe_ct field but file ended unexpectedly! Assuming 0 ikdispframes and continuing...")
 		return ikdispframe_list
 
@@ -344,13 +436,7 @@ def parse_vmd_ikdispframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdIkd
 	if moreinfo: core.MY_PRINT_FUNC("...# of ik/disp frames      = %d" % ikdispframe_ct)
 	for i in range(ikdispframe_ct):
 		try:
-			(f, disp, numbones) = pack.my_unpack(fmt_ikdispframe, raw)
-			ikbones = []
-			for j in range(numbones):
-				ikname_str = pack.my_string_unpack(raw, L=20)
-				enable = pack.my_unpack(fmt_ikframe, raw)
-				ikbones.append(vmdstruct.VmdIkbone(name=ikname_str, enable=enable))
-			ikdispframe_list.append(vmdstruct.VmdIkdispFrame(f=f, disp=disp, ikbones=ikbones))
+			ikdispframe_list.append(_parse_one_ikdispframe(raw))
 		except Exception as e:
 			core.MY_PRINT_FUNC(e.__class__.__name__, e)
 			core.MY_PRINT_FUNC("frame=",i)
@@ -358,6 +444,7 @@ def parse_vmd_ikdispframe(raw:bytearray, moreinfo:bool) -> List[vmdstruct.VmdIkd
 			core.MY_PRINT_FUNC("section=ikdispframe")
 			core.MY_PRINT_FUNC("Err: something went wrong while parsing, file is probably corrupt/malformed")
 			raise RuntimeError()
+	progress.update(pack.get_context().readfrom_byte)
 	return ikdispframe_list
 
 ########################################################################################################################
@@ -381,80 +468,164 @@ def encode_vmd_header(nice: vmdstruct.VmdHeader, moreinfo:bool) -> bytearray:
 	
 	return output
 
-def encode_vmd_boneframe(nice:List[vmdstruct.VmdBoneFrame], moreinfo:bool) -> bytearray:
-	output = bytearray()
+def _pack_boneframe_interp(interp_x, interp_y, interp_z, interp_r, phys_off: bool) -> bytes:
+	# organize the interpolation curve data into one line: x_ax, y_ax, z_ax, r_ax, x_ay, y_ay, ... r_by
+	interp_list = tuple(v for group in zip(interp_x, interp_y, interp_z, interp_r) for v in group)
+	# physics enable/disable data overwrites the odd missing bytes
+	phys = (99, 15) if phys_off else (0, 0)
+	# do the dumb copy-and-shift thing to rebuild the original 4-line structure of redundant bytes
+	return boneframe_interp_struct.pack(*_BONEFRAME_INTERP_GATHER((*interp_list, 0, *phys)))
+
+def encode_boneframe_interp(frame: vmdstruct.VmdBoneFrame) -> bytes:
+	""" The 64-byte interpolation block (with physics flag) of this frame, exactly as it is written in a VMD. """
+	interp = frame.source_interp()
+	if interp is None:
+		interp = _pack_boneframe_interp(*frame.interp_lists(), frame.phys_off is True)
+	return interp
+
+class VmdRecordCache:
+	"""
+	Pre-encoded bone/morph records, keyed by everything in a frame except its frame number and stored with the frame
+	number zeroed. Emitting a frame whose record is already cached is a copy of its bytes plus a patch of the 4-byte
+	frame number at RECORD_FRAME_OFFSET, so the cost of a record that recurs (a light field that is switched back to,
+	a hold keyframe) doesn't grow with how often it recurs.
+	Pass one instance to several write_vmd() calls to share it between them. The names, rotations and interpolation
+	curves of records that do need encoding are also only encoded once, names are cached by the packer.
+	Each table keeps at most max_records entries and forgets the least recently used ones first, so a VMD where every
+	frame is different doesn't end up stored in here several times over. None means no limit.
+	"""
+	# both bone and morph records start with the 15-byte name followed by the frame number
+	RECORD_FRAME_OFFSET = 15
+	# default limit per table, far more than the distinct records of a normal motion or lighting VMD
+	MAX_RECORDS = 4096
+	# floats are keyed by their bytes, not their value, so 0.0 and -0.0 don't share a record. pos, source quaternions
+	# and morph values are written as float32, so that is all of them that counts. euler angles still get converted.
+	# the two bone layouts have different lengths, so a quaternion key never matches an euler key
+	_POS_QUAT_KEY = struct.Struct("<3f 4f")
+	_POS_EULER_KEY = struct.Struct("<3f 3d")
+	_VAL_KEY = struct.Struct("<f")
+	
+	def __init__(self, max_records: Union[int, None]=MAX_RECORDS):
+		self.max_records = max_records
+		self.boneframes = collections.OrderedDict()
+		self.morphframes = collections.OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self._quats = collections.OrderedDict()
+		self._interps = collections.OrderedDict()
+	
+	@staticmethod
+	def _recall(table: collections.OrderedDict, key):
+		# the value stored for key or None, and mark it as recently used
+		value = table.get(key)
+		if value is not None:
+			table.move_to_end(key)
+		return value
+	
+	def _remember(self, table: collections.OrderedDict, key, value):
+		table[key] = value
+		if self.max_records is not None and len(table) > self.max_records:
+			table.popitem(last=False)
+		return value
+	
+	def boneframe_record(self, frame: vmdstruct.VmdBoneFrame) -> bytes:
+		phys_off = frame.phys_off is True
+		# a frame that still has the quaternion it was read with writes it back as-is, without any trig
+		source_quat = frame.source_quat()
+		if source_quat is None:
+			rot = frame.rot
+			floats_key = self._POS_EULER_KEY.pack(*frame.pos, *rot)
+		else:
+			floats_key = self._POS_QUAT_KEY.pack(*frame.pos, *source_quat)
+		# same for the interp block, which also holds the physics flag
+		source_interp = frame.source_interp()
+		if source_interp is None:
+			interp_x, interp_y, interp_z, interp_r = frame.interp_lists()
+			key = (frame.name, floats_key, phys_off, *interp_x, *interp_y, *interp_z, *interp_r)
+		else:
+			key = (frame.name, floats_key, source_interp)
+		record = self._recall(self.boneframes, key)
+		if record is not None:
+			self.hits += 1
+			return record
+		self.misses += 1
+		if source_quat is not None:
+			W, X, Y, Z = source_quat
+			quat = (X, Y, Z, W)  # repack it in a different XYZW order
+		else:
+			# gotta convert from euler to quaternion!
+			rot_key = floats_key[12:]  # the euler angles without pos
+			quat = self._recall(self._quats, rot_key)
+			if quat is None:
+				W, X, Y, Z = core.euler_to_quaternion(rot)  # w x y z
+				quat = self._remember(self._quats, rot_key, (X, Y, Z, W))  # repack it in a different XYZW order
+		if source_interp is not None:
+			interp = source_interp
+		else:
+			interp_key = (*interp_x, *interp_y, *interp_z, *interp_r, phys_off)
+			interp = self._recall(self._interps, interp_key)
+			if interp is None:
+				interp = self._remember(self._interps, interp_key, _pack_boneframe_interp(
+					interp_x, interp_y, interp_z, interp_r, phys_off))
+		# encode the non-interp, non-phys portion, then the interpolation block behind it
+		record = boneframe_head_struct.pack(pack.my_string_pack(frame.name, L=15), 0, *frame.pos, *quat) + interp
+		return self._remember(self.boneframes, key, record)
+	
+	def morphframe_record(self, frame: vmdstruct.VmdMorphFrame) -> bytes:
+		key = (frame.name, self._VAL_KEY.pack(frame.val))
+		record = self._recall(self.morphframes, key)
+		if record is not None:
+			self.hits += 1
+			return record
+		self.misses += 1
+		record = morphframe_record_struct.pack(pack.my_string_pack(frame.name, L=15), 0, frame.val)
+		return self._remember(self.morphframes, key, record)
+	
+	def add_boneframes(self, frames: List[vmdstruct.VmdBoneFrame]) -> None:
+		""" Encode these frames ahead of time, e.g. the bones of one light field. """
+		for frame in frames: self.boneframe_record(frame)
+	
+	def add_morphframes(self, frames: List[vmdstruct.VmdMorphFrame]) -> None:
+		""" Encode these frames ahead of time, e.g. the morphs of one glow field. """
+		for frame in frames: self.morphframe_record(frame)
+
+
+def _encode_cached_records(nice: list, get_record, record_size: int, section: str) -> bytearray:
+	# every record is the same size, so allocate the whole section at once and fill it in place
+	output = bytearray(frame_number_struct.size + (record_size * len(nice)))
+	frame_number_struct.pack_into(output, 0, len(nice))
+	offset = frame_number_struct.size
+	i = 0
+	try:
+		for i, frame in enumerate(nice):
+			# copy the pre-encoded record, then patch in the real frame number
+			output[offset:offset + record_size] = get_record(frame)
+			frame_number_struct.pack_into(output, offset + VmdRecordCache.RECORD_FRAME_OFFSET, frame.f)
+			offset += record_size
+	except Exception as e:
+		core.MY_PRINT_FUNC(e.__class__.__name__, e)
+		core.MY_PRINT_FUNC("line=", i)
+		core.MY_PRINT_FUNC("section=" + section)
+		core.MY_PRINT_FUNC("Err: something went wrong while synthesizing binary output, probably the wrong type/order of values on a line")
+		raise
+	return output
+
+def encode_vmd_boneframe(nice:List[vmdstruct.VmdBoneFrame], moreinfo:bool, records:VmdRecordCache=None) -> bytearray:
 	#############################
 	# bone frames
 	# first, the number of frames
 	if moreinfo: core.MY_PRINT_FUNC("...# of boneframes          = %d" % len(nice))
-	output += pack.my_pack(fmt_number, len(nice))
-	# then, all the actual frames
-	for i, frame in enumerate(nice):
-		# assemble the boneframe
-		# gotta convert from euler to quaternion!
-		quat = core.euler_to_quaternion(frame.rot)  # w x y z
-		W, X, Y, Z = quat  # expand the quat to its WXYZ components
-		quat = X, Y, Z, W  # repack it in a different XYZW order
-		
-		# then, organize the interpolation curve data into one line
-		x_ax, x_ay, x_bx, x_by = frame.interp_x
-		y_ax, y_ay, y_bx, y_by = frame.interp_y
-		z_ax, z_ay, z_bx, z_by = frame.interp_z
-		r_ax, r_ay, r_bx, r_by = frame.interp_r
-		interp_list = x_ax, y_ax, z_ax, r_ax, x_ay, y_ay, z_ay, r_ay, x_bx, y_bx, z_bx, r_bx, x_by, y_by, z_by, r_by
-		
-		try:
-			output += pack.my_string_pack(frame.name, L=15)
-			# now encode/pack/append the non-interp, non-phys portion
-			output += pack.my_pack(fmt_boneframe_no_interpcurve, [frame.f, *frame.pos, *quat])
-			# pack this one line of interpolation data, DO NOT APPEND ONTO OUTPUT YET!
-			interp = pack.my_pack(fmt_boneframe_interpcurve_oneline, interp_list)
-		except Exception as e:
-			core.MY_PRINT_FUNC(e.__class__.__name__, e)
-			core.MY_PRINT_FUNC("line=", i)
-			core.MY_PRINT_FUNC("section=boneframe")
-			core.MY_PRINT_FUNC("Err: something went wrong while synthesizing binary output, probably the wrong type/order of values on a line")
-			raise
-		# do the dumb copy-and-shift thing to rebuild the original 4-line structure of redundant bytes
-		interp += interp[1:] + bytes(1) + \
-				  interp[2:] + bytes(2) + \
-				  interp[3:] + bytes(3)
-		# now overwrite the odd missing bytes with physics enable/disable data
-		if frame.phys_off is True:
-			interp[2] = 99
-			interp[3] = 15
-		else:
-			interp[2] = 0
-			interp[3] = 0
-		# append the interpolation data onto the real output
-		output += interp
-		# progress thing just because
-		core.print_progress_oneline(ENCODE_PERCENT_BONE * i / len(nice))
-
-	return output
+	# a VMD only has a handful of distinct records, so each one is only encoded once
+	if records is None: records = VmdRecordCache()
+	return _encode_cached_records(nice, records.boneframe_record, boneframe_record_struct.size, "boneframe")
 
-def encode_vmd_morphframe(nice:List[vmdstruct.VmdMorphFrame], moreinfo:bool) -> bytearray:
-	output = bytearray()
+def encode_vmd_morphframe(nice:List[vmdstruct.VmdMorphFrame], moreinfo:bool, records:VmdRecordCache=None) -> bytearray:
 	###########################################
 	# morph frames
 	# first, the number of frames
 	if moreinfo: core.MY_PRINT_FUNC("...# of morphframes         = %d" % len(nice))
-	output += pack.my_pack(fmt_number, len(nice))
-	# then, all the actual frames
-	for i, frame in enumerate(nice):
-		try:
-			output += pack.my_string_pack(frame.name, L=15)
-			output += pack.my_pack(fmt_morphframe, [frame.f, frame.val])
-		except Exception as e:
-			core.MY_PRINT_FUNC(e.__class__.__name__, e)
-			core.MY_PRINT_FUNC("line=", i)
-			core.MY_PRINT_FUNC("section=morphframe")
-			core.MY_PRINT_FUNC("Err: something went wrong while synthesizing binary output, probably the wrong type/order of values on a line")
-			raise
-
-		# print a progress update every so often just because
-		core.print_progress_oneline(ENCODE_PERCENT_BONE + (ENCODE_PERCENT_MORPH * i / len(nice)))
-	return output
+	if records is None: records = VmdRecordCache()
+	return _encode_cached_records(nice, records.morphframe_record, morphframe_record_struct.size, "morphframe")
 
 def encode_vmd_camframe(nice:List[vmdstruct.VmdCamFrame], moreinfo:bool) -> bytearray:
 	output = bytearray()
@@ -466,32 +637,35 @@ def encode_vmd_camframe(nice:List[vmdstruct.VmdCamFrame], moreinfo:bool) -> byte
 	# then, all the actual frames
 	for i, frame in enumerate(nice):
 		xyz_rads = [math.radians(j) for j in frame.rot]  # degrees to radians
-		# unpack all the interp lists to named fields
-		x_ax, x_ay, x_bx, x_by = frame.interp_x
-		y_ax, y_ay, y_bx, y_by = frame.interp_y
-		z_ax, z_ay, z_bx, z_by = frame.interp_z
-		r_ax, r_ay, r_bx, r_by = frame.interp_r
-		dist_ax, dist_ay, dist_bx, dist_by = frame.interp_dist
-		fov_ax, fov_ay, fov_bx, fov_by = frame.interp_fov
-		# reassemble them in a very specific order
-		interp_list = [x_ax, x_bx, x_ay, x_by,
-					   y_ax, y_bx, y_ay, y_by,
-					   z_ax, z_bx, z_ay, z_by,
-					   r_ax, r_bx, r_ay, r_by,
-					   dist_ax, dist_bx, dist_ay, dist_by,
-					   fov_ax, fov_bx, fov_ay, fov_by]
 		try:
-			packme = [frame.f, frame.dist, *frame.pos, *xyz_rads, *interp_list, frame.fov, frame.perspective]
-			output += pack.my_pack(fmt_camframe, packme)
+			# a frame that still has the interp block it was read with writes it back as-is
+			interp = frame.source_interp()
+			if interp is None:
+				# unpack all the interp lists to named fields
+				interp_x, interp_y, interp_z, interp_r, interp_dist, interp_fov = frame.interp_lists()
+				x_ax, x_ay, x_bx, x_by = interp_x
+				y_ax, y_ay, y_bx, y_by = interp_y
+				z_ax, z_ay, z_bx, z_by = interp_z
+				r_ax, r_ay, r_bx, r_by = interp_r
+				dist_ax, dist_ay, dist_bx, dist_by = interp_dist
+				fov_ax, fov_ay, fov_bx, fov_by = interp_fov
+				# reassemble them in a very specific order
+				interp_list = [x_ax, x_bx, x_ay, x_by,
+							   y_ax, y_bx, y_ay, y_by,
+							   z_ax, z_bx, z_ay, z_by,
+							   r_ax, r_bx, r_ay, r_by,
+							   dist_ax, dist_bx, dist_ay, dist_by,
+							   fov_ax, fov_bx, fov_ay, fov_by]
+				interp = pack.my_pack(fmt_camframe_interpcurve, interp_list)
+			output += pack.my_pack(fmt_camframe_no_interpcurve, [frame.f, frame.dist, *frame.pos, *xyz_rads])
+			output += interp
+			output += pack.my_pack(fmt_camframe_tail, [frame.fov, frame.perspective])
 		except Exception as e:
 			core.MY_PRINT_FUNC(e.__class__.__name__, e)
 			core.MY_PRINT_FUNC("line=", i)
 			core.MY_PRINT_FUNC("section=camframe")
 			core.MY_PRINT_FUNC("Err: something went wrong while synthesizing binary output, probably the wrong type/order of values on a line")
 			raise RuntimeError()
-		
-		# progress thing just because
-		core.print_progress_oneline(i / len(nice))
 	return output
 
 def encode_vmd_lightframe(nice:List[vmdstruct.VmdLightFrame], moreinfo:bool) -> bytearray:
@@ -567,16 +741,86 @@ def encode_vmd_ikdispframe(nice:List[vmdstruct.VmdIkdispFrame], moreinfo:bool) -
 # primary functions: read_vmd() and write_vmd()
 ########################################################################################################################
 
-def read_vmd(vmd_filename: str, moreinfo=False) -> vmdstruct.Vmd:
+# sort keys: bones & morphs are primarily sorted by NAME, with FRAME# as tiebreaker. everything else only by FRAME#.
+# NOTE: two stable sorts on plain keys (frame#, then name) are ~4x faster than one sort on a (name, frame#) tuple key,
+# because python's sort has fast paths for comparing plain strs/ints but not tuples. attrgetter avoids the lambda calls
+NAME_KEY = operator.attrgetter("name")
+FRAME_KEY = operator.attrgetter("f")
+
+def _sort_name_frame(frames: list) -> None:
+	frames.sort(key=FRAME_KEY)  # frame#
+	frames.sort(key=NAME_KEY)  # name, the second sort is the primary one
+
+def _sort_vmd_frames(vmd: vmdstruct.Vmd) -> None:
+	# sort all the frame lists in place. already sorted stretches (like the frames of one track) are found and merged
+	# by the sort itself, so mostly sorted input is cheap
+	_sort_name_frame(vmd.boneframes)
+	_sort_name_frame(vmd.morphframes)
+	vmd.camframes.sort(key=FRAME_KEY)
+	vmd.lightframes.sort(key=FRAME_KEY)
+	vmd.shadowframes.sort(key=FRAME_KEY)
+	vmd.ikdispframes.sort(key=FRAME_KEY)
+	# so write_vmd() doesn't sort them all over again
+	vmd.frames_sorted = True
+
+def _sorted_vmd(vmd: vmdstruct.Vmd) -> vmdstruct.Vmd:
+	# a Vmd with sorted copies of the frame lists, the lists of the given one aren't touched
+	sorted_vmd = vmdstruct.Vmd(vmd.header, list(vmd.boneframes), list(vmd.morphframes), list(vmd.camframes),
+							   list(vmd.lightframes), list(vmd.shadowframes), list(vmd.ikdispframes))
+	_sort_vmd_frames(sorted_vmd)
+	return sorted_vmd
+
+def join_track_runs(runs: Dict[str, list]) -> list:
+	"""
+	Join the frames of each track (bone/morph name) into one list in the same order write_vmd() would sort them in,
+	for code that builds its frames track by track. Runs that are already in frame order, as they usually are, are
+	only checked, not sorted, so this is O(n) plus sorting the names.
+	
+	:param runs: dict of name -> list of VmdBoneFrame or VmdMorphFrame with that name
+	:return: one list of all the frames, sorted by name and then frame number
+	"""
+	frames = []
+	for name in sorted(runs):
+		run = runs[name]
+		if any(a.f > b.f for a, b in itertools.pairwise(run)):
+			run = sorted(run, key=FRAME_KEY)
+		frames.extend(run)
+	return frames
+
+# parse function of every section, in file order
+_SECTION_PARSERS = {
+	"boneframes": parse_vmd_boneframe,
+	"morphframes": parse_vmd_morphframe,
+	"camframes": parse_vmd_camframe,
+	"lightframes": parse_vmd_lightframe,
+	"shadowframes": parse_vmd_shadowframe,
+	"ikdispframes": parse_vmd_ikdispframe,
+}
+
+def _parse_section(section: str, raw: bytearray, moreinfo: bool, progress) -> list:
+	# parse one section at the current read position, timed and counted for the run metrics
+	with core.metrics_stage("vmd.read." + section):
+		frames = _SECTION_PARSERS[section](raw, moreinfo, progress)
+	core.metrics_add("vmd.read.%s.frames" % section, len(frames))
+	return frames
+
+def read_vmd(vmd_filename: str, moreinfo=False, sections: Iterable[str] = None) -> vmdstruct.Vmd:
 	vmd_filename_clean = core.filepath_splitdir(vmd_filename)[1]
 	# creates object 	(header, boneframe_list, morphframe_list, camframe_list, lightframe_list, shadowframe_list, ikdispframe_list)
 	# assumes the calling function already verified correct file extension
+	# if sections is given (names like "morphframes", see VMD_RECORD_SIZES) only those sections are parsed and the
+	# others are left empty. the start of each section is computed from the counts, the skipped frames aren't touched.
+	if sections is not None:
+		sections = set(sections)
+		unknown = sections.difference(VMD_RECORD_SIZES)
+		if unknown:
+			raise ValueError("unknown VMD section(s) %s, must be from %s" % (sorted(unknown), list(VMD_RECORD_SIZES)))
 	core.MY_PRINT_FUNC("Begin reading VMD file '%s'" % vmd_filename_clean)
-	vmd_bytes = io.read_binfile_to_bytes(vmd_filename)
+	with core.metrics_stage("vmd.read.file"):
+		vmd_bytes = io.read_binfile_to_bytes(vmd_filename)
+	core.metrics_add("vmd.read.bytes", len(vmd_bytes))
 	core.MY_PRINT_FUNC("...total size   = %s" % core.prettyprint_file_size(len(vmd_bytes)))
 	core.MY_PRINT_FUNC("Begin parsing VMD file '%s'" % vmd_filename_clean)
-	pack.reset_unpack()
-	pack.set_encoding("shift_jis")
 	
 	# !!!! this does eliminate all the garbage data MMD used to pack strings so this isnt 100% reversable !!!
 	# read the bytes object and return all the data from teh VMD broken up into a list of lists
@@ -584,20 +828,30 @@ def read_vmd(vmd_filename: str, moreinfo=False) -> vmdstruct.Vmd:
 	# (quaternion to euler, radians to degrees, floats to ints, etc)
 	# also generate the bonedict and morphdict
 	
-	core.print_progress_oneline(0)
-	A = parse_vmd_header(vmd_bytes, moreinfo)
-	B = parse_vmd_boneframe(vmd_bytes, moreinfo)
-	C = parse_vmd_morphframe(vmd_bytes, moreinfo)
-	D = parse_vmd_camframe(vmd_bytes, moreinfo)
-	E = parse_vmd_lightframe(vmd_bytes, moreinfo)
-	F = parse_vmd_shadowframe(vmd_bytes, moreinfo)
-	G = parse_vmd_ikdispframe(vmd_bytes, moreinfo)
-	if moreinfo: pack.print_failed_decodes()
-	
-	bytes_remain = len(vmd_bytes) - pack.UNPACKER_READFROM_BYTE
-	if bytes_remain != 0:
+	progress = core.progress_reporter(len(vmd_bytes))
+	# a fresh read position & decode stats for this file, so other threads can read other files at the same time
+	with pack.PackerContext("shift_jis") as ctx:
+		A = parse_vmd_header(vmd_bytes, moreinfo)
+		if sections is None:
+			frames = [_parse_section(section, vmd_bytes, moreinfo, progress) for section in _SECTION_PARSERS]
+		else:
+			frames = {section: [] for section in _SECTION_PARSERS}
+			wanted = [section for section in _SECTION_PARSERS if section in sections]
+			walk = _walk_vmd_sections(vmd_bytes, ctx.readfrom_byte, wanted[-1]) if wanted else ()
+			for section, count_pos, offsets in walk:
+				if section in sections:
+					# jump to the count field of this section and parse it like normal
+					ctx.readfrom_byte = count_pos
+					frames[section] = _parse_section(section, vmd_bytes, moreinfo, progress)
+			frames = list(frames.values())
+		if moreinfo: pack.print_failed_decodes()
+	B, C, D, E, F, G = frames
+	
+	bytes_remain = len(vmd_bytes) - ctx.readfrom_byte
+	# only check the tail if everything was actually parsed
+	if sections is None and bytes_remain != 0:
 		# padding with my SIGNATURE is acceptable, anything else is strange
-		leftover = vmd_bytes[pack.UNPACKER_READFROM_BYTE:]
+		leftover = vmd_bytes[ctx.readfrom_byte:]
 		if leftover == bytes(SIGNATURE, encoding="shift_jis"):
 			core.MY_PRINT_FUNC("...note: this VMD file was previously modified with this tool!")
 		else:
@@ -610,75 +864,357 @@ def read_vmd(vmd_filename: str, moreinfo=False) -> vmdstruct.Vmd:
 	vmd = vmdstruct.Vmd(A, B, C, D, E, F, G)
 	# this is where sorting happens, if it happens
 	if GUARANTEE_FRAMES_SORTED:
-		# bones & morphs: primarily sorted by NAME, with FRAME# as tiebreaker. the second sort is the primary one.
-		vmd.boneframes.sort(key=lambda x: x.f)  # frame#
-		vmd.boneframes.sort(key=lambda x: x.name)  # name
-		vmd.morphframes.sort(key=lambda x: x.f)
-		vmd.morphframes.sort(key=lambda x: x.name)
-		# all of these only sort by frame number.
-		vmd.camframes.sort(key=lambda x: x.f)  # frame#
-		vmd.lightframes.sort(key=lambda x: x.f)
-		vmd.shadowframes.sort(key=lambda x: x.f)
-		vmd.ikdispframes.sort(key=lambda x: x.f)
+		with core.metrics_stage("vmd.read.sort"):
+			_sort_vmd_frames(vmd)
 	return vmd
 
-def write_vmd(vmd_filename: str, vmd: vmdstruct.Vmd, moreinfo=False):
+
+class VmdFrameView(Sequence):
+	"""
+	Read-only sequence of the frames of one section of a VMD file, decoded from the file bytes only when an item is
+	accessed. Nothing is cached, every access decodes again. Slicing gives another view without decoding anything.
+	names() and frame_numbers() read only those fields, without building any frame objects.
+	Returned by read_vmd_lazy(), see there.
+	"""
+	def __init__(self, raw: memoryview, section: str, offsets: Sequence):
+		self._raw = raw
+		self.section = section
+		# start of every record of this view within raw, a range for fixed-size sections
+		self._offsets = offsets
+		self._decode = _LAZY_DECODERS[section]
+	
+	def __len__(self) -> int:
+		return len(self._offsets)
+	
+	def __getitem__(self, idx):
+		if isinstance(idx, slice):
+			return VmdFrameView(self._raw, self.section, self._offsets[idx])
+		offset = self._offsets[idx]
+		with pack.PackerContext("shift_jis"):
+			return self._decode(self._raw, offset)
+	
+	def __iter__(self):
+		for offset in self._offsets:
+			# the context must not stay current while the caller runs, so it only wraps the decoding
+			with pack.PackerContext("shift_jis"):
+				frame = self._decode(self._raw, offset)
+			yield frame
+	
+	def names(self) -> List[str]:
+		""" Names of all bone/morph frames in this view, in order. """
+		if self.section not in ("boneframes", "morphframes"):
+			raise TypeError("ERR: %s don't have names" % self.section)
+		with pack.PackerContext("shift_jis"):
+			return [pack.decode_fixed_string(self._raw[offset:offset + 15]) for offset in self._offsets]
+	
+	def frame_numbers(self) -> List[int]:
+		""" Frame numbers of all frames in this view, in order. """
+		# bone & morph records start with the 15-byte name, all others with the frame number
+		skip = VmdRecordCache.RECORD_FRAME_OFFSET if self.section in ("boneframes", "morphframes") else 0
+		return [frame_number_struct.unpack_from(self._raw, offset + skip)[0] for offset in self._offsets]
+
+
+def _lazy_fixed_record(record_struct: struct.Struct, raw: memoryview, offset: int) -> list:
+	# unpack one record at the given offset and take out NaN/INF just like my_unpack does
+	return pack.fix_nan_inf(list(record_struct.unpack_from(raw, offset)), offset + record_struct.size)
+
+def _lazy_ikdispframe(raw: memoryview, offset: int) -> vmdstruct.VmdIkdispFrame:
+	pack.get_context().readfrom_byte = offset
+	return _parse_one_ikdispframe(raw)
+
+# how VmdFrameView decodes one record of each section, called with (raw, offset) inside a shift_jis PackerContext
+_LAZY_DECODERS = {
+	"boneframes": lambda raw, offset: _boneframe_from_record(
+		boneframe_record_struct.unpack_from(raw, offset), offset + boneframe_record_struct.size),
+	"morphframes": lambda raw, offset: _morphframe_from_record(
+		morphframe_record_struct.unpack_from(raw, offset), offset + morphframe_record_struct.size),
+	"camframes": lambda raw, offset: _camframe_from_record(_lazy_fixed_record(camframe_record_struct, raw, offset),
+		bytes(raw[offset + _CAMFRAME_INTERP_START:offset + _CAMFRAME_INTERP_END])),
+	"lightframes": lambda raw, offset: _lightframe_from_record(_lazy_fixed_record(lightframe_record_struct, raw, offset)),
+	"shadowframes": lambda raw, offset: _shadowframe_from_record(_lazy_fixed_record(shadowframe_record_struct, raw, offset)),
+	"ikdispframes": _lazy_ikdispframe,
+}
+
+
+def index_vmd_sections(raw: bytearray) -> Tuple[vmdstruct.VmdHeader, Dict[str, Sequence]]:
+	"""
+	Find where every record of every section of a VMD starts, without decoding any frames. All sections except ikdisp
+	have fixed-size records, so the start of each section follows from the counts in front of it. The ikdisp records
+	are only walked over. Sections that a truncated file doesn't have are empty, same as in read_vmd().
+	
+	:param raw: the bytes of the whole VMD file
+	:return: the header, and a dict of section name -> offsets of its records (a range, or a list for ikdispframes)
+	"""
+	with pack.PackerContext("shift_jis") as ctx:
+		header = parse_vmd_header(raw, False)
+		pos = ctx.readfrom_byte
+	sections = {section: offsets for section, count_pos, offsets in _walk_vmd_sections(raw, pos)}
+	return header, sections
+
+def _walk_vmd_sections(raw: bytearray, pos: int, last_section: str = None):
+	# yield (section, position of its count field, offsets of its records) for every section in file order,
+	# starting from pos right after the header. stop after last_section if given so the rest isn't walked.
+	for section, record_size in VMD_RECORD_SIZES.items():
+		count_pos = pos
+		if len(raw) - pos < frame_number_struct.size:
+			# file ended early, the rest of the sections are missing
+			count = 0
+		else:
+			count = frame_number_struct.unpack_from(raw, pos)[0]
+			pos += frame_number_struct.size
+		try:
+			if record_size is None:
+				offsets = []
+				for i in range(count):
+					offsets.append(pos)
+					numbones = ikdispframe_head_struct.unpack_from(raw, pos)[2]
+					pos += ikdispframe_head_struct.size + (numbones * ikbone_record_struct.size)
+			else:
+				offsets = range(pos, pos + (count * record_size), record_size)
+				pos += count * record_size
+			if pos > len(raw):
+				raise struct.error("section extends past the end of the file")
+		except struct.error as e:
+			core.MY_PRINT_FUNC(e.__class__.__name__, e)
+			core.MY_PRINT_FUNC("totalframes=", count)
+			core.MY_PRINT_FUNC("section=" + section)
+			core.MY_PRINT_FUNC("Err: something went wrong while parsing, file is probably corrupt/malformed")
+			raise RuntimeError("file ended in the middle of the %s section" % section)
+		yield section, count_pos, offsets
+		if section == last_section:
+			return
+
+
+class LazyVmd:
+	"""
+	A VMD whose sections are VmdFrameViews over the file bytes instead of lists of frames, see read_vmd_lazy().
+	Unlike read_vmd(), the frames are in file order, they are not sorted.
+	"""
+	def __init__(self, header: vmdstruct.VmdHeader, raw: memoryview, sections: Dict[str, Sequence]):
+		self.header = header
+		self.boneframes = VmdFrameView(raw, "boneframes", sections["boneframes"])
+		self.morphframes = VmdFrameView(raw, "morphframes", sections["morphframes"])
+		self.camframes = VmdFrameView(raw, "camframes", sections["camframes"])
+		self.lightframes = VmdFrameView(raw, "lightframes", sections["lightframes"])
+		self.shadowframes = VmdFrameView(raw, "shadowframes", sections["shadowframes"])
+		self.ikdispframes = VmdFrameView(raw, "ikdispframes", sections["ikdispframes"])
+	
+	def to_vmd(self) -> vmdstruct.Vmd:
+		""" Decode everything into a normal Vmd object, the same one read_vmd() would return. """
+		vmd = vmdstruct.Vmd(self.header, list(self.boneframes), list(self.morphframes), list(self.camframes),
+							list(self.lightframes), list(self.shadowframes), list(self.ikdispframes))
+		if GUARANTEE_FRAMES_SORTED:
+			_sort_vmd_frames(vmd)
+		return vmd
+
+def read_vmd_lazy(vmd_filename: str, moreinfo=False) -> LazyVmd:
+	"""
+	Read a VMD file without decoding its frames. Only the header is parsed and the start of every section is indexed,
+	the sections are sequence-like views that decode each frame from the file bytes when it is accessed. Much faster
+	and smaller than read_vmd() for tools that only look at some of the frames or only at names/frame numbers.
+	
+	:param vmd_filename: VMD file to read
+	:param moreinfo: print the frame count of each section
+	:return: LazyVmd with header and boneframes, morphframes, camframes, lightframes, shadowframes, ikdispframes views
+	"""
+	vmd_filename_clean = core.filepath_splitdir(vmd_filename)[1]
+	core.MY_PRINT_FUNC("Begin reading VMD file '%s'" % vmd_filename_clean)
+	vmd_bytes = io.read_binfile_to_bytes(vmd_filename)
+	core.MY_PRINT_FUNC("...total size   = %s" % core.prettyprint_file_size(len(vmd_bytes)))
+	header, sections = index_vmd_sections(vmd_bytes)
+	if moreinfo:
+		core.MY_PRINT_FUNC("...model name   = JP:'%s'" % header.modelname)
+		for section, offsets in sections.items():
+			core.MY_PRINT_FUNC("...# of %-20s= %d" % (section, len(offsets)))
+	return LazyVmd(header, memoryview(vmd_bytes), sections)
+
+class VmdStreamWriter:
+	"""
+	Write a VMD to disk one section at a time, without ever holding the whole file in memory. Each write_*() call takes
+	any iterable of frames (a list, a generator...), encodes it CHUNK_SIZE frames at a time, and afterwards seeks back
+	to fill in the frame count in front of the section. Sections must be written in file order, any section that is
+	skipped is written empty. With validate=True (the default) each chunk is checked with validate_frames() before it
+	is encoded. Unlike write_vmd(), frames are not sorted, they are written in the order they arrive (MMD doesn't need
+	them sorted). The file is written under a temp name and only replaces vmd_filename once close() succeeds.
+	
+	with VmdStreamWriter("out.vmd", vmdstruct.VmdHeader(2, "model")) as writer:
+		writer.write_boneframes(some_generator())
+		writer.write_morphframes(some_list)
+	"""
+	# frames per encoded chunk, bounds the memory used no matter how big the section is
+	CHUNK_SIZE = 0x10000
+	SECTIONS = ("boneframes", "morphframes", "camframes", "lightframes", "shadowframes", "ikdispframes")
+	
+	def __init__(self, vmd_filename: str, header: vmdstruct.VmdHeader, moreinfo=False, records: VmdRecordCache=None,
+				 validate=True, progress=None):
+		self.vmd_filename = vmd_filename
+		self.moreinfo = moreinfo
+		self.records = VmdRecordCache() if records is None else records
+		self.validate = validate
+		# updated with the number of bytes written after every chunk, the total size usually isn't known up front
+		self.progress = core.progress_reporter() if progress is None else progress
+		# number of frames written in each section so far, and the size of the file once it is closed
+		self.counts = {}
+		self.total_size = 0
+		self._next_section = 0
+		self._context = pack.PackerContext("shift_jis")
+		if validate: header.validate()
+		# frames are written to a temp file next to the destination, close() moves it into place
+		self._file = io.open_binfile_for_writing(vmd_filename, temporary=True)
+		try:
+			with self._context:
+				self._file.write(encode_vmd_header(header, moreinfo))
+		except Exception:
+			# __exit__ won't run if __init__ fails, so clean up the temp file here
+			self._file.close()
+			os.remove(self._file.name)
+			self._file = None
+			raise
+	
+	def _write_section(self, section: str, frames: Iterable, frame_type: type, encode) -> int:
+		idx = self.SECTIONS.index(section)
+		if idx < self._next_section:
+			raise RuntimeError("ERR: VMD section '%s' was already written, sections must be written in file order" % section)
+		# sections that were skipped over are written empty
+		for skipped in self.SECTIONS[self._next_section:idx]:
+			self._file.write(frame_number_struct.pack(0))
+			self.counts[skipped] = 0
+		self._next_section = idx + 1
+		# write a placeholder count, the real one isn't known until the iterator runs out
+		count_pos = self._file.tell()
+		self._file.write(frame_number_struct.pack(0))
+		count = 0
+		frames = iter(frames)
+		with self._context, core.metrics_stage("vmd.write." + section):
+			while True:
+				chunk = list(itertools.islice(frames, self.CHUNK_SIZE))
+				if not chunk: break
+				if self.validate:
+					vmdstruct.validate_frames(chunk, frame_type, index_offset=count)
+				# the encoders put the count of the chunk in front, skip it
+				self._file.write(memoryview(encode(chunk))[frame_number_struct.size:])
+				count += len(chunk)
+				self.progress.update(self._file.tell())
+		# go back and fill in the real count, then carry on at the end
+		self._file.seek(count_pos)
+		self._file.write(frame_number_struct.pack(count))
+		self._file.seek(0, os.SEEK_END)
+		self.counts[section] = count
+		core.metrics_add("vmd.write.%s.frames" % section, count)
+		if self.moreinfo: core.MY_PRINT_FUNC("...# of %-20s= %d" % (section, count))
+		return count
+	
+	def write_boneframes(self, frames: Iterable[vmdstruct.VmdBoneFrame]) -> int:
+		return self._write_section("boneframes", frames, vmdstruct.VmdBoneFrame,
+								   lambda chunk: encode_vmd_boneframe(chunk, False, self.records))
+	def write_morphframes(self, frames: Iterable[vmdstruct.VmdMorphFrame]) -> int:
+		return self._write_section("morphframes", frames, vmdstruct.VmdMorphFrame,
+								   lambda chunk: encode_vmd_morphframe(chunk, False, self.records))
+	def write_camframes(self, frames: Iterable[vmdstruct.VmdCamFrame]) -> int:
+		return self._write_section("camframes", frames, vmdstruct.VmdCamFrame,
+								   lambda chunk: encode_vmd_camframe(chunk, False))
+	def write_lightframes(self, frames: Iterable[vmdstruct.VmdLightFrame]) -> int:
+		return self._write_section("lightframes", frames, vmdstruct.VmdLightFrame,
+								   lambda chunk: encode_vmd_lightframe(chunk, False))
+	def write_shadowframes(self, frames: Iterable[vmdstruct.VmdShadowFrame]) -> int:
+		return self._write_section("shadowframes", frames, vmdstruct.VmdShadowFrame,
+								   lambda chunk: encode_vmd_shadowframe(chunk, False))
+	def write_ikdispframes(self, frames: Iterable[vmdstruct.VmdIkdispFrame]) -> int:
+		return self._write_section("ikdispframes", frames, vmdstruct.VmdIkdispFrame,
+								   lambda chunk: encode_vmd_ikdispframe(chunk, False))
+	
+	def close(self) -> None:
+		""" Write any sections that are still missing as empty, add the signature, and close the file. """
+		if self._file is None: return
+		for skipped in self.SECTIONS[self._next_section:]:
+			self._file.write(frame_number_struct.pack(0))
+			self.counts[skipped] = 0
+		self._next_section = len(self.SECTIONS)
+		# add a cheeky little binary stamp just to prove that people actually used my tool :)
+		if APPEND_SIGNATURE:
+			# signature to prove that this file was created with this tool
+			self._file.write(bytes(SIGNATURE, encoding="shift_jis"))
+		self.total_size = self._file.tell()
+		self._file.close()
+		os.replace(self._file.name, self.vmd_filename)
+		self._file = None
+	
+	def __enter__(self):
+		return self
+	
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		if exc_type is None:
+			self.close()
+		elif self._file is not None:
+			# don't leave a half-written file with wrong counts lying around, whatever was at the destination before
+			# is left untouched
+			self._file.close()
+			os.remove(self._file.name)
+			self._file = None
+
+def warn_long_names(vmd: vmdstruct.Vmd) -> int:
+	"""
+	Print a warning for every distinct bone/morph name that is longer than the 15 bytes a VMD can hold once it is
+	encoded, with the index of the first frame that uses it. Those names get cut off when written. This is only a
+	warning and not part of validate_bulk(), MMD happily loads the cut-off names.
+	
+	:param vmd: Vmd object
+	:return: number of names that are too long
+	"""
+	toolong = 0
+	with pack.PackerContext("shift_jis"):
+		for section, frames in (("boneframes", vmd.boneframes), ("morphframes", vmd.morphframes)):
+			names = list(map(NAME_KEY, frames))
+			for name in sorted(set(names)):
+				if len(pack.encode_string_with_escape(name)) > 15:
+					core.MY_PRINT_FUNC("Warning: name '%s' is longer than 15 bytes, it will be cut off (first used at %s index %d)"
+									   % (name, section, names.index(name)))
+					toolong += 1
+	return toolong
+
+def write_vmd(vmd_filename: str, vmd: vmdstruct.Vmd, moreinfo=False, records: VmdRecordCache=None, validate=True):
 	vmd_filename_clean = core.filepath_splitdir(vmd_filename)[1]
 	# recives object 	(header, boneframe_list, morphframe_list, camframe_list, lightframe_list, shadowframe_list, ikdispframe_list)
+	# optionally recieves a VmdRecordCache of pre-encoded bone/morph records to reuse
+	# validate=False is for callers that built every frame themselves and know they are good, it skips the checks
 	
 	# first, verify that the data is valid before trying to write
-	vmd.validate()
+	if validate:
+		with core.metrics_stage("vmd.write.validate"):
+			vmd.validate_bulk()
+			warn_long_names(vmd)
 	
 	# assumes the calling function already verified correct file extension
 	core.MY_PRINT_FUNC("Begin encoding VMD file '%s'" % vmd_filename_clean)
-	pack.set_encoding("shift_jis")
 	
-	core.print_progress_oneline(0)
-	# this is where sorting happens, if it happens
-	if GUARANTEE_FRAMES_SORTED:
-		# bones & morphs: primarily sorted by NAME, with FRAME# as tiebreaker. the second sort is the primary one.
-		vmd.boneframes.sort(key=lambda x: x.f)  # frame#
-		vmd.boneframes.sort(key=lambda x: x.name)  # name
-		vmd.morphframes.sort(key=lambda x: x.f)
-		vmd.morphframes.sort(key=lambda x: x.name)
-		# all of these only sort by frame number.
-		vmd.camframes.sort(key=lambda x: x.f)  # frame#
-		vmd.lightframes.sort(key=lambda x: x.f)
-		vmd.shadowframes.sort(key=lambda x: x.f)
-		vmd.ikdispframes.sort(key=lambda x: x.f)
-	
-	global ENCODE_PERCENT_BONE
-	global ENCODE_PERCENT_MORPH
-	# cam is not included cuz a file contains only bone+morph OR cam
-	total_bone = len(vmd.boneframes) * ENCODE_FACTOR_BONE
-	total_morph = len(vmd.morphframes) * ENCODE_FACTOR_MORPH
-	ALLENCODE = total_bone + total_morph
-	if ALLENCODE == 0: ALLENCODE = 1  # just a bandaid to avoid zero-div error when writing empty VMD
-	ENCODE_PERCENT_BONE = total_bone / ALLENCODE
-	ENCODE_PERCENT_MORPH = total_morph / ALLENCODE
+	# this is where sorting happens, if it happens. the caller's lists are left as they are, sorted copies are written
+	# instead. skipped if whoever made the vmd says it is already sorted
+	if GUARANTEE_FRAMES_SORTED and not vmd.frames_sorted:
+		with core.metrics_stage("vmd.write.sort"):
+			vmd = _sorted_vmd(vmd)
+	
+	# progress goes by bytes written, every section but ikdisp has a fixed record size so the total is easy to estimate
+	total_size = sum(len(getattr(vmd, section)) * size for section, size in VMD_RECORD_SIZES.items() if size)
+	progress = core.progress_reporter(total_size or None)
 	
 	# arg "vmd" is the same structure created by "parse_vmd()"
 	# assume the object is perfect, no sanity-checking needed, it will all be done when parsing the text input
-	output_bytes = bytearray()
-	
-	output_bytes += encode_vmd_header(vmd.header, moreinfo)
-	output_bytes += encode_vmd_boneframe(vmd.boneframes, moreinfo)
-	output_bytes += encode_vmd_morphframe(vmd.morphframes, moreinfo)
-	output_bytes += encode_vmd_camframe(vmd.camframes, moreinfo)
-	output_bytes += encode_vmd_lightframe(vmd.lightframes, moreinfo)
-	output_bytes += encode_vmd_shadowframe(vmd.shadowframes, moreinfo)
-	output_bytes += encode_vmd_ikdispframe(vmd.ikdispframes, moreinfo)
-	
-	# done encoding!!
-	
-	# add a cheeky little binary stamp just to prove that people actually used my tool :)
-	if APPEND_SIGNATURE:
-		# signature to prove that this file was created with this tool
-		output_bytes += bytes(SIGNATURE, encoding="shift_jis")
-	
+	# the sections are encoded & written a chunk at a time, so the whole file never needs to be in memory at once
 	core.MY_PRINT_FUNC("Begin writing VMD file '%s'" % vmd_filename_clean)
-	core.MY_PRINT_FUNC("...total size   = %s" % core.prettyprint_file_size(len(output_bytes)))
-	io.write_bytes_to_binfile(vmd_filename, output_bytes)
+	# the record cache may be shared with other writes, only what this one adds goes into the metrics
+	record_hits, record_misses = (0, 0) if records is None else (records.hits, records.misses)
+	with VmdStreamWriter(vmd_filename, vmd.header, moreinfo=moreinfo, records=records, validate=False,
+						 progress=progress) as writer:
+		writer.write_boneframes(vmd.boneframes)
+		writer.write_morphframes(vmd.morphframes)
+		writer.write_camframes(vmd.camframes)
+		writer.write_lightframes(vmd.lightframes)
+		writer.write_shadowframes(vmd.shadowframes)
+		writer.write_ikdispframes(vmd.ikdispframes)
+	core.metrics_add("vmd.write.bytes", writer.total_size)
+	core.metrics_add("vmd.record_cache.hits", writer.records.hits - record_hits)
+	core.metrics_add("vmd.record_cache.misses", writer.records.misses - record_misses)
+	core.MY_PRINT_FUNC("...total size   = %s" % core.prettyprint_file_size(writer.total_size))
 	core.MY_PRINT_FUNC("Done writing VMD file '%s'" % vmd_filename_clean)
 	# done with everything!
 	return
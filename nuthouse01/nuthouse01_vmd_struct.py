@@ -1,9 +1,12 @@
 import abc
 import copy
 import enum
+import functools
+import itertools
+import struct
 import sys
 import traceback
-from typing import List, Union
+from typing import List, Sequence, Union
 
 import nuthouse01.nuthouse01_core as core
 
@@ -17,7 +20,9 @@ __all__ = ['ShadowMode', 'Vmd', 'VmdBoneFrame', 'VmdCamFrame', 'VmdHeader', 'Vmd
 # this is an abstract base class that all the PMX classes inherit
 # this lets them all get the __str__ method and forces them all to implement list()
 # it also lets me detect any of them by isinstance(x, _BasePmx)
+# they all use __slots__ instead of a per-instance __dict__ because there can be millions of frames
 class _BaseVmd(abc.ABC):
+	__slots__ = ()
 	def copy(self):
 		""" Return a separate copy of the object. """
 		return copy.deepcopy(self)
@@ -31,6 +36,12 @@ class _BaseVmd(abc.ABC):
 		Should not be called directly. """
 		pass
 	
+	@classmethod
+	def _bulk_columns(cls, items: list):
+		""" The checks of _validate() for validate_frames(), as (description, column, check) for each member.
+		Classes that don't overload this have each item checked with _validate(). """
+		yield "_validate()", items, _CHECK_EACH
+	
 	def validate(self, parentlist=None) -> bool:
 		""" This performs type-checking and input validation on the item, as a way to protect against bad code
 		assigning invalid values or incorrect datatypes into my structures. If it fails it will raise an Exception
@@ -101,6 +112,97 @@ def is_good_flag(thing) -> True:
 	return (thing is 1) or (thing is 0) or (thing is True) or (thing is False)
 
 
+# bulk validation: the same checks as _validate() but a whole column (one member of every frame) at a time, mostly
+# with C-level map/set/min/max. each check is (whole column is ok?, single item is ok?), the single item version is
+# only used to find the first bad frame once the whole column failed.
+class _SparseColumn(list):
+	""" A column where None means "this check doesn't apply to this frame". """
+	pass
+
+def _is_number_type(t: type) -> bool: return issubclass(t, (int, float))
+def _types(col) -> set: return set(map(type, col))
+
+_CHECK_STR = (lambda col: _types(col) <= {str},
+			  lambda v: isinstance(v, str))
+_CHECK_NUMBER = (lambda col: all(map(_is_number_type, _types(col))),
+				 lambda v: isinstance(v, (int,float)))
+_CHECK_FLAG = (lambda col: _types(col) <= {int, bool} and set(col) <= {0, 1},
+			   is_good_flag)
+
+def _check_int(lo: int=None, hi: int=None) -> tuple:
+	def column_ok(col):
+		return _types(col) <= {int, bool} and (not col or ((lo is None or min(col) >= lo) and (hi is None or max(col) <= hi)))
+	def item_ok(v):
+		return isinstance(v, int) and (lo is None or v >= lo) and (hi is None or v <= hi)
+	return column_ok, item_ok
+
+def _check_vector(length: int, lo: float=None, hi: float=None, ints=False) -> tuple:
+	def column_ok(col):
+		if not _types(col) <= {list, tuple} or set(map(len, col)) - {length}: return False
+		flat = list(itertools.chain.from_iterable(col))
+		if ints: ok = _types(flat) <= {int, bool}
+		else:    ok = all(map(_is_number_type, _types(flat)))
+		return ok and (lo is None or not flat or (lo <= min(flat) and max(flat) <= hi))
+	def item_ok(v):
+		if ints: ok = isinstance(v, (list,tuple)) and len(v) == length and all(isinstance(a, int) for a in v)
+		else:    ok = is_good_vector(length, v)
+		return ok and (lo is None or all(lo <= a <= hi for a in v))
+	return column_ok, item_ok
+
+def _check_bytes(length: int) -> tuple:
+	return (lambda col: _types(col) <= {bytes} and set(map(len, col)) <= {length},
+			lambda v: isinstance(v, bytes) and len(v) == length)
+
+def _check_members(check: tuple) -> tuple:
+	# the same check for a column where each frame has a list of values, a bad value reports the frame it is in
+	column_ok, item_ok = check
+	return (lambda col: column_ok(list(itertools.chain.from_iterable(col))),
+			lambda v: all(map(item_ok, v)))
+
+def _passes_validate(thing) -> bool:
+	try:
+		thing._validate()
+		return True
+	except (AssertionError, RuntimeError):
+		return False
+# no column checks for this type, just run the normal _validate() on each one
+_CHECK_EACH = (lambda col: False, _passes_validate)
+_CHECK_INTERP = _check_vector(4, 0, 127, ints=True)
+
+def _report_bulk_fail(class_name: str, check: str, idx: Union[int, None]):
+	core.MY_PRINT_FUNC('VALIDATE ERROR: Object "{}" failed bulk validation check "{}"'.format(class_name, check))
+	core.MY_PRINT_FUNC("This happens when the PMX/VMD object has incorrect data sizes/types.")
+	core.MY_PRINT_FUNC("Figure out why/how bad data got into this field, then stop it from happening in the future!")
+	if idx is not None:
+		core.MY_PRINT_FUNC('Object {} found at index {} of containing list'.format(class_name, idx))
+	raise RuntimeError("validation fail")
+
+def validate_frames(frames: list, frame_type: type, index_offset=0) -> bool:
+	"""
+	Same checks as calling validate() on every frame in the list, but done a whole column (one member of every
+	frame) at a time, which is much faster for big lists. If anything fails, the first bad frame is reported by its
+	index and RuntimeError is raised, like validate() does.
+	
+	:param frames: list of frames that should all be frame_type
+	:param frame_type: VmdBoneFrame, VmdMorphFrame, etc
+	:param index_offset: added to the index that is reported, if frames is only a part of a bigger list
+	:return: True, if it didn't raise
+	"""
+	if not _types(frames) <= {frame_type}:
+		for idx, frame in enumerate(frames):
+			if not isinstance(frame, frame_type):
+				_report_bulk_fail(frame_type.__name__, "isinstance(frame, %s)" % frame_type.__name__, idx + index_offset)
+	for check, column, (column_ok, item_ok) in frame_type._bulk_columns(frames):
+		sparse = isinstance(column, _SparseColumn)
+		present = [v for v in column if v is not None] if sparse else column
+		if column_ok(present):
+			continue
+		for idx, v in enumerate(column):
+			if not (sparse and v is None) and not item_ok(v):
+				_report_bulk_fail(frame_type.__name__, check, idx + index_offset)
+	return True
+
+
 class ShadowMode(enum.Enum):
 	OFF = 0
 	MODE1 = 1
@@ -111,7 +213,108 @@ class ShadowMode(enum.Enum):
 # that way they can be used to easily convert vmd to txt
 
 
+# the interpolation blocks exactly as they are stored in a VMD file, frames read from a file keep these bytes as-is
+# bone: the 16-byte line (x_ax y_ax z_ax r_ax x_ay ... r_by) repeated 4 times, each copy shifted 1 more byte, where
+# bytes 2,3 of the first copy hold the physics flag, so z_ax and r_ax are taken from the second copy
+_bone_interp_struct = struct.Struct("<bb 2x 12b x bb 45x")
+# cam: (ax bx ay by) for each of x y z r dist fov
+_cam_interp_struct = struct.Struct("<24b")
+
+# interp_* that are omitted all share this one tuple instead of each getting a copy of the default list, until the
+# attribute is read for the first time, then that frame gets its own list that can be changed in place. interp blocks
+# unpacked from a file are shared tuples in the same way
+DEFAULT_INTERP = tuple(core.interpolation_default_linear)
+# the whole set of interp_* for a frame with all of them omitted, by number of channels
+_DEFAULT_INTERPS = {4: (DEFAULT_INTERP,) * 4, 6: (DEFAULT_INTERP,) * 6}
+
+def _interp_channel(i: int):
+	# one of the interp_* attributes of a _RawInterpFrame
+	def getter(self):
+		interps = self._get_interps()
+		value = interps[i]
+		if isinstance(value, tuple):
+			# the first read of a shared interp_*, the caller might change it in place so it can't be shared anymore
+			if isinstance(interps, tuple):
+				interps = self._interps = list(interps)
+			value = interps[i] = list(value)
+		return value
+	def setter(self, value):
+		interps = self._get_interps()
+		if isinstance(interps, tuple):
+			# still the shared all-default set, give this frame its own before changing it
+			interps = self._interps = list(interps)
+		interps[i] = value
+	return property(getter, setter)
+
+def _bulk_interp_columns(frames: list, channels: tuple, raw_size: int):
+	# interp lists that were never unpacked from the file don't need checking, only the raw block
+	yield ("interp_raw: %d bytes" % raw_size,
+		   _SparseColumn([x._interp_raw if x._interps is None else None for x in frames]), _check_bytes(raw_size))
+	for i, channel in enumerate(channels):
+		yield ("interp_%s: 4 ints [0-127]" % channel,
+			   _SparseColumn([x._interps[i] if x._interps is not None else None for x in frames]), _CHECK_INTERP)
+
+class _RawInterpFrame(_BaseVmd):
+	"""
+	Frames read from a VMD keep the raw interpolation block from the file and only unpack it into the interp_* lists
+	when one of them is used. As long as the lists still match the block, source_interp() returns it, and it is
+	written back out unchanged instead of being rebuilt from the lists.
+	"""
+	__slots__ = ("_interp_raw", "_interps")
+	_INTERP_SIZE = 0
+	
+	def _init_interps(self, interps: list, interp_raw: Union[bytes, None]):
+		self._interp_raw = interp_raw
+		if interp_raw is not None:
+			self._interps = None
+		elif interps.count(None) == len(interps):
+			self._interps = _DEFAULT_INTERPS[len(interps)]
+		else:
+			# if omitted, set to default linear interpolation values. a tuple is smaller, assigning to one of the
+			# interp_* attributes turns it into a list
+			self._interps = tuple(DEFAULT_INTERP if i is None else i for i in interps)
+	@staticmethod
+	@abc.abstractmethod
+	def _decode_interp(interp_raw: bytes) -> tuple:
+		"""
+		Unpack the raw block into a tuple of interp tuples, in the same order as the interp_* attributes. A VMD only has
+		a handful of distinct blocks, so this is cached and the result is shared between frames.
+		"""
+		pass
+	def _get_interps(self) -> list:
+		if self._interps is None:
+			self._interps = self._decode_interp(self._interp_raw)
+		return self._interps
+	def interp_lists(self) -> Sequence:
+		"""
+		All the interp_* values, in the same order as the attributes, for reading only. Unlike reading the attributes
+		one by one, omitted ones stay the shared DEFAULT_INTERP instead of the frame getting its own copy.
+		"""
+		return self._get_interps()
+	def source_interp(self) -> Union[bytes, None]:
+		"""
+		The interpolation block this frame was read with, if the interp lists still match it. Otherwise None, and
+		the block must be built from the interp lists.
+		"""
+		if self._interp_raw is None:
+			return None
+		if self._interps is not None:
+			decoded = self._decode_interp(self._interp_raw)
+			# channels that were read are lists now, the rest are still the shared tuples
+			if self._interps is not decoded and any(tuple(a) != b for a, b in zip(self._interps, decoded)):
+				return None
+		return self._interp_raw
+	def _validate_interp_raw(self) -> bool:
+		# True if the interp lists were never unpacked, then the raw block is what needs to be checked
+		if self._interps is not None:
+			return False
+		assert isinstance(self._interp_raw, bytes)
+		assert len(self._interp_raw) == self._INTERP_SIZE
+		return True
+
+
 class VmdHeader(_BaseVmd):
+	__slots__ = ("version", "modelname")
 	def __init__(self, version: int, modelname: str):
 		self.version = version
 		self.modelname = modelname
@@ -124,7 +327,13 @@ class VmdHeader(_BaseVmd):
 		# modelname: str
 		assert isinstance(self.modelname, str)
 
-class VmdBoneFrame(_BaseVmd):
+@functools.lru_cache(maxsize=4096)
+def _quaternion_to_euler(quat: tuple) -> tuple:
+	# a VMD only has a handful of distinct rotations, so each one is only converted once
+	return tuple(core.quaternion_to_euler(list(quat)))
+
+class VmdBoneFrame(_RawInterpFrame):
+	__slots__ = ("name", "f", "pos", "_quat", "_rot", "phys_off", "_raw_phys_off")
 	def __init__(self,
 				 name: str,
 				 f: int,
@@ -135,11 +344,18 @@ class VmdBoneFrame(_BaseVmd):
 				 interp_y: List[int]=None,
 				 interp_z: List[int]=None,
 				 interp_r: List[int]=None,
+				 quat: tuple=None,
+				 interp_raw: bytes=None,
 				 ):
 		self.name = name
 		self.f = f
 		self.pos = pos  # X Y Z
-		self.rot = rot  # X Y Z euler angles in degrees
+		# the rotation is stored as a quaternion in the file. when read from a file, rot can be None and the W X Y Z
+		# quaternion is given instead, it is only converted to euler angles when rot is first read. as long as rot
+		# isn't changed, the quaternion is written back out exactly as it was read, see source_quat().
+		self._quat = quat
+		self._rot = rot  # X Y Z euler angles in degrees
+		if rot is not None: self._quat = None
 		self.phys_off = phys_off
 		
 		# all interpolation parameters are stored as (Ax, Ay, Bx, By)
@@ -148,16 +364,59 @@ class VmdBoneFrame(_BaseVmd):
 		# if omitted, set to default linear interpolation values
 		# the x-channel, y-channel, z-channel, and rotation channel are all stored independently
 		# NOTE: interpolation data for is used when moving from teh PREVIOUS frame to THIS frame
-		if interp_x is None: self.interp_x = core.interpolation_default_linear.copy()
-		else:                self.interp_x = interp_x  # interpolation parameters for the X motion
-		if interp_y is None: self.interp_y = core.interpolation_default_linear.copy()
-		else:                self.interp_y = interp_y  # interpolation parameters for the Y motion
-		if interp_z is None: self.interp_z = core.interpolation_default_linear.copy()
-		else:                self.interp_z = interp_z  # interpolation parameters for the Z motion
-		if interp_r is None: self.interp_r = core.interpolation_default_linear.copy()
-		else:                self.interp_r = interp_r  # interpolation parameters for the rotation
+		# when read from a file, interp_raw is the 64-byte block instead, see _RawInterpFrame. it also holds the
+		# physics flag, so it is only written back unchanged if phys_off still has the value it was read with
+		self._init_interps([interp_x, interp_y, interp_z, interp_r], interp_raw)
+		self._raw_phys_off = phys_off is True
+	interp_x = _interp_channel(0)  # interpolation parameters for the X motion
+	interp_y = _interp_channel(1)  # interpolation parameters for the Y motion
+	interp_z = _interp_channel(2)  # interpolation parameters for the Z motion
+	interp_r = _interp_channel(3)  # interpolation parameters for the rotation
+	_INTERP_SIZE = _bone_interp_struct.size
+	@staticmethod
+	@functools.lru_cache(maxsize=4096)
+	def _decode_interp(interp_raw: bytes) -> tuple:
+		(x_ax, y_ax, x_ay, y_ay, z_ay, r_ay, x_bx, y_bx, z_bx, r_bx, x_by, y_by, z_by, r_by,
+		 z_ax, r_ax) = _bone_interp_struct.unpack(interp_raw)
+		return (x_ax, x_ay, x_bx, x_by), (y_ax, y_ay, y_bx, y_by), (z_ax, z_ay, z_bx, z_by), (r_ax, r_ay, r_bx, r_by)
+	@classmethod
+	def _bulk_columns(cls, frames: list):
+		yield "name: str", [x.name for x in frames], _CHECK_STR
+		yield "f: int >= 0", [x.f for x in frames], _check_int(0)
+		yield "pos: vec3", [x.pos for x in frames], _check_vector(3)
+		yield "rot: vec3", _SparseColumn([x._rot for x in frames]), _check_vector(3)
+		# a frame without rot must have its quaternion, () makes one that has neither fail
+		yield "quat: vec4", _SparseColumn([(x._quat or ()) if x._rot is None else None for x in frames]), _check_vector(4)
+		yield "phys_off: flag", [x.phys_off for x in frames], _CHECK_FLAG
+		yield from _bulk_interp_columns(frames, ("x", "y", "z", "r"), _bone_interp_struct.size)
+	def source_interp(self) -> Union[bytes, None]:
+		if (self.phys_off is True) != self._raw_phys_off:
+			return None
+		return super().source_interp()
+	@property
+	def rot(self) -> List[float]:
+		# X Y Z euler angles in degrees
+		if self._rot is None:
+			self._rot = list(_quaternion_to_euler(self._quat))
+		return self._rot
+	@rot.setter
+	def rot(self, rot: List[float]):
+		self._rot = rot
+		self._quat = None
+	def source_quat(self) -> Union[tuple, None]:
+		"""
+		The W X Y Z quaternion this frame was read with, if rot still matches it (it hasn't been assigned or changed
+		in place since it was derived from the quaternion). Otherwise None, and the rotation must be taken from rot.
+		"""
+		if self._quat is None:
+			return None
+		# compare against the conversion again instead of keeping a copy of what rot was derived as, it is cached
+		if self._rot is not None and tuple(self._rot) != _quaternion_to_euler(self._quat):
+			return None
+		return self._quat
 	def list(self) -> list:
-		return [self.name, self.f, *self.pos, *self.rot, self.phys_off, *self.interp_x, *self.interp_y, *self.interp_z, *self.interp_r]
+		x, y, z, r = self.interp_lists()
+		return [self.name, self.f, *self.pos, *self.rot, self.phys_off, *x, *y, *z, *r]
 	def _validate(self, parentlist=None):
 		# name: str, at this level i don't care about the 15 byte limit
 		assert isinstance(self.name, str)
@@ -166,10 +425,13 @@ class VmdBoneFrame(_BaseVmd):
 		assert self.f >= 0
 		# pos: X Y Z position vec3
 		assert is_good_vector(3, self.pos)
-		# rot: X Y Z rotation vec3, degrees
-		assert is_good_vector(3, self.rot)
+		# rot: X Y Z rotation vec3, degrees. or if it was never read, the W X Y Z quaternion it comes from
+		if self._rot is None: assert is_good_vector(4, self._quat)
+		else:                 assert is_good_vector(3, self._rot)
 		# phys_off: bool flag
 		assert is_good_flag(self.phys_off)
+		# interp lists that were never unpacked from the file don't need checking
+		if self._validate_interp_raw(): return
 		# interp_x: list of 4 ints, each limited to range [0 - 127]
 		assert isinstance(self.interp_x, (list,tuple))
 		assert len(self.interp_x) == 4
@@ -197,6 +459,7 @@ class VmdBoneFrame(_BaseVmd):
 
 
 class VmdMorphFrame(_BaseVmd):
+	__slots__ = ("name", "f", "val")
 	def __init__(self,
 				 name: str,
 				 f: int,
@@ -205,6 +468,11 @@ class VmdMorphFrame(_BaseVmd):
 		self.name = name
 		self.f = f
 		self.val = val
+	@classmethod
+	def _bulk_columns(cls, frames: list):
+		yield "name: str", [x.name for x in frames], _CHECK_STR
+		yield "f: int >= 0", [x.f for x in frames], _check_int(0)
+		yield "val: float", [x.val for x in frames], _CHECK_NUMBER
 	def list(self) -> list:
 		return [self.name, self.f, self.val]
 	def _validate(self, parentlist=None):
@@ -216,7 +484,8 @@ class VmdMorphFrame(_BaseVmd):
 		# val: the value of the morph, float, normally 0 to 1 but can technically be anything
 		assert isinstance(self.val, (int,float))
 
-class VmdCamFrame(_BaseVmd):
+class VmdCamFrame(_RawInterpFrame):
+	__slots__ = ("f", "pos", "rot", "dist", "fov", "perspective")
 	def __init__(self,
 				 f: int,
 				 dist: float,
@@ -230,6 +499,7 @@ class VmdCamFrame(_BaseVmd):
 				 interp_r: List[int]=None,
 				 interp_dist: List[int]=None,
 				 interp_fov: List[int]=None,
+				 interp_raw: bytes=None,
 				 ):
 		self.f = f
 		self.pos = pos  # X Y Z float
@@ -249,22 +519,34 @@ class VmdCamFrame(_BaseVmd):
 		# if omitted, set to default linear interpolation values
 		# the x-channel, y-channel, z-channel, rotation channel, distance channel, and FOV channel are all stored independently
 		# NOTE: interpolation data for is used when moving from teh PREVIOUS frame to THIS frame
-		if interp_x is None: self.interp_x = core.interpolation_default_linear.copy()
-		else:                self.interp_x = interp_x  # interpolation parameters for the X motion
-		if interp_y is None: self.interp_y = core.interpolation_default_linear.copy()
-		else:                self.interp_y = interp_y  # interpolation parameters for the Y motion
-		if interp_z is None: self.interp_z = core.interpolation_default_linear.copy()
-		else:                self.interp_z = interp_z  # interpolation parameters for the Z motion
-		if interp_r is None: self.interp_r = core.interpolation_default_linear.copy()
-		else:                self.interp_r = interp_r  # interpolation parameters for the rotation
-		if interp_dist is None: self.interp_dist = core.interpolation_default_linear.copy()
-		else:                self.interp_dist = interp_dist  # interpolation parameters for the distance to focal point
-		if interp_fov is None: self.interp_fov = core.interpolation_default_linear.copy()
-		else:                self.interp_fov = interp_fov  # interpolation parameters for the FOV slider
+		# when read from a file, interp_raw is the 24-byte block instead, see _RawInterpFrame
+		self._init_interps([interp_x, interp_y, interp_z, interp_r, interp_dist, interp_fov], interp_raw)
+	interp_x = _interp_channel(0)  # interpolation parameters for the X motion
+	interp_y = _interp_channel(1)  # interpolation parameters for the Y motion
+	interp_z = _interp_channel(2)  # interpolation parameters for the Z motion
+	interp_r = _interp_channel(3)  # interpolation parameters for the rotation
+	interp_dist = _interp_channel(4)  # interpolation parameters for the distance to focal point
+	interp_fov = _interp_channel(5)  # interpolation parameters for the FOV slider
+	_INTERP_SIZE = _cam_interp_struct.size
+	@classmethod
+	def _bulk_columns(cls, frames: list):
+		yield "f: int >= 0", [x.f for x in frames], _check_int(0)
+		yield "pos: vec3", [x.pos for x in frames], _check_vector(3)
+		yield "rot: vec3", [x.rot for x in frames], _check_vector(3)
+		yield "dist: float", [x.dist for x in frames], _CHECK_NUMBER
+		yield "fov: int", [x.fov for x in frames], _check_int()
+		yield "perspective: flag", [x.perspective for x in frames], _CHECK_FLAG
+		yield from _bulk_interp_columns(frames, ("x", "y", "z", "r", "dist", "fov"), _cam_interp_struct.size)
+	@staticmethod
+	@functools.lru_cache(maxsize=4096)
+	def _decode_interp(interp_raw: bytes) -> tuple:
+		# stored as (ax bx ay by) but kept as (ax ay bx by)
+		v = _cam_interp_struct.unpack(interp_raw)
+		return tuple((v[i], v[i+2], v[i+1], v[i+3]) for i in range(0, 24, 4))
 
 	def list(self) -> list:
-		return [self.f, self.dist, *self.pos, *self.rot, self.fov, self.perspective,
-				*self.interp_x, *self.interp_y, *self.interp_z, *self.interp_r, *self.interp_dist, *self.interp_fov]
+		x, y, z, r, dist, fov = self.interp_lists()
+		return [self.f, self.dist, *self.pos, *self.rot, self.fov, self.perspective, *x, *y, *z, *r, *dist, *fov]
 	def _validate(self, parentlist=None):
 		# f: int, frame number, cannot be negative
 		assert isinstance(self.f, int)
@@ -279,6 +561,8 @@ class VmdCamFrame(_BaseVmd):
 		assert isinstance(self.fov, int)
 		# perspective: bool flag
 		assert is_good_flag(self.perspective)
+		# interp lists that were never unpacked from the file don't need checking
+		if self._validate_interp_raw(): return
 		# interp_x: list of 4 ints, each limited to range [0 - 127]
 		assert isinstance(self.interp_x, (list,tuple))
 		assert len(self.interp_x) == 4
@@ -318,6 +602,7 @@ class VmdCamFrame(_BaseVmd):
 
 
 class VmdLightFrame(_BaseVmd):
+	__slots__ = ("f", "color", "pos")
 	def __init__(self,
 				 f: int,
 				 color: List[float],
@@ -326,6 +611,11 @@ class VmdLightFrame(_BaseVmd):
 		self.f = f
 		self.color = color  # R G B float [0.0 - 1.0]
 		self.pos = pos  # X Y Z
+	@classmethod
+	def _bulk_columns(cls, frames: list):
+		yield "f: int >= 0", [x.f for x in frames], _check_int(0)
+		yield "pos: vec3 [-1.0 - 1.0]", [x.pos for x in frames], _check_vector(3, -1.0, 1.0)
+		yield "color: vec3 [0.0 - 1.0]", [x.color for x in frames], _check_vector(3, 0.0, 1.0)
 	def list(self) -> list:
 		return [self.f, *self.color, *self.pos]
 	def _validate(self, parentlist=None):
@@ -343,6 +633,7 @@ class VmdLightFrame(_BaseVmd):
 
 
 class VmdShadowFrame(_BaseVmd):
+	__slots__ = ("f", "mode", "val")
 	def __init__(self,
 				 f: int,
 				 mode: ShadowMode,
@@ -353,6 +644,12 @@ class VmdShadowFrame(_BaseVmd):
 		self.mode = mode
 		# val: controls the shadow draw distance I think? int [0-9999]
 		self.val = val
+	@classmethod
+	def _bulk_columns(cls, frames: list):
+		yield "f: int >= 0", [x.f for x in frames], _check_int(0)
+		yield "mode: ShadowMode", [x.mode for x in frames], (lambda col: _types(col) <= {ShadowMode},
+															 lambda v: isinstance(v, ShadowMode))
+		yield "val: int [0 - 9999]", [x.val for x in frames], _check_int(0, 9999)
 	def list(self) -> list:
 		return [self.f, self.mode.value, self.val]
 	def _validate(self, parentlist=None):
@@ -367,6 +664,7 @@ class VmdShadowFrame(_BaseVmd):
 
 
 class VmdIkbone(_BaseVmd):
+	__slots__ = ("name", "enable")
 	def __init__(self,
 				 name: str,
 				 enable: bool
@@ -383,6 +681,7 @@ class VmdIkbone(_BaseVmd):
 
 
 class VmdIkdispFrame(_BaseVmd):
+	__slots__ = ("f", "disp", "ikbones")
 	def __init__(self,
 				 f: int,
 				 disp: bool,
@@ -392,6 +691,17 @@ class VmdIkdispFrame(_BaseVmd):
 		# disp: is the model currently being rendered? bool flag
 		self.disp = disp
 		self.ikbones = ikbones
+	@classmethod
+	def _bulk_columns(cls, frames: list):
+		yield "f: int >= 0", [x.f for x in frames], _check_int(0)
+		yield "disp: flag", [x.disp for x in frames], _CHECK_FLAG
+		# each check only runs once the ones before it passed, so after this ikbones can be iterated
+		yield "ikbones: list", [x.ikbones for x in frames], (lambda col: _types(col) <= {list, tuple},
+															 lambda v: isinstance(v, (list,tuple)))
+		yield "ikbones: VmdIkbone", [x.ikbones for x in frames], _check_members((lambda col: _types(col) <= {VmdIkbone},
+																				 lambda v: isinstance(v, VmdIkbone)))
+		yield "ikbone.name: str", [[a.name for a in x.ikbones] for x in frames], _check_members(_CHECK_STR)
+		yield "ikbone.enable: flag", [[a.enable for a in x.ikbones] for x in frames], _check_members(_CHECK_FLAG)
 	def list(self) -> list:
 		ret = [self.f, self.disp]
 		for ik in self.ikbones:
@@ -411,6 +721,8 @@ class VmdIkdispFrame(_BaseVmd):
 
 
 class Vmd(_BaseVmd):
+	__slots__ = ("header", "boneframes", "morphframes", "camframes", "lightframes", "shadowframes", "ikdispframes",
+				 "frames_sorted")
 	def __init__(self,
 				 header: VmdHeader,
 				 boneframes: List[VmdBoneFrame],
@@ -418,7 +730,8 @@ class Vmd(_BaseVmd):
 				 camframes: List[VmdCamFrame],
 				 lightframes: List[VmdLightFrame],
 				 shadowframes: List[VmdShadowFrame],
-				 ikdispframes: List[VmdIkdispFrame]
+				 ikdispframes: List[VmdIkdispFrame],
+				 frames_sorted: bool=False,
 				 ):
 		# header = version, modelname
 		# self.version = version
@@ -430,6 +743,26 @@ class Vmd(_BaseVmd):
 		self.lightframes = 	lightframes
 		self.shadowframes = shadowframes
 		self.ikdispframes = ikdispframes
+		# frames_sorted: set by code that builds the frame lists already in the order write_vmd() would sort them in
+		# (bones & morphs by name then frame number, everything else by frame number), so they aren't sorted again.
+		# it is a promise about the lists, anything that changes them afterwards must set it back to False
+		self.frames_sorted = frames_sorted
+	def validate_bulk(self) -> bool:
+		"""
+		Same checks as validate(), but each frame list is checked with validate_frames(), a whole column at a time.
+		Much faster for big VMDs, and a failure reports the index of the first bad frame directly.
+		Like validate(), this doesn't check how long the names are once encoded. Names that are too long for the file
+		are still only a warning when writing, they get cut off like they always have, see warn_long_names().
+		"""
+		self.header.validate()
+		for section, frame_type in (("boneframes", VmdBoneFrame), ("morphframes", VmdMorphFrame),
+									("camframes", VmdCamFrame), ("lightframes", VmdLightFrame),
+									("shadowframes", VmdShadowFrame), ("ikdispframes", VmdIkdispFrame)):
+			frames = getattr(self, section)
+			if not isinstance(frames, (list,tuple)):
+				_report_bulk_fail("Vmd", "%s: list" % section, None)
+			validate_frames(frames, frame_type)
+		return True
 	def list(self) -> list:
 		return [self.header.list(),
 				[i.list() for i in self.boneframes],
@@ -474,8 +807,59 @@ class Vmd(_BaseVmd):
 			assert a.validate(parentlist=self.ikdispframes)
 		pass
 
+def measure_frame_footprint(count=20000) -> dict:
+	"""
+	Benchmark how many bytes one frame takes in memory, counting everything it owns (lists, floats, strings...) but
+	not things that are shared between frames. Builds "count" frames of each kind and measures with tracemalloc.
+	
+	:param count: number of frames of each kind to build
+	:return: dict of frame kind -> bytes per frame
+	"""
+	import tracemalloc
+	
+	# the parser shares identical interp blocks between frames
+	interp_raw = bytes(64)
+	kinds = {
+		# what the parser gives: raw quaternion and interp block, no euler angles or interp lists yet
+		"bone frame, read from file": lambda i: VmdBoneFrame(
+			name="bone%d" % (i % 100), f=i, pos=[i + 0.5, 1.5, 2.5], rot=None, phys_off=False,
+			quat=(1.0, 0.0, 0.0, i + 0.5), interp_raw=interp_raw),
+		"bone frame, read from file, rot+interp used": lambda i: VmdBoneFrame(
+			name="bone%d" % (i % 100), f=i, pos=[i + 0.5, 1.5, 2.5], rot=None, phys_off=False,
+			quat=(1.0, 0.0, 0.0, i + 0.5), interp_raw=interp_raw),
+		"bone frame, default interp": lambda i: VmdBoneFrame(
+			name="bone%d" % (i % 100), f=i, pos=[i + 0.5, 1.5, 2.5], rot=[i + 0.5, 1.5, 2.5], phys_off=False),
+		"bone frame, own interp lists": lambda i: VmdBoneFrame(
+			name="bone%d" % (i % 100), f=i, pos=[i + 0.5, 1.5, 2.5], rot=[i + 0.5, 1.5, 2.5], phys_off=False,
+			interp_x=[20, 20, 107, 107], interp_y=[20, 20, 107, 107],
+			interp_z=[20, 20, 107, 107], interp_r=[20, 20, 107, 107]),
+		"morph frame": lambda i: VmdMorphFrame(name="morph%d" % (i % 100), f=i, val=i + 0.5),
+		"cam frame, default interp": lambda i: VmdCamFrame(
+			f=i, dist=i + 0.5, pos=[i + 0.5, 1.5, 2.5], rot=[i + 0.5, 1.5, 2.5], fov=30, perspective=True),
+	}
+	retme = {}
+	for kind, make in kinds.items():
+		# names are shared between frames in a real VMD too, so make them before measuring
+		[make(i) for i in range(100)]
+		tracemalloc.start()
+		before = tracemalloc.get_traced_memory()[0]
+		frames = [make(i) for i in range(count)]
+		if "used" in kind:
+			for frame in frames: (frame.rot, frame.interp_x)
+		after = tracemalloc.get_traced_memory()[0]
+		tracemalloc.stop()
+		# don't count the list holding the frames
+		retme[kind] = (after - before - sys.getsizeof(frames)) / count
+		del frames
+	return retme
+
+def main():
+	core.MY_PRINT_FUNC("Memory footprint per frame:")
+	for kind, size in measure_frame_footprint().items():
+		core.MY_PRINT_FUNC("...%-45s= %d bytes" % (kind, size))
+
 if __name__ == '__main__':
 	print(_SCRIPT_VERSION)
-	core.pause_and_quit("you are not supposed to directly run this file haha")
+	main()
 
 
@@ -0,0 +1,171 @@
+import bisect
+from array import array
+from typing import Dict, List, Union
+
+import nuthouse01.nuthouse01_core as core
+import nuthouse01.nuthouse01_vmd_parser as vmdlib
+import nuthouse01.nuthouse01_vmd_struct as vmdstruct
+
+_SCRIPT_VERSION = "Script version:  Nuthouse01 - v1.07.04 - 8/19/2021"
+
+################################################################################
+# this file defines a columnar alternative to the frame lists of a Vmd object.
+# bone and morph frames are stored as one row per frame in flat arrays (frame numbers, positions, quaternions, interp
+# bytes, morph values), sorted by track (bone/morph name) and then by frame number, with the start row of every track
+# remembered. everything that groups frames by name and sorts them can just look up the rows of a track instead.
+#
+# FUNCTIONS & STRUCTURE:
+#
+# VmdTrackTable.from_frames() / VmdTrackTable.to_frames()
+# VmdTracks.from_vmd() / VmdTracks.to_vmd()
+
+BONEFRAME_OR_MORPHFRAME = Union[vmdstruct.VmdBoneFrame, vmdstruct.VmdMorphFrame]
+
+# size of the bone interpolation block, stored as-is in VmdTrackTable.interp
+INTERP_SIZE = 64
+
+
+class VmdTrackTable:
+	"""
+	All the bone frames or all the morph frames of a VMD, stored by column instead of as a list of objects.
+	Rows are sorted by track (the bone/morph name, in the same order read_vmd() sorts them) and then by frame number,
+	so the frames of one track are one contiguous range of rows, see rows().
+	Columns, one entry per row unless noted:
+		track: index into names
+		f: frame number
+		bones only:  pos (3 per row: X Y Z), quat (4 per row: W X Y Z), phys_off, interp (64 bytes per row)
+		morphs only: val
+	Build it with from_frames() or VmdTracks.from_vmd(), it is not meant to be changed afterwards.
+	"""
+	def __init__(self, section: str):
+		if section not in ("boneframes", "morphframes"):
+			raise ValueError("ERR: VmdTrackTable only holds boneframes or morphframes, not '%s'" % section)
+		self.section = section
+		self.names = []  # type: List[str]
+		self._name_to_track = {}  # type: Dict[str, int]
+		# first row of every track, plus one entry past the end so track t is rows starts[t] to starts[t+1]
+		self.starts = array("I", [0])
+		self.track = array("I")
+		self.f = array("I")
+		# bones
+		self.pos = array("d")
+		self.quat = array("d")
+		self.phys_off = array("b")
+		self.interp = bytearray()
+		# morphs
+		self.val = array("d")
+
+	@classmethod
+	def from_frames(cls, section: str, frames: List[BONEFRAME_OR_MORPHFRAME]) -> 'VmdTrackTable':
+		"""
+		Build the table from a list of VmdBoneFrame or VmdMorphFrame. This sorts them once, by name and then frame
+		number. Rotations are stored as quaternions, taken from source_quat() when the frame still has one.
+
+		:param section: "boneframes" or "morphframes"
+		:param frames: list of frames of that type
+		:return: new VmdTrackTable
+		"""
+		table = cls(section)
+		ordered = sorted(frames, key=lambda x: (x.name, x.f))
+		is_bone = section == "boneframes"
+		for row, frame in enumerate(ordered):
+			if not table.names or frame.name != table.names[-1]:
+				# first row of a new track
+				if table.names: table.starts.append(row)
+				table._name_to_track[frame.name] = len(table.names)
+				table.names.append(frame.name)
+			table.track.append(len(table.names) - 1)
+			table.f.append(frame.f)
+			if is_bone:
+				table.pos.extend(frame.pos)
+				quat = frame.source_quat()
+				if quat is None:
+					quat = core.euler_to_quaternion(frame.rot)  # w x y z
+				table.quat.extend(quat)
+				table.phys_off.append(frame.phys_off is True)
+				table.interp += vmdlib.encode_boneframe_interp(frame)
+			else:
+				table.val.append(frame.val)
+		if ordered: table.starts.append(len(ordered))
+		return table
+
+	def __len__(self) -> int:
+		return len(self.f)
+
+	def rows(self, name: str) -> range:
+		""" The rows holding the frames of this track, in frame order. Empty if the track has no frames. """
+		t = self._name_to_track.get(name)
+		if t is None: return range(0)
+		return range(self.starts[t], self.starts[t + 1])
+
+	def frame_numbers(self, name: str) -> array:
+		""" Frame numbers of all frames of this track, sorted. """
+		r = self.rows(name)
+		return self.f[r.start:r.stop]
+
+	def find(self, name: str, f: int) -> Union[int, None]:
+		""" The row of the frame of this track at frame number f, or None if there isn't one. """
+		r = self.rows(name)
+		row = bisect.bisect_left(self.f, f, r.start, r.stop)
+		if row < r.stop and self.f[row] == f: return row
+		return None
+
+	def frame(self, row: int) -> BONEFRAME_OR_MORPHFRAME:
+		""" Build the VmdBoneFrame or VmdMorphFrame object of one row. """
+		name = self.names[self.track[row]]
+		if self.section == "morphframes":
+			return vmdstruct.VmdMorphFrame(name=name, f=self.f[row], val=self.val[row])
+		return vmdstruct.VmdBoneFrame(
+			name=name, f=self.f[row], pos=self.pos[row*3:row*3 + 3].tolist(), rot=None,
+			phys_off=bool(self.phys_off[row]), quat=tuple(self.quat[row*4:row*4 + 4]),
+			interp_raw=bytes(self.interp[row*INTERP_SIZE:(row + 1)*INTERP_SIZE]),
+		)
+
+	def to_frames(self) -> List[BONEFRAME_OR_MORPHFRAME]:
+		""" Build the list of frame objects, sorted by name and then frame number. """
+		return [self.frame(row) for row in range(len(self))]
+
+	def dictify(self) -> Dict[str, List[BONEFRAME_OR_MORPHFRAME]]:
+		""" Same as vmd_utils.dictify_framelist() but nothing needs to be grouped or sorted. """
+		return {name: [self.frame(row) for row in range(self.starts[t], self.starts[t + 1])]
+				for t, name in enumerate(self.names)}
+
+
+class VmdTracks:
+	"""
+	A Vmd with the bone and morph frames stored as VmdTrackTables. The other sections are small and stay lists.
+	"""
+	def __init__(self, header: vmdstruct.VmdHeader, boneframes: VmdTrackTable, morphframes: VmdTrackTable,
+				 camframes: List[vmdstruct.VmdCamFrame], lightframes: List[vmdstruct.VmdLightFrame],
+				 shadowframes: List[vmdstruct.VmdShadowFrame], ikdispframes: List[vmdstruct.VmdIkdispFrame]):
+		self.header = header
+		self.boneframes = boneframes
+		self.morphframes = morphframes
+		self.camframes = camframes
+		self.lightframes = lightframes
+		self.shadowframes = shadowframes
+		self.ikdispframes = ikdispframes
+
+	@classmethod
+	def from_vmd(cls, vmd: vmdstruct.Vmd) -> 'VmdTracks':
+		return cls(vmd.header,
+				   VmdTrackTable.from_frames("boneframes", vmd.boneframes),
+				   VmdTrackTable.from_frames("morphframes", vmd.morphframes),
+				   vmd.camframes, vmd.lightframes, vmd.shadowframes, vmd.ikdispframes)
+
+	def to_vmd(self) -> vmdstruct.Vmd:
+		"""
+		Build a normal Vmd object, with the bone and morph frames sorted by name and then frame number, and sorted
+		copies of the other sections. It is marked as sorted so write_vmd() doesn't sort it again.
+		"""
+		return vmdstruct.Vmd(self.header, self.boneframes.to_frames(), self.morphframes.to_frames(),
+							 sorted(self.camframes, key=vmdlib.FRAME_KEY),
+							 sorted(self.lightframes, key=vmdlib.FRAME_KEY),
+							 sorted(self.shadowframes, key=vmdlib.FRAME_KEY),
+							 sorted(self.ikdispframes, key=vmdlib.FRAME_KEY),
+							 frames_sorted=True)
+
+
+if __name__ == '__main__':
+	print(_SCRIPT_VERSION)
+	core.pause_and_quit("you are not supposed to directly run this file haha")
@@ -339,6 +339,7 @@ def fill_missing_boneframes_new(all_frame_list: List[VMD_BONEMORPHCAM_FRAME],
 	if isinstance(all_frame_list[0], (vmdstruct.VmdBoneFrame, vmdstruct.VmdMorphFrame)):
 		# if this list is bones/morphs, then separate them via 'dictify' and also make sure they're sorted
 		processed_so_far = 0
+		progress = core.progress_reporter(initial_size)
 		all_frame_list = assert_no_overlapping_frames(all_frame_list)
 		framedict = dictify_framelist(all_frame_list)
 		all_frames_out = []
@@ -355,7 +356,7 @@ def fill_missing_boneframes_new(all_frame_list: List[VMD_BONEMORPHCAM_FRAME],
 			num_interpolate += i
 			# print progress thingy
 			processed_so_far += len(bonelist)
-			core.print_progress_oneline(processed_so_far / initial_size)
+			progress.update(processed_so_far)
 	else:
 		# if this list is camframes, then make sure it's sorted
 		all_frame_list.sort(key=lambda x: x.f)